@@ -8,4 +8,5 @@ class NpoapiConfig(AppConfig):
     name = "npoapi"
 
     def ready(self):
-        pass  # Remove signal imports if no longer needed
+        from . import checks  # noqa: F401  Registers the shared cache check
+        from . import signals  # noqa: F401  Registers cache invalidation receivers
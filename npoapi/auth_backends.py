@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from npoapi.caching import bump_tags, get_tag_versions
+
+# Permission sets are cached per user (direct permissions plus group ids) and
+# per group, under versioned tags like the response cache (npoapi/caching.py).
+# The receivers in npoapi/signals.py bump a user's tag when their groups,
+# permissions or flags change and a group's tag when its permissions change,
+# so a warm has_perm() costs cache reads and no queries.
+
+ALL_PERMISSIONS_TAG = "permissions"  # Bumped when Permission rows change
+
+
+def user_permissions_tag(user_id):
+    return f"permissions:user:{user_id}"
+
+
+def group_permissions_tag(group_id):
+    return f"permissions:group:{group_id}"
+
+
+def invalidate_permissions(user_ids=(), group_ids=()):
+    bump_tags(
+        *[user_permissions_tag(pk) for pk in user_ids],
+        *[group_permissions_tag(pk) for pk in group_ids],
+    )
+
+
+def _perm_names(permissions):
+    rows = permissions.values_list("content_type__app_label", "codename").order_by()
+    return {f"{app_label}.{codename}" for app_label, codename in rows}
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend with user and group permissions read from the shared cache"""
+
+    def get_user_permissions(self, user_obj, obj=None):
+        if not self._has_permissions(user_obj, obj):
+            return set()
+        return self._cached(user_obj)["user"]
+
+    def get_group_permissions(self, user_obj, obj=None):
+        if not self._has_permissions(user_obj, obj):
+            return set()
+        return self._cached(user_obj)["group"]
+
+    def _has_permissions(self, user_obj, obj):
+        return user_obj.is_active and not user_obj.is_anonymous and obj is None
+
+    def _cached(self, user_obj):
+        # Once per request: the user object lives as long as the request
+        if not hasattr(user_obj, "_npoapi_permissions"):
+            user_obj._npoapi_permissions = self._load(user_obj)
+        return user_obj._npoapi_permissions
+
+    def _load(self, user_obj):
+        timeout = settings.PERMISSION_CACHE_TIMEOUT
+        tags = [ALL_PERMISSIONS_TAG, user_permissions_tag(user_obj.pk)]
+        versions = get_tag_versions(tags)
+        user_key = "npoapi:permissions:user:{}:{}:{}".format(
+            user_obj.pk, versions[tags[0]], versions[tags[1]]
+        )
+        user_entry = cache.get(user_key)
+        if user_entry is None:
+            if user_obj.is_superuser:
+                user_perms = _perm_names(Permission.objects.all())
+            else:
+                user_perms = _perm_names(user_obj.user_permissions.all())
+            user_entry = {
+                "user": user_perms,
+                "groups": list(user_obj.groups.values_list("pk", flat=True)),
+            }
+            cache.set(user_key, user_entry, timeout=timeout)
+
+        group_tags = {
+            group_id: group_permissions_tag(group_id)
+            for group_id in user_entry["groups"]
+        }
+        group_versions = get_tag_versions(group_tags.values())
+        group_keys = {
+            group_id: "npoapi:permissions:group:{}:{}:{}".format(
+                group_id, versions[ALL_PERMISSIONS_TAG], group_versions[tag]
+            )
+            for group_id, tag in group_tags.items()
+        }
+        found = cache.get_many(list(group_keys.values())) if group_keys else {}
+        group_perms = set()
+        for group_id, key in group_keys.items():
+            if key not in found:
+                found[key] = _perm_names(
+                    Permission.objects.filter(group__id=group_id)
+                )
+                cache.set(key, found[key], timeout=timeout)
+            group_perms |= found[key]
+        return {"user": user_entry["user"], "group": group_perms}
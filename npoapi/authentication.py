@@ -0,0 +1,213 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from npoapi.caching import cache_is_shared
+from npoapi.models import Token
+
+User = get_user_model()
+
+ROTATED_TOKEN_HEADER = "X-Auth-Token"
+TOKEN_COOKIE = "auth_token"
+
+# Validated tokens are remembered in two layers, keyed by a hash of the key so
+# the cache never holds usable credentials:
+#   - the default cache, for TOKEN_CACHE_SECONDS. When CACHE_URL points at a
+#     shared cache, logout and user changes clear it for every worker at once.
+#     The per-process locmem fallback is only cleared in the worker that made
+#     the change, so there entries last TOKEN_LOCAL_CACHE_SECONDS at most (and
+#     the npoapi.E001 check rejects it outside DEBUG);
+#   - a small per-process dict, for TOKEN_LOCAL_CACHE_SECONDS, which saves the
+#     cache round trip on bursts. It is only cleared in the worker that served
+#     the logout, so other workers may accept a revoked token for that long.
+# A key replaced by a rotation only exists in the cache, as a grace entry; the
+# user's grace keys are listed under _grace_key() so revocation finds them.
+# Entries hold the user's field values rather than the user object, so every
+# request gets a fresh instance (per-request state like cached permissions
+# must not leak between requests).
+
+_local = {}
+_local_lock = threading.Lock()
+LOCAL_CACHE_MAX_ENTRIES = 10000
+
+
+def _cache_key(key):
+    return "npoapi:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _local_get(cache_key):
+    hit = _local.get(cache_key)
+    if hit is None:
+        return None
+    expires, entry = hit
+    if expires < time.monotonic():
+        _local.pop(cache_key, None)
+        return None
+    return entry
+
+
+def _local_set(cache_key, entry):
+    seconds = settings.TOKEN_LOCAL_CACHE_SECONDS
+    if seconds <= 0:
+        return
+    with _local_lock:
+        if len(_local) >= LOCAL_CACHE_MAX_ENTRIES:
+            _local.clear()
+        _local[cache_key] = (time.monotonic() + seconds, entry)
+
+
+def _grace_key(user_id):
+    return f"npoapi:token-grace:{user_id}"
+
+
+def _cache_seconds():
+    if cache_is_shared():
+        return settings.TOKEN_CACHE_SECONDS
+    return min(settings.TOKEN_CACHE_SECONDS, settings.TOKEN_LOCAL_CACHE_SECONDS)
+
+
+def forget_tokens(*keys):
+    """Drop cached validations of these token keys (revocation, user changes)"""
+    _forget([_cache_key(key) for key in keys])
+
+
+def forget_user_tokens(*user_ids):
+    """
+    Drop cached validations of these users' tokens, including keys replaced by
+    a rotation that are still in their grace period
+    """
+    keys = Token.objects.filter(user_id__in=user_ids).values_list("key", flat=True)
+    grace_keys = [_grace_key(user_id) for user_id in user_ids]
+    replaced = cache.get_many(grace_keys)
+    cache.delete_many(grace_keys)
+    _forget(
+        [_cache_key(key) for key in keys]
+        + [cache_key for cache_keys in replaced.values() for cache_key in cache_keys]
+    )
+
+
+def _forget(cache_keys):
+    cache.delete_many(cache_keys)
+    for cache_key in cache_keys:
+        _local.pop(cache_key, None)
+
+
+def _user_fields(user):
+    return {
+        field.attname: field.value_from_object(user)
+        for field in User._meta.concrete_fields
+    }
+
+
+def _user_from_fields(fields):
+    return User.from_db(None, list(fields), list(fields.values()))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication with expiring, rotating tokens and cached lookups:
+    a warm request authenticates without touching the database.
+
+    A token past TOKEN_ROTATE_AFTER is replaced during the request and the new
+    key is sent back in the X-Auth-Token header (and the auth_token cookie, by
+    TokenRotationMiddleware). The old key keeps working for
+    TOKEN_ROTATION_GRACE seconds so requests already in flight don't fail.
+    """
+
+    model = Token
+
+    def authenticate(self, request):
+        self.rotated_to = None
+        result = super().authenticate(request)
+        if self.rotated_to is not None:
+            request._request.rotated_token = self.rotated_to.key
+        return result
+
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+        entry = _local_get(cache_key)
+        if entry is None:
+            entry = cache.get(cache_key)
+            if entry is None:
+                entry = self._load(key)
+                cache.set(cache_key, entry, timeout=_cache_seconds())
+            _local_set(cache_key, entry)
+
+        now = timezone.now()
+        created = parse_datetime(entry["created"])
+        token = Token(key=key, user_id=entry["user"]["id"], created=created)
+        token._state.adding = False
+        grace_until = entry.get("grace_until")
+        if grace_until is not None:
+            # Replaced by a rotation moments ago; no longer in the database
+            if now >= parse_datetime(grace_until):
+                forget_tokens(key)
+                raise exceptions.AuthenticationFailed("Invalid token.")
+        elif token.is_expired(now):
+            Token.objects.filter(key=key).delete()
+            forget_tokens(key)
+            raise exceptions.AuthenticationFailed("Token has expired.")
+        elif token.needs_rotation(now):
+            self.rotated_to = self._rotate(token, entry)
+
+        user = _user_from_fields(entry["user"])
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return user, self.rotated_to or token
+
+    def _load(self, key):
+        try:
+            token = Token.objects.select_related("user").get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+        return {"created": token.created.isoformat(), "user": _user_fields(token.user)}
+
+    def _rotate(self, token, entry):
+        """The replacement token, or None if a concurrent request rotated it first"""
+        new_token = token.rotate()
+        if new_token is None:
+            return None
+        grace = settings.TOKEN_ROTATION_GRACE
+        grace_until = timezone.now() + timedelta(seconds=grace)
+        forget_tokens(token.key)
+        if grace > 0:
+            cache_key = _cache_key(token.key)
+            cache.set(
+                cache_key,
+                {**entry, "grace_until": grace_until.isoformat()},
+                timeout=grace,
+            )
+            # Logout and user changes forget it through the user
+            grace_key = _grace_key(token.user_id)
+            replaced = cache.get(grace_key, [])
+            cache.set(grace_key, [*replaced, cache_key], timeout=grace)
+        return new_token
+
+
+class TokenRotationMiddleware:
+    """Hands a rotated token back to the client that presented the old one"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rotated = getattr(request, "rotated_token", None)
+        if rotated:
+            response[ROTATED_TOKEN_HEADER] = rotated
+            if TOKEN_COOKIE in request.COOKIES:
+                response.set_cookie(
+                    TOKEN_COOKIE,
+                    rotated,
+                    max_age=settings.TOKEN_TTL,
+                    httponly=True,
+                    secure=request.is_secure(),
+                )
+        return response
@@ -0,0 +1,143 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.response import Response
+
+# Cache entries are never deleted one by one. Each response depends on a few
+# tags (e.g. "projects", "project:7", "user-projects:3"), every tag has a
+# version number in the cache, and the versions are part of the key. Bumping a
+# tag makes every response that read it unreachable; TTLs evict the leftovers.
+
+
+def cache_is_shared():
+    """False for the per-process locmem fallback, which other workers never see"""
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def _version_key(tag):
+    return f"npoapi:tag:{tag}"
+
+
+def _new_version():
+    # Time based rather than 1, so a version that was evicted and recreated
+    # can't match keys written under the old one. It also dates the tag's last
+    # change, which ConditionalGetMixin uses for Last-Modified.
+    return time.time_ns()
+
+
+def get_tag_versions(tags):
+    keys = {_version_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, tag in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[tag] = found[key]
+    return versions
+
+
+def bump_tags(*tags):
+    """Invalidate every cached response that depends on any of these tags"""
+    keys = [_version_key(tag) for tag in set(tags)]
+    current = cache.get_many(keys)
+    now = _new_version()
+    # Always past the old version, even if this worker's clock is behind
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys}, timeout=None
+    )
+
+
+def tag_versions_modified(versions):
+    """When the newest of these tag versions was set, as an aware datetime"""
+    if not versions:
+        return None
+    return datetime.fromtimestamp(max(versions.values()) / 1e9, tz=timezone.utc)
+
+
+def _response_key(prefix, request, versions, kwargs):
+    parts = [
+        prefix,
+        str(request.user.pk),
+        "&".join(f"{k}={v}" for k, v in sorted(request.query_params.lists())),
+        "&".join(f"{k}={v}" for k, v in sorted(kwargs.items())),
+        "&".join(f"{tag}={version}" for tag, version in sorted(versions.items())),
+    ]
+    return "npoapi:response:" + hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def cached_response(tags, timeout=None):
+    """
+    Read-through cache for a viewset action, keyed on the user, query params,
+    URL kwargs and the current versions of `tags`.
+
+    tags: callable(view, request, **kwargs) returning the tags the response
+    depends on; the model signals in npoapi/signals.py bump them.
+
+    Only 200 responses are stored. On a miss, one request recomputes the key
+    while concurrent requests for the same key wait for its result. The tags
+    callable is kept on the wrapper as `cache_tags` for ConditionalGetMixin.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            versions = get_tag_versions(tags(self, request, **kwargs))
+            key = _response_key(
+                f"{type(self).__name__}.{func.__name__}", request, versions, kwargs
+            )
+
+            cached = cache.get(key)
+            if cached is not None:
+                return _to_response(cached)
+
+            lock_key = f"{key}:lock"
+            lock_timeout = settings.RESPONSE_CACHE_LOCK_TIMEOUT
+            holds_lock = cache.add(lock_key, True, timeout=lock_timeout)
+            if not holds_lock:
+                cached = _wait_for(key, lock_key, lock_timeout)
+                if cached is not None:
+                    return _to_response(cached)
+
+            try:
+                response = func(self, request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(
+                        key,
+                        {
+                            "status": response.status_code,
+                            "data": response.data,
+                            "headers": dict(response.items()),
+                        },
+                        timeout=timeout or settings.RESPONSE_CACHE_TIMEOUT,
+                    )
+                return response
+            finally:
+                if holds_lock:
+                    cache.delete(lock_key)
+
+        wrapper.cache_tags = tags
+        return wrapper
+
+    return decorator
+
+
+def _wait_for(key, lock_key, lock_timeout):
+    """Wait for whoever holds the lock to fill the key; None if they gave up"""
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        if cache.get(lock_key) is None:
+            return cache.get(key)
+    return None
+
+
+def _to_response(cached):
+    return Response(cached["data"], status=cached["status"], headers=cached["headers"])
@@ -0,0 +1,42 @@
+# npoapi/checks.py
+# Registered from NpoapiConfig.ready()
+
+from django.conf import settings
+from django.core import checks
+from npoapi.caching import cache_is_shared
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cache invalidation (response cache tags, revoked tokens, permission
+    versions) only reaches the processes that share the cache. A per-process
+    cache is fine for a single runserver, not for several workers or for
+    `manage.py run_provisioner` and the other commands that write projects.
+    """
+    if settings.DEBUG or cache_is_shared():
+        return []
+    return [
+        checks.Error(
+            "The default cache is per-process (locmem), so invalidations "
+            "don't reach other workers or background commands.",
+            hint="Set CACHE_URL to a cache they all share, e.g. "
+            "redis://localhost:6379/1.",
+            id="npoapi.E001",
+        )
+    ]
+
+
+@checks.register(checks.Tags.security)
+def check_metrics_token(app_configs, **kwargs):
+    """/metrics is closed outside DEBUG until a scrape token is set"""
+    if settings.DEBUG or settings.METRICS_TOKEN:
+        return []
+    return [
+        checks.Warning(
+            "METRICS_TOKEN is not set, so /metrics answers 404.",
+            hint="Set METRICS_TOKEN and send it from the scraper as a bearer "
+            "token.",
+            id="npoapi.W001",
+        )
+    ]
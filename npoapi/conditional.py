@@ -0,0 +1,113 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.exceptions import APIException
+from npoapi.caching import get_tag_versions, tag_versions_modified
+
+
+def queryset_validators(queryset):
+    """
+    Cheap validators for a queryset: max(updated_at) plus the row count, from
+    a single aggregate query and without serializing anything. Updates move
+    the max, deletes change the count.
+    """
+    stats = queryset.order_by().aggregate(
+        last_modified=Max("updated_at"), count=Count("pk")
+    )
+    return stats["last_modified"], stats["count"]
+
+
+class NotModified(APIException):
+    status_code = 304
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since with 304 before any serializer
+    work runs, and stamps ETag / Last-Modified on full responses.
+
+    Guards list and retrieve by default; views add custom actions by overriding
+    get_conditional_queryset() and returning the queryset the action reads, or
+    a list of querysets when the response is built from several tables.
+
+    max(updated_at) misses deletes and writes that don't touch updated_at, so
+    the versions of the action's cached_response tags, which the signals bump
+    on every write, go into the ETag and date Last-Modified as well.
+    """
+
+    def get_conditional_queryset(self):
+        if self.action == "list":
+            return self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            return self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return None
+
+    def get_conditional_tags(self):
+        tags = getattr(getattr(self, self.action, None), "cache_tags", None)
+        return tags(self, self.request, **self.kwargs) if tags else []
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # Authentication and permissions first
+        self._validators = None
+        if request.method not in ("GET", "HEAD"):
+            return
+
+        queryset = self.get_conditional_queryset()
+        if queryset is None:
+            return
+
+        querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+        validators = [queryset_validators(each) for each in querysets]
+        versions = get_tag_versions(self.get_conditional_tags())
+        modified = [lm for lm, _ in validators] + [tag_versions_modified(versions)]
+        last_modified = max(filter(None, modified), default=None)
+        count = sum(count for _, count in validators)
+        # The body also depends on who is asking and on the query string
+        # (cursor, page size, ordering), so those go into the ETag as well.
+        fingerprint = "|".join(
+            [
+                type(self).__name__,
+                self.action,
+                str(request.user.pk),
+                request.get_full_path(),
+                str(count),
+                last_modified.isoformat() if last_modified else "",
+                "&".join(f"{tag}={v}" for tag, v in sorted(versions.items())),
+            ]
+        )
+        etag = 'W/"%s"' % hashlib.sha1(fingerprint.encode()).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        self._validators = (etag, timestamp)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return self._with_validators(exc.response)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == 200:
+            self._with_validators(response)
+        return response
+
+    def _with_validators(self, response):
+        etag, timestamp = getattr(self, "_validators", None) or (None, None)
+        if etag:
+            response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
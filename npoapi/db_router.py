@@ -0,0 +1,115 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Reads only go to a replica inside a viewset action that opted in (see
+# ReplicaReadMixin); everything else, including auth lookups done by
+# middleware and all writes, stays on the primary.
+_replica_reads = ContextVar("npoapi_replica_reads", default=False)
+
+PRIMARY_COOKIE = "npo_read_primary"
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+class ReplicaRouter:
+    """
+    Sends opted-in reads to a random replica from DATABASE_REPLICA_URLS and
+    everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            # None: Django reads an instance's related rows from the database
+            # the instance came from (e.g. an export streamed after the
+            # action returned), and everything else from the primary
+            return None
+        # Reads inside a write transaction must see that transaction's rows
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+def _sticky_key(user_pk):
+    return f"npoapi:read-primary:{user_pk}"
+
+
+def reads_stick_to_primary(request):
+    """True if this client wrote recently and a replica may not have the rows yet"""
+    if request.COOKIES.get(PRIMARY_COOKIE):
+        return True
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return bool(cache.get(_sticky_key(user.pk)))
+    return False
+
+
+class ReplicaReadMixin:
+    """
+    Runs the read-only actions in `replica_read_actions` against a replica.
+
+    Goes after ConditionalGetMixin in the bases, so the conditional GET
+    validators are read from the replica as well, and after authentication,
+    so a client that just wrote (see PrimaryStickinessMiddleware) reads from
+    the primary.
+    """
+
+    replica_read_actions = ["list", "retrieve"]
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in ("GET", "HEAD")
+            and self.action in self.replica_read_actions
+            and not reads_stick_to_primary(request)
+        ):
+            _replica_reads.set(True)
+
+
+class PrimaryStickinessMiddleware:
+    """
+    After a successful write, pins the client's reads to the primary for
+    READ_YOUR_WRITES_SECONDS, long enough for the replicas to catch up.
+
+    Browsers get a short-lived cookie; token clients that don't keep cookies
+    are pinned by user id in the shared cache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            replica_aliases()
+            and request.method not in ("GET", "HEAD", "OPTIONS", "TRACE")
+            and response.status_code < 400
+        ):
+            window = settings.READ_YOUR_WRITES_SECONDS
+            response.set_cookie(
+                PRIMARY_COOKIE, "1", max_age=window, httponly=True, samesite="Lax"
+            )
+            # DRF copies the token-authenticated user onto the Django request
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                cache.set(_sticky_key(user.pk), True, timeout=window)
+        return response
@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+from functools import partial
+from django.conf import settings
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from npoapi.fastpath import serialize_values, values_plan
+
+
+def accepts_gzip(accept_encoding):
+    """True if gzip, or *, is in the Accept-Encoding header with a q-value above 0"""
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, *params = coding.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "json": "application/json",
+}
+
+
+class ExportMixin:
+    """
+    GET <list url>/export/?format=ndjson|csv|json streams every row of the
+    viewset's queryset.
+
+    Rows are read with .iterator(chunk_size) and serialized one chunk at a
+    time, so memory stays flat no matter how large the table is. The body is
+    gzipped on the fly when the client sends Accept-Encoding: gzip.
+
+    Views set `export_name` (the download's file name) and can override
+    get_export_queryset() to eager-load what their serializer reads.
+    """
+
+    export_name = "export"
+
+    def get_export_queryset(self):
+        return self.get_queryset()
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= picks the export format here, not a DRF renderer (which
+        # would 404 on ndjson/csv); errors are still rendered as JSON
+        if getattr(self, "action", None) == "export":
+            renderer = JSONRenderer()
+            return renderer, renderer.media_type
+        return super().perform_content_negotiation(request, force)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        export_format = request.query_params.get("format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            export_format = "ndjson"
+
+        queryset = self.filter_queryset(self.get_export_queryset()).order_by("id")
+        # The body is read after the action returns, when ReplicaReadMixin no
+        # longer routes reads, so the database is picked now
+        queryset = queryset.using(router.db_for_read(queryset.model))
+        rows = getattr(self, f"_{export_format}_chunks")(queryset)
+        chunks = (chunk.encode() for chunk in rows)
+
+        if accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            response = StreamingHttpResponse(
+                compress_sequence(chunks), content_type=EXPORT_FORMATS[export_format]
+            )
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = StreamingHttpResponse(
+                chunks, content_type=EXPORT_FORMATS[export_format]
+            )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        response["Content-Disposition"] = (
+            f'attachment; filename="{self.export_name}.{export_format}"'
+        )
+        return response
+
+    def _serialized_chunks(self, queryset):
+        """Serialized rows, one chunk of EXPORT_CHUNK_SIZE at a time"""
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+        serializer_class = self.get_serializer_class()
+        plan = values_plan(serializer_class)
+        if plan is None:
+            rows, serialize = queryset, self._serialize
+        else:
+            # Plain-column serializers skip model instances (npoapi/fastpath.py)
+            rows = queryset.values("id", *plan[0])
+            serialize = partial(serialize_values, serializer_class, using=queryset.db)
+
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield serialize(chunk)
+                chunk = []
+        if chunk:
+            yield serialize(chunk)
+
+    def _serialize(self, instances):
+        return self.get_serializer(instances, many=True).data
+
+    def _ndjson_chunks(self, queryset):
+        for rows in self._serialized_chunks(queryset):
+            yield "".join(json.dumps(row, cls=JSONEncoder) + "\n" for row in rows)
+
+    def _json_chunks(self, queryset):
+        yield "["
+        separator = ""
+        for rows in self._serialized_chunks(queryset):
+            yield separator + ",".join(json.dumps(row, cls=JSONEncoder) for row in rows)
+            separator = ","
+        yield "]"
+
+    def _csv_chunks(self, queryset):
+        columns = [
+            name
+            for name, field in self.get_serializer().fields.items()
+            if not field.write_only
+        ]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in self._serialized_chunks(queryset):
+            for row in rows:
+                # Lists (e.g. user groups) use the ';' separator import_accounts reads
+                writer.writerow(
+                    [
+                        ";".join(map(str, value)) if isinstance(value, list) else value
+                        for value in (row.get(column) for column in columns)
+                    ]
+                )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
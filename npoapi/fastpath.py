@@ -0,0 +1,140 @@
+from collections import defaultdict
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+# Read-only fast path for list responses: build the response dicts straight
+# from .values() rows instead of instantiating a model object per row and
+# running every serializer field's to_representation(). Only serializers whose
+# readable fields come out of .values() unchanged (or, for datetimes, only
+# need formatting) qualify; anything else (method fields, nested serializers,
+# renamed sources) falls back to the serializer, so the output is always
+# identical.
+
+# Fields whose to_representation() is the identity for the values the
+# database returns (CharField also covers Email/URL/Slug fields)
+PLAIN_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.FloatField,
+    serializers.PrimaryKeyRelatedField,
+)
+# Fields formatted value by value with the field's own to_representation()
+FORMATTED_FIELDS = (serializers.DateTimeField,)
+
+_plans = {}
+_formatters = {}
+
+
+def values_plan(serializer_class):
+    """
+    (columns, many_to_many) for serializer_class, or None when it can't use
+    the fast path. columns are .values() names in output order; many_to_many
+    maps output names to the model's m2m fields, filled with one query per page.
+    """
+    if serializer_class not in _plans:
+        _plans[serializer_class] = _build_plan(serializer_class)
+    return _plans[serializer_class]
+
+
+def _build_plan(serializer_class):
+    model = serializer_class.Meta.model
+    columns, many_to_many = [], {}
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if field.source != name:
+            return None
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # An optional field the model doesn't have is skipped by the
+            # serializer too (e.g. UserSerializer.organization)
+            if not field.required:
+                continue
+            return None
+
+        if isinstance(field, serializers.ManyRelatedField):
+            if not (
+                model_field.many_to_many
+                and isinstance(field.child_relation, serializers.PrimaryKeyRelatedField)
+            ):
+                return None
+            many_to_many[name] = model_field
+        elif isinstance(field, PLAIN_FIELDS + FORMATTED_FIELDS):
+            if not model_field.concrete:
+                return None
+            columns.append(name)
+        else:
+            return None
+    return columns, many_to_many
+
+
+def serialize_values(serializer_class, rows, using=None):
+    """
+    Serialized dicts for .values() rows, with the same keys and order.
+    using: database to read many-to-many ids from (default: routed)
+    """
+    columns, many_to_many = values_plan(serializer_class)
+    data = [{column: row[column] for column in columns} for row in rows]
+    for name, formatter in _row_formatters(serializer_class).items():
+        for row in data:
+            row[name] = formatter(row[name])
+    if many_to_many and data:
+        ids = [row["id"] for row in data]
+        for name, model_field in many_to_many.items():
+            related = _related_ids(model_field, ids, using)
+            for row in data:
+                row[name] = related.get(row["id"], [])
+    return data
+
+
+def _row_formatters(serializer_class):
+    if serializer_class not in _formatters:
+        fields = serializer_class().fields
+        _formatters[serializer_class] = {
+            name: fields[name].to_representation
+            for name in values_plan(serializer_class)[0]
+            if isinstance(fields[name], FORMATTED_FIELDS)
+        }
+    return _formatters[serializer_class]
+
+
+def _related_ids(model_field, ids, using=None):
+    through = model_field.remote_field.through
+    source = model_field.m2m_column_name()
+    target = model_field.m2m_reverse_name()
+    related = defaultdict(list)
+    for source_id, target_id in (
+        through.objects.using(using)
+        .filter(**{f"{source}__in": ids})
+        .order_by("pk")
+        .values_list(source, target)
+    ):
+        related[source_id].append(target_id)
+    return related
+
+
+class ValuesListMixin:
+    """
+    Viewset helper: list_data(queryset) returns one page of serialized rows,
+    through .values() when the serializer allows it.
+    """
+
+    def list_data(self, queryset):
+        serializer_class = self.get_serializer_class()
+        plan = values_plan(serializer_class)
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            return self.get_serializer(page, many=True).data
+
+        columns, _ = plan
+        # The paginator reads the ordering value and id from each row for cursors
+        ordering = [
+            field
+            for field in getattr(self, "keyset_ordering_fields", [])
+            if field not in columns
+        ]
+        page = self.paginate_queryset(queryset.values("id", *columns, *ordering))
+        return serialize_values(serializer_class, page)
@@ -0,0 +1,686 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import requests
+from requests.adapters import BaseAdapter
+from django.conf import settings
+
+try:
+    import pytest
+except ImportError:  # Only test suites that use the fixture need it
+    pytest = None
+
+logger = logging.getLogger(__name__)
+
+# Local stand-ins for the parts of the GitHub API this project calls
+# (npoapi/services/github_*.py and the OAuth callback), for benchmarks,
+# load tests and offline runs:
+#   - FakeGitHub answers from memory,
+#   - RecordingGitHub forwards to the real GitHub and saves what it answered
+#     to a Cassette file, which ReplayGitHub serves back later.
+# All three can add latency, server errors and rate limits (GitHubStandIn).
+# install_fake_github() routes this process's transport to one without opening
+# a socket; FakeGitHubServer / run_fake_github_server() serve one over HTTP, for
+# other processes and the httpx (async) transport. `manage.py fake_github`
+# runs the server from the command line.
+
+ORG = "nss-npo"  # The organization GitHubService creates repositories in
+
+ROUTES = [
+    (
+        "POST",
+        re.compile(r"^/app/installations/(?P<installation>\d+)/access_tokens$"),
+        "access_token",
+    ),
+    ("GET", re.compile(r"^/app/installations/(?P<installation>\d+)$"), "installation"),
+    ("POST", re.compile(r"^/orgs/(?P<org>[^/]+)/repos$"), "create_repo"),
+    ("GET", re.compile(r"^/orgs/(?P<org>[^/]+)/repos$"), "list_repos"),
+    ("GET", re.compile(r"^/repos/(?P<org>[^/]+)/(?P<name>[^/]+)$"), "get_repo"),
+    ("PATCH", re.compile(r"^/repos/(?P<org>[^/]+)/(?P<name>[^/]+)$"), "update_repo"),
+    ("DELETE", re.compile(r"^/repos/(?P<org>[^/]+)/(?P<name>[^/]+)$"), "delete_repo"),
+    ("GET", re.compile(r"^/user$"), "user"),
+    ("POST", re.compile(r"^/login/oauth/access_token$"), "oauth_token"),
+]
+
+INSTALLATION_PERMISSIONS = {
+    "administration": "write",
+    "contents": "write",
+    "metadata": "read",
+}
+
+
+SERVER_ERROR_STATUSES = (500, 502, 503)
+SECONDARY_RATE_LIMIT_MESSAGE = (
+    "You have exceeded a secondary rate limit. "
+    "Please wait a few minutes before you try again."
+)
+
+
+class GitHubStandIn:
+    """
+    Fault injection around respond(): every request waits `latency` seconds
+    plus up to `jitter` more, then may fail with a secondary rate limit (403
+    with Retry-After, at `secondary_rate_limit_rate`) or a 5xx (at
+    `error_rate`). With `rate_limit` set, responses carry GitHub's
+    X-RateLimit-* headers and requests past the limit get a 403 until the
+    `rate_limit_window` resets. Draws come from one Random(seed), so a run
+    with a fixed seed and one client at a time fails the same requests again.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        secondary_rate_limit_rate=0.0,
+        retry_after=1,
+        rate_limit=None,
+        rate_limit_window=3600,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.secondary_rate_limit_rate = secondary_rate_limit_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.faults = {"errors": 0, "secondary_rate_limits": 0, "rate_limited": 0}
+        self._window_reset = 0
+        self._window_used = 0
+        self._lock = threading.Lock()
+
+    def handle(self, method, url, headers, body):
+        """(status, headers, body) for one request; the body is JSON or bytes"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            roll = self.random.random()
+            error_status = self.random.choice(SERVER_ERROR_STATUSES)
+            rate_headers, limited = self._take_rate_limit()
+        if delay > 0:
+            time.sleep(delay)
+
+        if limited:
+            fault = "rate_limited"
+            response = 403, rate_headers, {
+                "message": "API rate limit exceeded.",
+                "documentation_url": "https://docs.github.com/rest/rate-limit",
+            }
+        elif roll < self.secondary_rate_limit_rate:
+            fault = "secondary_rate_limits"
+            response = 403, {
+                **rate_headers,
+                "Retry-After": str(self.retry_after),
+            }, {"message": SECONDARY_RATE_LIMIT_MESSAGE}
+        elif roll < self.secondary_rate_limit_rate + self.error_rate:
+            fault = "errors"
+            response = error_status, rate_headers, {"message": "Server Error"}
+        else:
+            status, response_headers, payload = self.respond(
+                method, url, headers, body
+            )
+            if status == 304 and rate_headers:
+                # Conditional requests that hit don't count against the limit
+                with self._lock:
+                    self._window_used -= 1
+                    used = self._window_used
+                rate_headers["X-RateLimit-Remaining"] = str(self.rate_limit - used)
+                rate_headers["X-RateLimit-Used"] = str(used)
+            return status, {**rate_headers, **response_headers}, payload
+
+        with self._lock:
+            self.faults[fault] += 1
+        return response
+
+    def _take_rate_limit(self):
+        """Spend one request of the window: (X-RateLimit-* headers, limited?)"""
+        if self.rate_limit is None:
+            return {}, False
+        now = int(time.time())
+        if now >= self._window_reset:
+            self._window_reset = now + self.rate_limit_window
+            self._window_used = 0
+        limited = self._window_used >= self.rate_limit
+        if not limited:
+            self._window_used += 1
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(self.rate_limit - self._window_used),
+            "X-RateLimit-Reset": str(self._window_reset),
+            "X-RateLimit-Used": str(self._window_used),
+            "X-RateLimit-Resource": "core",
+        }, limited
+
+    def respond(self, method, url, headers, body):
+        raise NotImplementedError
+
+
+class FakeGitHub(GitHubStandIn):
+    """
+    GitHub App and OAuth endpoints backed by dicts. Installation tokens and
+    OAuth tokens it hands out are the only ones it accepts afterwards.
+    """
+
+    def __init__(self, installation_id=None, token_ttl=3600, **faults):
+        super().__init__(**faults)
+        self.installation_id = installation_id or settings.GITHUB_INSTALLATION_ID
+        self.token_ttl = token_ttl
+        self.repos = {}  # lowercased name -> repository JSON, oldest first
+        self.repo_ids = itertools.count(1)
+        self.installation_tokens = set()
+        self.oauth_tokens = {}  # token -> GitHub user JSON
+
+    def respond(self, method, url, headers, body):
+        parts = urlsplit(url)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        for route_method, pattern, name in ROUTES:
+            match = pattern.match(parts.path)
+            if match and route_method == method:
+                return getattr(self, name)(headers, body, query, **match.groupdict())
+        return 404, {}, {"message": "Not Found"}
+
+    # --------------------------------
+    # Endpoints
+    # --------------------------------
+    def access_token(self, headers, body, query, installation):
+        if not _bearer(headers) or int(installation) != self.installation_id:
+            return 401, {}, {"message": "Bad credentials"}
+        token = "ghs_" + secrets.token_hex(18)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.token_ttl)
+        with self._lock:
+            self.installation_tokens.add(token)
+        return 201, {}, {
+            "token": token,
+            "expires_at": _timestamp(expires_at),
+            "permissions": INSTALLATION_PERMISSIONS,
+        }
+
+    def installation(self, headers, body, query, installation):
+        if not _bearer(headers) or int(installation) != self.installation_id:
+            return 401, {}, {"message": "Bad credentials"}
+        return 200, {}, {
+            "id": self.installation_id,
+            "account": {"login": ORG},
+            "permissions": INSTALLATION_PERMISSIONS,
+        }
+
+    def create_repo(self, headers, body, query, org):
+        if _bearer(headers) not in self.installation_tokens:
+            return 401, {}, {"message": "Bad credentials"}
+        data = json.loads(body or b"{}")
+        name = data.get("name", "")
+        with self._lock:
+            if name.lower() in self.repos:
+                return 422, {}, {
+                    "message": "Repository creation failed.",
+                    "errors": [
+                        {
+                            "field": "name",
+                            "message": "name already exists on this account",
+                        }
+                    ],
+                }
+            now = _timestamp(datetime.now(timezone.utc))
+            repo = self.repos[name.lower()] = {
+                "id": next(self.repo_ids),
+                "name": name,
+                "full_name": f"{org}/{name}",
+                "description": data.get("description"),
+                "private": bool(data.get("private")),
+                "archived": False,
+                "html_url": f"https://github.com/{org}/{name}",
+                "created_at": now,
+                "pushed_at": now,
+            }
+        return 201, {}, repo
+
+    def list_repos(self, headers, body, query, org):
+        """Paginated in creation order, with an ETag per page body"""
+        if _bearer(headers) not in self.installation_tokens:
+            return 401, {}, {"message": "Bad credentials"}
+        per_page = min(int(query.get("per_page", 30)), 100)
+        page = max(int(query.get("page", 1)), 1)
+        with self._lock:
+            repos = list(self.repos.values())
+        if query.get("direction") == "desc":
+            repos.reverse()
+        items = repos[(page - 1) * per_page : page * per_page]
+        etag = '"%s"' % hashlib.sha1(json.dumps(items).encode()).hexdigest()
+        if etag in (headers.get("If-None-Match") or ""):
+            return 304, {"ETag": etag}, b""
+        response_headers = {"ETag": etag}
+        if page * per_page < len(repos):
+            next_url = f"/orgs/{org}/repos?per_page={per_page}&page={page + 1}"
+            response_headers["Link"] = f'<{next_url}>; rel="next"'
+        return 200, response_headers, items
+
+    def update_repo(self, headers, body, query, org, name):
+        """Renames (and other edits), as GitHub's PATCH /repos/{owner}/{repo}"""
+        if _bearer(headers) not in self.installation_tokens:
+            return 401, {}, {"message": "Bad credentials"}
+        data = json.loads(body or b"{}")
+        with self._lock:
+            repo = self.repos.get(name.lower())
+            if repo is None:
+                return 404, {}, {"message": "Not Found"}
+            new_name = data.get("name", repo["name"])
+            if new_name.lower() != name.lower() and new_name.lower() in self.repos:
+                return 422, {}, {"message": "name already exists on this account"}
+            # Keep creation order: rebuild the dict with the new key in place
+            self.repos = {
+                (new_name.lower() if key == name.lower() else key): value
+                for key, value in self.repos.items()
+            }
+            repo.update(
+                name=new_name,
+                full_name=f"{org}/{new_name}",
+                html_url=f"https://github.com/{org}/{new_name}",
+                **{
+                    key: data[key]
+                    for key in ("description", "private", "archived")
+                    if key in data
+                },
+            )
+        return 200, {}, repo
+
+    def delete_repo(self, headers, body, query, org, name):
+        if _bearer(headers) not in self.installation_tokens:
+            return 401, {}, {"message": "Bad credentials"}
+        with self._lock:
+            if self.repos.pop(name.lower(), None) is None:
+                return 404, {}, {"message": "Not Found"}
+        return 204, {}, b""
+
+    def get_repo(self, headers, body, query, org, name):
+        if _bearer(headers) not in self.installation_tokens:
+            return 401, {}, {"message": "Bad credentials"}
+        repo = self.repos.get(name.lower())
+        if repo is None:
+            return 404, {}, {"message": "Not Found"}
+        return 200, {}, repo
+
+    def oauth_token(self, headers, body, query, **kwargs):
+        form = {
+            key: values[0]
+            for key, values in parse_qs((body or b"").decode()).items()
+        }
+        if not form.get("code"):
+            return 200, {}, {"error": "bad_verification_code"}
+        token = "gho_" + secrets.token_hex(18)
+        login = f"octo-{form['code']}"
+        with self._lock:
+            self.oauth_tokens[token] = {
+                "login": login,
+                "id": len(self.oauth_tokens) + 1,
+                "name": login.title(),
+                "email": f"{login}@example.org",
+            }
+        return 200, {}, {
+            "access_token": token,
+            "token_type": "bearer",
+            "scope": "repo,user",
+        }
+
+    def user(self, headers, body, query):
+        user = self.oauth_tokens.get(_bearer(headers))
+        if user is None:
+            return 401, {}, {"message": "Bad credentials"}
+        return 200, {}, user
+
+
+def _timestamp(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _bearer(headers):
+    value = headers.get("Authorization") or headers.get("authorization") or ""
+    scheme, _, token = value.partition(" ")
+    return token if scheme.lower() in ("bearer", "token") else None
+
+
+# --------------------------------
+# Record / replay
+# --------------------------------
+RECORDED_HEADERS = {"content-type", "etag", "last-modified", "link", "retry-after"}
+REDACTED_FIELDS = {"token", "access_token", "refresh_token"}
+
+
+def _request_key(method, url):
+    """Replay key: method, path and query; bodies vary between runs (names, codes)"""
+    parts = urlsplit(url)
+    query = "&".join(sorted(parts.query.split("&"))) if parts.query else ""
+    return f"{method.upper()} {parts.path}" + (f"?{query}" if query else "")
+
+
+def _redact(payload):
+    if isinstance(payload, dict):
+        return {
+            key: "redacted" if key in REDACTED_FIELDS else _redact(value)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, list):
+        return [_redact(value) for value in payload]
+    return payload
+
+
+class Cassette:
+    """
+    Responses recorded from the real GitHub, in order, saved as JSON. Tokens
+    in response bodies are redacted; request headers are never stored.
+    """
+
+    def __init__(self, path=None, interactions=None):
+        self.path = path
+        self.interactions = interactions or []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(path, json.load(f)["interactions"])
+
+    def add(self, method, url, status, headers, payload):
+        interaction = {
+            "request": _request_key(method, url),
+            "recorded_at": int(time.time()),
+            "status": status,
+            "headers": {
+                name: value
+                for name, value in headers.items()
+                if name.lower() in RECORDED_HEADERS
+                or name.lower().startswith("x-ratelimit-")
+            },
+        }
+        if isinstance(payload, bytes):
+            interaction["text"] = payload.decode(errors="replace")
+        else:
+            interaction["json"] = _redact(payload)
+        with self._lock:
+            self.interactions.append(interaction)
+            if self.path:
+                self.save()
+
+    def save(self):
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump({"interactions": self.interactions}, f, indent=2)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+class RecordingGitHub(GitHubStandIn):
+    """
+    Forwards every request to the real GitHub (OAuth paths to `oauth_url`,
+    the rest to `api_url`) and adds the response to `cassette`.
+    """
+
+    FORWARDED_HEADERS = (
+        "Accept",
+        "Authorization",
+        "Content-Type",
+        "If-None-Match",
+        "If-Modified-Since",
+        "User-Agent",
+        "X-GitHub-Api-Version",
+    )
+
+    def __init__(
+        self,
+        cassette,
+        api_url="https://api.github.com",
+        oauth_url="https://github.com",
+        **faults,
+    ):
+        super().__init__(**faults)
+        self.cassette = cassette
+        self.api_url = api_url.rstrip("/")
+        self.oauth_url = oauth_url.rstrip("/")
+        self.session = requests.Session()
+
+    def respond(self, method, url, headers, body):
+        parts = urlsplit(url)
+        base = self.oauth_url if parts.path.startswith("/login/") else self.api_url
+        target = base + parts.path + (f"?{parts.query}" if parts.query else "")
+        response = self.session.request(
+            method,
+            target,
+            headers={
+                name: headers[name]
+                for name in self.FORWARDED_HEADERS
+                if headers.get(name) is not None
+            },
+            data=body,
+            timeout=(settings.GITHUB_CONNECT_TIMEOUT, settings.GITHUB_READ_TIMEOUT),
+        )
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = response.content
+        self.cassette.add(method, url, response.status_code, response.headers, payload)
+        response_headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() in RECORDED_HEADERS
+            or name.lower().startswith("x-ratelimit-")
+        }
+        return response.status_code, response_headers, payload
+
+
+class ReplayGitHub(GitHubStandIn):
+    """
+    Serves a Cassette back. Requests are matched on method, path and query;
+    repeated requests get the recorded responses in order, then the last one
+    again. Unrecorded requests get a 404. Token expiries are moved forward by
+    the time since recording, so replayed tokens last as long as they did then.
+    """
+
+    def __init__(self, cassette, **faults):
+        super().__init__(**faults)
+        self.recorded = {}
+        for interaction in cassette.interactions:
+            self.recorded.setdefault(interaction["request"], []).append(interaction)
+        self.served = {}  # request key -> responses served
+
+    def respond(self, method, url, headers, body):
+        key = _request_key(method, url)
+        recorded = self.recorded.get(key)
+        if not recorded:
+            return 404, {}, {"message": f"Not Found (no recorded response: {key})"}
+        with self._lock:
+            index = self.served.get(key, 0)
+            self.served[key] = index + 1
+        interaction = recorded[min(index, len(recorded) - 1)]
+        if "text" in interaction:
+            payload = interaction["text"].encode()
+        else:
+            payload = interaction["json"]
+            if isinstance(payload, dict) and payload.get("expires_at"):
+                age = int(time.time()) - interaction["recorded_at"]
+                expires_at = _shift_timestamp(payload["expires_at"], age)
+                payload = dict(payload, expires_at=expires_at)
+        return interaction["status"], dict(interaction["headers"]), payload
+
+
+def _shift_timestamp(value, seconds):
+    expires_at = datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    return (expires_at + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# --------------------------------
+# Transports
+# --------------------------------
+def _encode(headers, payload):
+    """Response headers and body bytes for a stand-in's answer"""
+    if isinstance(payload, bytes):
+        return {"Content-Type": "text/plain; charset=utf-8", **headers}, payload
+    return {"Content-Type": "application/json", **headers}, json.dumps(
+        payload
+    ).encode()
+
+
+class FakeGitHubAdapter(BaseAdapter):
+    """requests transport adapter that answers from a stand-in"""
+
+    def __init__(self, fake):
+        super().__init__()
+        self.fake = fake
+
+    def send(self, request, **kwargs):
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        status, headers, payload = self.fake.handle(
+            request.method, request.url, request.headers, body
+        )
+        headers, content = _encode(headers, payload)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+class _FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so client pools behave as with GitHub
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        status, headers, payload = self.server.fake.handle(
+            self.command, self.path, self.headers, body
+        )
+        headers, content = _encode(headers, payload)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        logger.debug("fake github: " + format, *args)
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """
+    Serves a stand-in over HTTP on host:port (port 0 picks a free one). Point
+    GITHUB_API_URL and GITHUB_OAUTH_URL at `url`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fake, host="127.0.0.1", port=0):
+        super().__init__((host, port), _FakeGitHubHandler)
+        self.fake = fake
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+@lru_cache(maxsize=1)
+def fake_private_key():
+    """A throwaway GitHub App key so GitHubTokenService can sign its JWTs"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _forget_github_tokens():
+    # Tokens minted by a stand-in mean nothing to the real GitHub, and the other
+    # way round
+    from npoapi.services import github_token_service
+    from npoapi.services.github_token_service import GitHubTokenService
+
+    github_token_service._local_jwts.clear()
+    GitHubTokenService().invalidate_installation_token()
+
+
+@contextmanager
+def install_fake_github(fake=None):
+    """
+    Route this process's GitHub transport (API and OAuth hosts) to `fake`,
+    with a generated App key, for the duration of the block.
+    """
+    from django.test.utils import override_settings
+    from npoapi.services.github_transport import get_transport
+
+    fake = fake or FakeGitHub()
+    session = get_transport().session
+    prefixes = [settings.GITHUB_API_URL, settings.GITHUB_OAUTH_URL]
+    adapter = FakeGitHubAdapter(fake)
+    for prefix in prefixes:
+        session.mount(prefix, adapter)
+    _forget_github_tokens()
+    try:
+        with override_settings(GITHUB_PRIVATE_KEY=fake_private_key()):
+            yield fake
+    finally:
+        for prefix in prefixes:
+            session.adapters.pop(prefix, None)
+        _forget_github_tokens()
+
+
+@contextmanager
+def run_fake_github_server(fake=None, host="127.0.0.1", port=0):
+    """
+    Serve `fake` over HTTP on a background thread and point GITHUB_API_URL and
+    GITHUB_OAUTH_URL at it, with a generated App key, for the duration of the
+    block. Yields the FakeGitHubServer; its `fake` attribute has the state.
+    """
+    from django.test.utils import override_settings
+
+    server = FakeGitHubServer(fake or FakeGitHub(), host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _forget_github_tokens()
+    try:
+        with override_settings(
+            GITHUB_API_URL=server.url,
+            GITHUB_OAUTH_URL=server.url,
+            GITHUB_PRIVATE_KEY=fake_private_key(),
+        ):
+            yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        _forget_github_tokens()
+
+
+if pytest is not None:
+
+    @pytest.fixture
+    def fake_github_server():
+        """
+        A FakeGitHubServer the settings point at, for one test. Enable with
+        `pytest_plugins = ["npoapi.github_fake"]` in a conftest.py.
+        """
+        with run_fake_github_server() as server:
+            yield server
@@ -0,0 +1,50 @@
+import json
+import logging
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    One line per record with the fields passed in `extra`, either as
+    `time level logger message key=value ...` or, with as_json=True, as a JSON
+    object for log shippers.
+    """
+
+    def __init__(self, as_json=False, **kwargs):
+        super().__init__(**kwargs)
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = {
+            key: value
+            for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and not key.startswith("_")
+        }
+        if record.exc_info:
+            fields["exc_info"] = self.formatException(record.exc_info)
+
+        if self.as_json:
+            entry = {
+                "time": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }
+            return json.dumps(entry, default=str)
+
+        pairs = " ".join(f"{key}={_text(value)}" for key, value in fields.items())
+        line = (
+            f"{self.formatTime(record)} {record.levelname} {record.name} "
+            f"{record.getMessage()}"
+        )
+        return f"{line} {pairs}" if pairs else line
+
+
+def _text(value):
+    text = str(value)
+    if not text or any(c.isspace() or c in '"=' for c in text):
+        return json.dumps(text)
+    return text
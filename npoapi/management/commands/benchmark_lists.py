@@ -0,0 +1,155 @@
+# npoapi/management/commands/benchmark_lists.py
+
+import time
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from npoapi.fastpath import serialize_values, values_plan
+from npoapi.models import Organization, Project
+from npoapi.serializers import (
+    OrganizationSerializer,
+    ProjectSerializer,
+    UserSerializer,
+)
+
+User = get_user_model()
+
+PREFIX = "benchmark-lists"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time one large list page through the serializer and through the .values() "
+        "fast path, on seeded rows that are rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=10000, help="Rows per list (default 10000)"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Runs per path; the best is kept"
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"Rows from an earlier run exist (usernames {PREFIX}-*)")
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"])
+                self.run(options["rows"], options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        groups = [
+            Group.objects.get_or_create(name=name)[0]
+            for name in ("Developer", "Organization User")
+        ]
+        users = User.objects.bulk_create(
+            [
+                User(username=f"{PREFIX}-{i}", email=f"{PREFIX}-{i}@example.org")
+                for i in range(rows)
+            ]
+        )
+        User.groups.through.objects.bulk_create(
+            [
+                User.groups.through(user_id=user.pk, group_id=group.pk)
+                for user in users
+                for group in groups[: 1 + user.pk % 2]
+            ]
+        )
+        organizations = Organization.objects.bulk_create(
+            [
+                Organization(
+                    name=f"{PREFIX}-{i}",
+                    website="https://example.org",
+                    address="1 Main St",
+                    city="Nashville",
+                    state="TN",
+                    user=users[i],
+                )
+                for i in range(rows)
+            ]
+        )
+        Project.objects.bulk_create(
+            [
+                Project(
+                    organization=organizations[i % len(organizations)],
+                    name=f"{PREFIX}-{i}",
+                    description="Benchmark project " * 8,
+                )
+                for i in range(rows)
+            ]
+        )
+
+    def run(self, rows, repeat):
+        lists = [
+            (
+                "users",
+                UserSerializer,
+                User.objects.filter(username__startswith=PREFIX),
+                ["groups"],
+            ),
+            (
+                "organizations",
+                OrganizationSerializer,
+                Organization.objects.filter(name__startswith=PREFIX),
+                [],
+            ),
+            (
+                "projects",
+                ProjectSerializer,
+                Project.objects.filter(name__startswith=PREFIX),
+                [],
+            ),
+        ]
+        for name, serializer_class, queryset, prefetch in lists:
+            queryset = queryset.order_by("id")[:rows]
+            columns, _ = values_plan(serializer_class)
+            # .all() each run so no path reuses an evaluated queryset
+            paths = {
+                "serializer": lambda: serializer_class(
+                    queryset.prefetch_related(*prefetch).all(), many=True
+                ).data,
+                "values": lambda: serialize_values(
+                    serializer_class, queryset.values("id", *columns)
+                ),
+            }
+            if prefetch:
+                paths["serializer, no prefetch"] = lambda: serializer_class(
+                    queryset.all(), many=True
+                ).data
+
+            results = {path: self.measure(run, repeat) for path, run in paths.items()}
+            if [dict(row) for row in results["serializer"][2]] != results["values"][2]:
+                raise CommandError(f"{name}: the values path output differs")
+
+            baseline = results["serializer"][0]
+            self.stdout.write(f"{name} ({rows} rows)")
+            for path, (seconds, queries, _) in results.items():
+                self.stdout.write(
+                    f"  {path:<24} {seconds * 1000:8.1f} ms  {queries:6d} queries  "
+                    f"{baseline / seconds:5.1f}x"
+                )
+
+    def measure(self, run, repeat):
+        """(seconds, queries, data) of the fastest of `repeat` runs"""
+        best = None
+        for _ in range(repeat):
+            queries = []
+            with connection.execute_wrapper(
+                lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+            ):
+                started = time.perf_counter()
+                data = run()
+                seconds = time.perf_counter() - started
+            if best is None or seconds < best[0]:
+                best = (seconds, len(queries), data)
+        return best
@@ -1,4 +1,5 @@
-"""
+# npoapi/management/commands/create_groups.py
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
@@ -36,7 +37,8 @@ class Command(BaseCommand):
         for role_name, permissions in roles_permissions.items():
             group, created = Group.objects.get_or_create(name=role_name)
 
-            # Assign permissions to the group
+            # Assign permissions to the group; the m2m_changed receiver drops the
+            # group's cached permissions (npoapi/auth_backends.py)
             group.permissions.set(permissions)
             group.save()
 
@@ -53,4 +55,3 @@ class Command(BaseCommand):
                 "All groups created and permissions assigned successfully."
             )
         )
-"""
@@ -0,0 +1,142 @@
+# npoapi/management/commands/explain_queries.py
+
+import re
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models.functions import Lower
+from npoapi.conditional import queryset_validators
+from npoapi.models import DeveloperProject, Organization, Project
+
+User = get_user_model()
+
+# A plan line that reads a whole table instead of an index
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (?:TABLE )?(\w+)(?! USING)\s*$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+SORT_PATTERNS = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"\bSort\b"),
+}
+
+
+def viewset_queries():
+    """
+    The queries each viewset action issues, with placeholder ids. Each entry
+    runs the query the way the view does; the SQL is captured, not executed.
+    """
+    user_id, pk = 1, 1
+    return {
+        "projects.list": lambda: list(Project.objects.order_by("id")[:101]),
+        "projects.list (cursor)": lambda: list(
+            Project.objects.filter(id__gt=pk).order_by("id")[:101]
+        ),
+        "projects.list (ordering=name)": lambda: list(
+            Project.objects.filter(name__gt="m").order_by("name", "id")[:101]
+        ),
+        "projects.list (validators)": lambda: queryset_validators(Project.objects.all()),
+        "projects.retrieve": lambda: Project.objects.get(pk=pk),
+        "projects.create (name check)": lambda: Project.objects.annotate(
+            lower_name=Lower("name")
+        )
+        .filter(lower_name="example")
+        .exists(),
+        "projects.user-projects": lambda: list(
+            Project.objects.filter(organization__user=user_id)
+        ),
+        "organizations.list": lambda: list(Organization.objects.order_by("id")[:101]),
+        "organizations.list (ordering=name)": lambda: list(
+            Organization.objects.filter(name__gt="m").order_by("name", "id")[:101]
+        ),
+        "organizations.retrieve": lambda: Organization.objects.get(pk=pk),
+        "organizations.user": lambda: Organization.objects.get(user=user_id),
+        "users.list": lambda: list(User.objects.order_by("id")[:101]),
+        "users.list (ordering=username)": lambda: list(
+            User.objects.filter(username__gt="m").order_by("username", "id")[:101]
+        ),
+        "users.retrieve": lambda: User.objects.get(pk=pk),
+        "claims.by-developer": lambda: list(
+            DeveloperProject.objects.filter(developer=pk).order_by("-date_claimed")
+        ),
+        "claims.by-project": lambda: list(
+            DeveloperProject.objects.filter(project=pk).order_by("-date_claimed")
+        ),
+    }
+
+
+class _Captured(Exception):
+    pass
+
+
+def capture_sql(run_query):
+    """Return the (sql, params) of the first query run_query issues, without running it"""
+    captured = {}
+
+    def intercept(execute, sql, params, many, context):
+        captured["sql"], captured["params"] = sql, params
+        raise _Captured()
+
+    with connection.execute_wrapper(intercept):
+        try:
+            run_query()
+        except _Captured:
+            pass
+    return captured["sql"], captured["params"]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on each viewset's queries and flag full table scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verbose-plans", action="store_true", help="Print every query plan"
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error if any query does a full table scan",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f"Don't know how to read {vendor} query plans")
+
+        flagged = []
+        for name, run_query in viewset_queries().items():
+            sql, params = capture_sql(run_query)
+            plan = self.explain(sql, params)
+            scans = [
+                m.group(1)
+                for line in plan.splitlines()
+                for m in [FULL_SCAN_PATTERNS[vendor].search(line)]
+                if m
+            ]
+            sorts = bool(SORT_PATTERNS[vendor].search(plan))
+            if scans and not sorts and " LIMIT " in sql:
+                # Walking the table in key order stops after LIMIT rows
+                scans = []
+
+            if scans:
+                flagged.append(name)
+                self.stdout.write(
+                    self.style.ERROR(f"FULL SCAN  {name}: {', '.join(scans)}")
+                )
+            elif sorts:
+                self.stdout.write(self.style.WARNING(f"SORT       {name}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok         {name}"))
+
+            if options["verbose_plans"] or scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        if flagged and options["strict"]:
+            raise CommandError(f"{len(flagged)} queries do full table scans")
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            # SQLite returns (id, parent, notused, detail); Postgres one text column
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
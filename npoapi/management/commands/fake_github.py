@@ -0,0 +1,139 @@
+# npoapi/management/commands/fake_github.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from npoapi.github_fake import (
+    Cassette,
+    FakeGitHub,
+    FakeGitHubServer,
+    RecordingGitHub,
+    ReplayGitHub,
+    fake_private_key,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local stand-in for the GitHub API and OAuth endpoints, with "
+        "optional latency, errors and rate limits, or record and replay the "
+        "real GitHub. Point GITHUB_API_URL and GITHUB_OAUTH_URL at it to run or "
+        "load-test the server and provisioner offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="Seconds added to every response"
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.0,
+            help="Up to this many more seconds, drawn per request",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with a 500, 502 or 503",
+        )
+        parser.add_argument(
+            "--secondary-rate-limit-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with a 403 and Retry-After",
+        )
+        parser.add_argument(
+            "--retry-after",
+            type=int,
+            default=1,
+            help="Retry-After seconds of secondary rate limits",
+        )
+        parser.add_argument(
+            "--rate-limit",
+            type=int,
+            help="Requests per window before 403s; adds X-RateLimit-* headers",
+        )
+        parser.add_argument(
+            "--rate-limit-window", type=int, default=3600, help="Window in seconds"
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Seed for latency and fault draws, for reruns"
+        )
+        parser.add_argument(
+            "--installation-id",
+            type=int,
+            help="Installation the fake accepts (default: GITHUB_INSTALLATION_ID)",
+        )
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            "--record",
+            metavar="CASSETTE",
+            help="Forward to the real GitHub and save its responses to this file",
+        )
+        mode.add_argument(
+            "--replay",
+            metavar="CASSETTE",
+            help="Answer with the responses recorded in this file",
+        )
+        parser.add_argument(
+            "--upstream-api-url",
+            default="https://api.github.com",
+            help="GitHub API to record from",
+        )
+        parser.add_argument(
+            "--upstream-oauth-url",
+            default="https://github.com",
+            help="GitHub OAuth host to record from",
+        )
+
+    def handle(self, *args, **options):
+        faults = {
+            "latency": options["latency"],
+            "jitter": options["jitter"],
+            "error_rate": options["error_rate"],
+            "secondary_rate_limit_rate": options["secondary_rate_limit_rate"],
+            "retry_after": options["retry_after"],
+            "rate_limit": options["rate_limit"],
+            "rate_limit_window": options["rate_limit_window"],
+            "seed": options["seed"],
+        }
+        if options["record"]:
+            fake = RecordingGitHub(
+                Cassette(options["record"]),
+                api_url=options["upstream_api_url"],
+                oauth_url=options["upstream_oauth_url"],
+                **faults,
+            )
+            mode = f"recording to {options['record']}"
+        elif options["replay"]:
+            cassette = Cassette.load(options["replay"])
+            fake = ReplayGitHub(cassette, **faults)
+            mode = f"replaying {len(cassette.interactions)} responses"
+        else:
+            fake = FakeGitHub(installation_id=options["installation_id"], **faults)
+            mode = "in-memory fake"
+
+        server = FakeGitHubServer(fake, options["host"], options["port"])
+        self.stdout.write(f"Fake GitHub ({mode}) listening on {server.url}")
+        self.stdout.write("Run the API or provisioner with:")
+        self.stdout.write(f"  export GITHUB_API_URL={server.url}")
+        self.stdout.write(f"  export GITHUB_OAUTH_URL={server.url}")
+        if not options["record"]:
+            # The fake checks that a JWT is sent, not its signature, but the
+            # client still needs a valid RSA key to sign one
+            key = fake_private_key().replace("\n", "\\n")
+            self.stdout.write(f"  export GITHUB_PRIVATE_KEY='{key}'")
+            installation_id = (
+                options["installation_id"] or settings.GITHUB_INSTALLATION_ID
+            )
+            self.stdout.write(f"  export GITHUB_INSTALLATION_ID={installation_id}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write(f"Served {fake.requests} requests, faults: {fake.faults}")
@@ -0,0 +1,425 @@
+# npoapi/management/commands/generate_dataset.py
+
+import math
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from itertools import accumulate, islice
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from npoapi.caching import bump_tags
+from npoapi.models import Developer, DeveloperProject, Organization, Project
+from npoapi.search import drop_fts_triggers, install_fts_triggers
+from npoapi.services.organization_stats_service import OrganizationStatsService
+
+User = get_user_model()
+
+FIRST_NAMES = (
+    "Alex Sam Jordan Taylor Morgan Casey Riley Jamie Avery Quinn Maria James "
+    "Aisha Wei Carlos Priya"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Lee Nguyen Patel Kim "
+    "Lopez Clark Young"
+).split()
+# (city, state, weight): most organizations are in a few large cities
+CITIES = [
+    ("Nashville", "TN", 30),
+    ("Memphis", "TN", 12),
+    ("Knoxville", "TN", 8),
+    ("Chattanooga", "TN", 6),
+    ("Atlanta", "GA", 10),
+    ("Louisville", "KY", 5),
+    ("Birmingham", "AL", 4),
+    ("Franklin", "TN", 3),
+    ("Murfreesboro", "TN", 2),
+    ("Clarksville", "TN", 2),
+]
+CAUSES = (
+    "Food Literacy Animal Youth Housing Arts Health Veterans River Community "
+    "Music Garden Refugee Senior"
+).split()
+KINDS = "Bank Alliance Project Foundation Network Society Fund".split()
+PROJECT_KINDS = [
+    "website",
+    "donation page",
+    "volunteer portal",
+    "event calendar",
+    "newsletter signup",
+    "inventory tracker",
+    "mobile app",
+    "donor database",
+]
+FEATURES = [
+    "online donations",
+    "volunteer scheduling",
+    "a searchable directory",
+    "an events map",
+    "email campaigns",
+    "accessible forms",
+    "a blog",
+    "member logins",
+    "reporting dashboards",
+    "multilingual content",
+]
+# (provisioning status, has a repository, weight)
+PROVISIONING = [
+    (Project.PROVISIONING_READY, True, 92),
+    (Project.PROVISIONING_PENDING, False, 5),
+    (Project.PROVISIONING_FAILED, False, 3),
+]
+# Most projects take one developer; claims beyond this raise it for the project
+MAX_CLAIMERS = [(1, 70), (2, 15), (3, 10), (5, 5)]
+
+DEFERRED_INDEX_MODELS = [Organization, Project, DeveloperProject]
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _weighted(rng, choices):
+    """One (value, ..., weight) tuple of `choices`, without its weight"""
+    picked = rng.choices(choices, weights=[choice[-1] for choice in choices])[0]
+    return picked[:-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset: users with groups, developers, "
+        "organizations, projects and claims, with skewed sizes and activity. "
+        "Rows are bulk-inserted in batches with one pre-hashed password, and "
+        "secondary indexes and search triggers are rebuilt once at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--orgs", type=int, default=1000)
+        parser.add_argument(
+            "--projects-per-org",
+            type=float,
+            default=5,
+            help="Mean projects per organization (log-normal, so most have fewer)",
+        )
+        parser.add_argument(
+            "--claims", type=int, default=20000, help="DeveloperProject rows"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="gen",
+            help="Username and project name prefix, so runs can be told apart",
+        )
+        parser.add_argument(
+            "--password", default="password", help="Password of every generated user"
+        )
+        parser.add_argument(
+            "--keep-indexes",
+            action="store_true",
+            help="Insert with every index in place instead of rebuilding them",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = max(options["batch_size"], 1)
+        self.prefix = options["prefix"]
+        self.now = timezone.now()
+        users, orgs = options["users"], options["orgs"]
+        if orgs < 0 or options["claims"] < 0 or options["projects_per_org"] < 0:
+            raise CommandError("Counts must not be negative")
+        self.owner_count = min(max(round(orgs * 0.85), 1), users) if orgs else 0
+        self.admin_count = max(users // 5000, 1)
+        if users < self.owner_count + self.admin_count + 1:
+            raise CommandError(
+                f"--users must be at least {self.owner_count + self.admin_count + 1} "
+                f"for {orgs} organizations"
+            )
+        if User.objects.filter(username__startswith=f"{self.prefix}-").exists():
+            raise CommandError(
+                f"Users named {self.prefix}-* exist already; pass another --prefix"
+            )
+
+        call_command("create_groups", stdout=StringIO())
+        self.groups = {group.name: group.pk for group in Group.objects.all()}
+        started = time.monotonic()
+        deferred = [] if options["keep_indexes"] else self.drop_indexes()
+        drop_fts_triggers(connection)
+        try:
+            with transaction.atomic():
+                user_ids = self.step("users", self.create_users, users, options)
+                owner_ids = user_ids[: self.owner_count]
+                admin_ids = user_ids[
+                    self.owner_count : self.owner_count + self.admin_count
+                ]
+                developer_user_ids = user_ids[self.owner_count + self.admin_count :]
+                self.step(
+                    "group memberships",
+                    self.create_memberships,
+                    owner_ids,
+                    admin_ids,
+                    developer_user_ids,
+                )
+                developer_ids = self.step(
+                    "developers", self.create_developers, developer_user_ids
+                )
+                organization_ids = self.step(
+                    "organizations", self.create_organizations, orgs, owner_ids
+                )
+                claims = self.plan_claims(
+                    organization_ids, options, len(developer_ids)
+                )
+                project_ids = self.step(
+                    "projects", self.create_projects, organization_ids, claims
+                )
+                self.step(
+                    "claims", self.create_claims, project_ids, claims, developer_ids
+                )
+        finally:
+            # Also after a failure, so the schema is left as migrations made it
+            self.step("indexes", self.create_indexes, deferred)
+            self.step("search index", install_fts_triggers, connection)
+
+        if connection.vendor in ("sqlite", "postgresql"):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")  # Planner statistics for the new volumes
+        # With the indexes back; bulk_create skipped the signals that keep them
+        self.step(
+            "organization stats",
+            OrganizationStatsService().refresh,
+            organization_ids,
+            True,
+        )
+        # bulk_create skips the signals that invalidate cached list responses
+        bump_tags("users", "organizations", "projects", "organization-stats")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(user_ids)} users, {len(organization_ids)} "
+                f"organizations, {len(project_ids)} projects and "
+                f"{sum(claims.values())} claims in {time.monotonic() - started:.1f}s"
+            )
+        )
+
+    def step(self, name, function, *args):
+        started = time.monotonic()
+        result = function(*args)
+        rows = f"{len(result)} " if isinstance(result, list) else ""
+        self.stdout.write(f"  {rows}{name} ({time.monotonic() - started:.1f}s)")
+        return result
+
+    def insert(self, model, objects):
+        """bulk_create in batches, keeping only the new primary keys"""
+        pks = []
+        for batch in _batches(objects, self.batch_size):
+            created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+            pks.extend(obj.pk for obj in created)
+        return pks
+
+    # --------------------------------
+    # Deferred indexes
+    # --------------------------------
+    def existing_indexes(self, model):
+        with connection.cursor() as cursor:
+            return set(
+                connection.introspection.get_constraints(cursor, model._meta.db_table)
+            )
+
+    def drop_indexes(self):
+        """
+        Drop the models' secondary indexes, which are cheaper to build once
+        over the loaded rows than to update row by row. Unique constraints stay.
+        """
+        dropped = []
+        with connection.schema_editor() as editor:
+            for model in DEFERRED_INDEX_MODELS:
+                existing = self.existing_indexes(model)
+                for index in model._meta.indexes:
+                    if index.name in existing:
+                        editor.remove_index(model, index)
+                        dropped.append((model, index))
+        return dropped
+
+    def create_indexes(self, deferred):
+        with connection.schema_editor() as editor:
+            for model, index in deferred:
+                if index.name not in self.existing_indexes(model):
+                    editor.add_index(model, index)
+        return [index for _, index in deferred]
+
+    # --------------------------------
+    # Rows
+    # --------------------------------
+    def create_users(self, count, options):
+        password = make_password(options["password"])  # Hashed once, not per user
+        rng = self.rng
+
+        def users():
+            for i in range(count):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                # Sign-ups grow over time: recent dates are the most common
+                days_ago = 3 * 365 * (1 - math.sqrt(rng.random()))
+                joined = self.now - timedelta(days=days_ago)
+                active = rng.random() < 0.7
+                yield User(
+                    username=f"{self.prefix}-{i}",
+                    email=f"{first}.{last}.{i}@example.org".lower(),
+                    first_name=first,
+                    last_name=last,
+                    password=password,
+                    date_joined=joined,
+                    last_login=(
+                        joined + (self.now - joined) * rng.random() if active else None
+                    ),
+                )
+
+        return self.insert(User, users())
+
+    def create_memberships(self, owner_ids, admin_ids, developer_ids):
+        through = User.groups.through
+        rows = [
+            (owner_ids, "Organization User"),
+            (admin_ids, "Admin"),
+            (developer_ids, "Developer"),
+        ]
+        return self.insert(
+            through,
+            (
+                through(user_id=user_id, group_id=self.groups[group])
+                for user_ids, group in rows
+                for user_id in user_ids
+            ),
+        )
+
+    def create_developers(self, user_ids):
+        return self.insert(Developer, (Developer(user_id=pk) for pk in user_ids))
+
+    def create_organizations(self, count, owner_ids):
+        rng = self.rng
+        # The first owners get one organization each, the rest go to a few
+        # prolific owners (Pareto weights)
+        owner_weights = list(accumulate(rng.paretovariate(1.2) for _ in owner_ids))
+
+        def organizations():
+            for i in range(count):
+                if i < len(owner_ids):
+                    owner = owner_ids[i]
+                else:
+                    owner = rng.choices(owner_ids, cum_weights=owner_weights)[0]
+                city, state = _weighted(rng, CITIES)
+                name = f"{rng.choice(CAUSES)} {rng.choice(KINDS)} {i}"
+                yield Organization(
+                    name=name,
+                    website=f"https://org-{i}.example.org",
+                    address=f"{rng.randint(1, 9999)} Main St",
+                    city=city,
+                    state=state,
+                    user_id=owner,
+                )
+
+        return self.insert(Organization, organizations())
+
+    def plan_claims(self, organization_ids, options, developer_count):
+        """
+        Projects per organization (log-normal around --projects-per-org) and
+        claims per project: popularity is Pareto-distributed, so a few projects
+        draw most claims and most get none or one.
+        """
+        rng = self.rng
+        mean = options["projects_per_org"]
+        mu = math.log(mean) - 0.5 if mean > 0 else None  # sigma=1: mean = e^(mu+½)
+        self.projects_per_org = [
+            round(rng.lognormvariate(mu, 1.0)) if mu is not None else 0
+            for _ in organization_ids
+        ]
+        total = sum(self.projects_per_org)
+        wanted = options["claims"]
+        if wanted and (not total or not developer_count):
+            raise CommandError("Claims need at least one project and one developer")
+        if wanted > total * developer_count:
+            raise CommandError(
+                f"At most {total * developer_count} claims fit {total} projects "
+                f"and {developer_count} developers"
+            )
+        popularity = list(accumulate(rng.paretovariate(1.8) for _ in range(total)))
+        claims = Counter()
+        remaining = wanted
+        while remaining:
+            # Re-draw the claims that landed on projects without free developers
+            for index in rng.choices(range(total), cum_weights=popularity, k=remaining):
+                claims[index] += 1
+            remaining = 0
+            for index, count in claims.items():
+                if count > developer_count:
+                    remaining += count - developer_count
+                    claims[index] = developer_count
+        return claims
+
+    def create_projects(self, organization_ids, claims):
+        rng = self.rng
+
+        def projects():
+            index = 0
+            for organization_id, count in zip(organization_ids, self.projects_per_org):
+                for _ in range(count):
+                    status, has_repository = _weighted(rng, PROVISIONING)
+                    name = f"{self.prefix}-{rng.choice(CAUSES).lower()}-{index}"
+                    claimed = claims.get(index, 0)
+                    yield Project(
+                        organization_id=organization_id,
+                        name=name,
+                        description=(
+                            f"A {rng.choice(PROJECT_KINDS)} with "
+                            f"{rng.choice(FEATURES)} and {rng.choice(FEATURES)}"
+                        ),
+                        repository_url=(
+                            f"https://github.com/nss-npo/{name}"
+                            if has_repository
+                            else None
+                        ),
+                        provisioning_status=status,
+                        max_claimers=max(_weighted(rng, MAX_CLAIMERS)[0], claimed),
+                        claim_count=claimed,
+                    )
+                    index += 1
+
+        return self.insert(Project, projects())
+
+    def create_claims(self, project_ids, claims, developer_ids):
+        rng = self.rng
+        # Some developers are far more active than others
+        activity = list(accumulate(rng.paretovariate(1.2) for _ in developer_ids))
+
+        def developer_sample(count):
+            if count > len(developer_ids) // 2:
+                return rng.sample(developer_ids, count)
+            picked = set()
+            while len(picked) < count:
+                picked.update(
+                    rng.choices(
+                        developer_ids, cum_weights=activity, k=count - len(picked)
+                    )
+                )
+            return picked
+
+        def rows():
+            for index, count in sorted(claims.items()):
+                project_id = project_ids[index]
+                for developer_id in developer_sample(count):
+                    # Claims cluster in the last few months
+                    days_ago = 365 * rng.random() ** 2
+                    yield DeveloperProject(
+                        developer_id=developer_id,
+                        project_id=project_id,
+                        date_claimed=self.now - timedelta(days=days_ago),
+                    )
+
+        return self.insert(DeveloperProject, rows())
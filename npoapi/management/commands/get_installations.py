@@ -2,23 +2,16 @@
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
-import jwt
-import time
-import requests
+from npoapi.services.github_token_service import GitHubTokenService
+from npoapi.services.github_transport import get_transport
 
 
 class Command(BaseCommand):
     help = "Get GitHub App installation token"
 
-    # Generate the JWT (valid for 10 minutes)
+    # Generate the JWT (shares the parsed key with GitHubTokenService)
     def generate_jwt(self):
-        payload = {
-            "iat": int(time.time()),  # Issued at time
-            "exp": int(time.time()) + (5 * 60),  # Expires after 5 minutes
-            "iss": int(settings.GITHUB_APP_ID),  # GitHub App ID
-        }
-
-        return jwt.encode(payload, settings.GITHUB_PRIVATE_KEY, algorithm="RS256")
+        return GitHubTokenService().generate_jwt()
 
     # Generate the installation access token
     def get_installation_token(self):
@@ -27,8 +20,10 @@ class Command(BaseCommand):
             "Authorization": f"Bearer {jwt_token}",
             "Accept": "application/vnd.github.v3+json",
         }
-        url = f"https://api.github.com/app/installations/{settings.GITHUB_INSTALLATION_ID}/access_tokens"
-        response = requests.post(url, headers=headers)
+        url = f"{settings.GITHUB_API_URL}/app/installations/{settings.GITHUB_INSTALLATION_ID}/access_tokens"
+        response = get_transport().post(
+            url, endpoint="app.installation.access_tokens", headers=headers
+        )
 
         if response.status_code == 201:
             token = response.json()["token"]
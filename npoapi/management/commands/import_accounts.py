@@ -0,0 +1,247 @@
+# npoapi/management/commands/import_accounts.py
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from npoapi.caching import bump_tags
+from npoapi.models import Organization
+
+User = get_user_model()
+
+ORGANIZATION_FIELDS = ["name", "website", "address", "city", "state"]
+
+
+def _init_hasher():
+    # Worker processes need the password hasher settings; a no-op when forked
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "npoproject.settings")
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream users, their groups and organizations from a CSV or NDJSON file. "
+        "Columns: username, email, password, first_name, last_name, groups "
+        "(';'-separated in CSV, a list in NDJSON) and optionally organization_name, "
+        "organization_website, organization_address, organization_city, "
+        "organization_state."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Input format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows per transaction"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Password hashing processes (default: all cores)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file used to resume an interrupted import "
+            "(default: <path>.checkpoint)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first row",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"]).resolve()
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        input_format = options["format"] or (
+            "csv" if path.suffix.lower() == ".csv" else "ndjson"
+        )
+        batch_size = max(options["batch_size"], 1)
+        checkpoint_path = Path(options["checkpoint"] or f"{path}.checkpoint")
+
+        done = 0 if options["restart"] else self.read_checkpoint(checkpoint_path, path)
+        if done:
+            self.stdout.write(f"Resuming after row {done} ({checkpoint_path})")
+
+        self.groups = {group.name: group for group in Group.objects.all()}
+        self.unknown_groups = set()
+        self.counts = {"users": 0, "organizations": 0, "skipped": 0, "errors": 0}
+        workers = max(options["workers"], 1)
+        started = time.monotonic()
+        processed = 0
+
+        with path.open(newline="", encoding="utf-8") as source, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_hasher
+        ) as executor:
+            rows = enumerate(self.read_rows(source, input_format), start=1)
+            rows = islice(rows, done, None)
+            # Hash the next batch in the pool while this one is inserted
+            pending = None
+            while True:
+                batch = list(islice(rows, batch_size))
+                hashing = None
+                if batch:
+                    passwords = [row.get("password") or None for _, row in batch]
+                    chunksize = max(len(batch) // (4 * workers), 1)
+                    hashing = executor.map(_hash, passwords, chunksize=chunksize)
+                if pending is not None:
+                    previous, hashes = pending
+                    self.insert_batch(previous, list(hashes))
+                    done = previous[-1][0]
+                    processed += len(previous)
+                    self.write_checkpoint(checkpoint_path, path, done)
+                    rate = processed / (time.monotonic() - started)
+                    self.stdout.write(
+                        f"{done} rows: {self.counts['users']} users, "
+                        f"{self.counts['organizations']} organizations, "
+                        f"{self.counts['skipped']} skipped, "
+                        f"{self.counts['errors']} errors ({rate:.0f} rows/s)"
+                    )
+                if not batch:
+                    break
+                pending = (batch, hashing)
+
+        checkpoint_path.unlink(missing_ok=True)
+        if self.unknown_groups:
+            self.stderr.write(
+                "Unknown groups ignored (run create_groups first?): "
+                + ", ".join(sorted(self.unknown_groups))
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {self.counts['users']} users and "
+                f"{self.counts['organizations']} organizations in "
+                f"{time.monotonic() - started:.1f}s"
+            )
+        )
+
+    # --------------------------------
+    # Input
+    # --------------------------------
+    def read_rows(self, source, input_format):
+        """Yield one dict per account without reading the whole file"""
+        if input_format == "csv":
+            for row in csv.DictReader(source):
+                row["groups"] = [g for g in (row.get("groups") or "").split(";") if g]
+                yield row
+            return
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                row = {}  # Counted as an error, keeps row numbers stable
+            groups = row.get("groups") or []
+            row["groups"] = groups.split(";") if isinstance(groups, str) else groups
+            yield row
+
+    # --------------------------------
+    # Writes
+    # --------------------------------
+    def insert_batch(self, batch, hashes):
+        valid = []
+        seen = set()
+        for (number, row), password in zip(batch, hashes):
+            username = (row.get("username") or "").strip()
+            if not username or len(username) > 150:
+                self.stderr.write(f"Row {number}: missing or invalid username")
+                self.counts["errors"] += 1
+                continue
+            if username in seen:
+                self.counts["skipped"] += 1
+                continue
+            seen.add(username)
+            valid.append((row, username, password))
+
+        # Rows imported by an earlier, interrupted run are skipped
+        existing = set(
+            User.objects.filter(username__in=seen).values_list("username", flat=True)
+        )
+        valid = [entry for entry in valid if entry[1] not in existing]
+        self.counts["skipped"] += len(existing)
+        if not valid:
+            return
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                [
+                    User(
+                        username=username,
+                        email=row.get("email") or "",
+                        first_name=row.get("first_name") or "",
+                        last_name=row.get("last_name") or "",
+                        password=password,
+                    )
+                    for row, username, password in valid
+                ]
+            )
+
+            memberships = []
+            organizations = []
+            for user, (row, _, _) in zip(users, valid):
+                for name in row["groups"]:
+                    group = self.groups.get(name.strip())
+                    if group is None:
+                        self.unknown_groups.add(name.strip())
+                        continue
+                    memberships.append(
+                        User.groups.through(user_id=user.pk, group_id=group.pk)
+                    )
+                if row.get("organization_name"):
+                    organizations.append(
+                        Organization(
+                            user=user,
+                            **{
+                                field: row.get(f"organization_{field}") or ""
+                                for field in ORGANIZATION_FIELDS
+                            },
+                        )
+                    )
+            User.groups.through.objects.bulk_create(memberships)
+            Organization.objects.bulk_create(organizations)
+
+        self.counts["users"] += len(users)
+        self.counts["organizations"] += len(organizations)
+        # bulk_create skips the signals that invalidate cached list responses
+        bump_tags("users", "organizations")
+
+    # --------------------------------
+    # Checkpoint
+    # --------------------------------
+    def read_checkpoint(self, checkpoint_path, path):
+        try:
+            checkpoint = json.loads(checkpoint_path.read_text())
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get("path") != str(path):
+            return 0
+        return int(checkpoint.get("rows", 0))
+
+    def write_checkpoint(self, checkpoint_path, path, rows):
+        # Written after the batch commits; replace() so a crash can't leave half a file
+        tmp = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+        tmp.write_text(json.dumps({"path": str(path), "rows": rows}))
+        tmp.replace(checkpoint_path)
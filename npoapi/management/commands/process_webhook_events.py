@@ -0,0 +1,62 @@
+# npoapi/management/commands/process_webhook_events.py
+
+import time
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+from npoapi.services.webhook_service import WebhookEventService
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply queued GitHub webhook events to project repository activity "
+        "(last push, open issues, stars), coalescing each repository's events "
+        "into one batched update."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Events read and applied per transaction",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help=(
+                "Seconds to wait when the queue is empty; events arriving "
+                "meanwhile are coalesced into the next batch"
+            ),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        service = WebhookEventService()
+        while True:
+            close_old_connections()
+            try:
+                stats = service.process(batch_size=options["batch_size"])
+            except OperationalError as e:
+                # SQLite reports "database is locked" when writers collide
+                self.stderr.write(str(e))
+                stats = {"events": 0, "failed": 0}
+
+            if stats["events"]:
+                self.stdout.write(
+                    f"{stats['events']} events for {stats['repositories']} "
+                    f"repositories, {stats['projects']} projects updated"
+                    + (f", {stats['failed']} malformed" if stats["failed"] else "")
+                )
+                continue
+
+            purged = service.purge()
+            if purged:
+                self.stdout.write(f"Purged {purged} processed events")
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
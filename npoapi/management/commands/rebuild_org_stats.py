@@ -0,0 +1,47 @@
+# npoapi/management/commands/rebuild_org_stats.py
+
+import time
+from django.core.management.base import BaseCommand
+from npoapi.caching import bump_tags
+from npoapi.models import Organization
+from npoapi.services.organization_stats_service import OrganizationStatsService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute OrganizationStats from projects and claims, for every "
+        "organization or the given ones. Repairs drift and fills in "
+        "organizations loaded without signals (loaddata, bulk inserts)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "organization_ids",
+            nargs="*",
+            type=int,
+            help="Only these organizations (default: all)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Organizations recomputed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        organization_ids = options["organization_ids"] or None
+        started = time.perf_counter()
+        count = OrganizationStatsService().refresh(
+            organization_ids, create=True, batch_size=options["batch_size"]
+        )
+        if organization_ids is None:
+            organization_ids = Organization.objects.values_list("pk", flat=True)
+        # Cached /organizations/ responses embed the stats with ?include=stats
+        bump_tags(
+            "organization-stats",
+            *[f"organization-stats:{pk}" for pk in organization_ids],
+        )
+        self.stdout.write(
+            f"Rebuilt stats for {count} organizations "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,399 @@
+# npoapi/management/commands/run_benchmarks.py
+
+import json
+import logging
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from io import StringIO
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+from npoapi.fastpath import serialize_values, values_plan
+from npoapi.github_fake import install_fake_github
+from npoapi.models import Organization, Project, Token
+from npoapi.serializers import (
+    OrganizationSerializer,
+    ProjectSerializer,
+    UserSerializer,
+)
+
+User = get_user_model()
+
+PASSWORD = "bench-password-1"
+
+# Each run gets its own in-memory cache, so benchmarks never read or evict
+# entries of a shared cache
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "npoapi-benchmarks",
+    }
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and time every viewset action and the "
+        "serializers in-process, with GitHub replaced by npoapi.github_fake. "
+        "Results can be saved as JSON and compared with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=1000, help="Users and projects to seed"
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=30, help="Timed runs per benchmark"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=3, help="Untimed runs before timing"
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="Run benchmarks whose name contains this (repeatable)",
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Time response cache hits instead of misses for GET actions",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--baseline", help="JSON results of an earlier run")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Fail when a median is this much slower than the baseline "
+            "(0.25 = 25%%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)["results"]
+
+        if options["verbosity"] < 2:
+            # Per-request info logs would drown the report and cost time
+            logging.getLogger("npoapi").setLevel(logging.WARNING)
+
+        setup_test_environment()
+        old_config = setup_databases(
+            verbosity=0, interactive=False, aliases=set(connections)
+        )
+        try:
+            with override_settings(
+                CACHES=BENCHMARK_CACHES,
+                ASYNC_PROJECT_PROVISIONING=False,
+                METRICS_MULTIPROC_DIR="",
+            ), install_fake_github() as github:
+                call_command("create_groups", stdout=StringIO())
+                fixtures = self.seed(options["size"])
+                results = self.run(self.benchmarks(fixtures, options), options)
+                github_requests = github.requests
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "date": datetime.now(timezone.utc).isoformat(),
+                "size": options["size"],
+                "iterations": options["iterations"],
+                "cached": options["cached"],
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "fake_github_requests": github_requests,
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        regressions = self.print_report(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} benchmark(s) regressed by more than "
+                f"{options['threshold']:.0%}: {', '.join(regressions)}"
+            )
+
+    # --------------------------------
+    # Data
+    # --------------------------------
+    def seed(self, size):
+        organization_group = Group.objects.get(name="Organization User")
+        password = make_password(PASSWORD)  # Hashed once, not once per user
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-{i}",
+                    email=f"bench-{i}@example.org",
+                    first_name="Bench",
+                    last_name=str(i),
+                    password=password,
+                )
+                for i in range(size)
+            ]
+        )
+        owners = users[: max(size // 10, 1)]
+        User.groups.through.objects.bulk_create(
+            [
+                User.groups.through(user_id=user.pk, group_id=organization_group.pk)
+                for user in owners
+            ]
+        )
+        organizations = Organization.objects.bulk_create(
+            [
+                Organization(
+                    name=f"Bench Organization {i}",
+                    website=f"https://bench-{i}.example.org",
+                    address=f"{i} Main St",
+                    city="Nashville",
+                    state="TN",
+                    user=user,
+                )
+                for i, user in enumerate(owners)
+            ]
+        )
+        projects = Project.objects.bulk_create(
+            [
+                Project(
+                    organization=organizations[i % len(organizations)],
+                    name=f"bench-project-{i}",
+                    description=f"Benchmark project {i} for a nonprofit website",
+                    repository_url=f"https://github.com/nss-npo/bench-project-{i}",
+                )
+                for i in range(size)
+            ]
+        )
+
+        admin = User.objects.create_superuser(
+            "bench-admin", "admin@example.org", PASSWORD
+        )
+        return {
+            "admin": self.client_for(admin),
+            "owner": self.client_for(owners[0]),
+            "anonymous": APIClient(),
+            "users": users,
+            "organizations": organizations,
+            "projects": projects,
+        }
+
+    def client_for(self, user):
+        # Token auth, so authentication is part of what gets measured
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.issue(user).key}")
+        return client
+
+    # --------------------------------
+    # Benchmarks
+    # --------------------------------
+    def benchmarks(self, fixtures, options):
+        """name -> (callable(i), expected status or None for non-HTTP work)"""
+        admin, owner = fixtures["admin"], fixtures["owner"]
+        users, organizations = fixtures["users"], fixtures["organizations"]
+        projects = fixtures["projects"]
+        cached = options["cached"]
+
+        def bust(i):
+            # A query param the views ignore, so each GET misses the response cache
+            return "" if cached else f"&_bench={i}"
+
+        def pick(rows, i):
+            return rows[i % len(rows)].pk
+
+        page = 100
+        page_users = list(User.objects.prefetch_related("groups").order_by("id")[:page])
+        page_projects = list(Project.objects.order_by("id")[:page])
+        page_organizations = list(Organization.objects.order_by("id")[:page])
+
+        return {
+            "users.list": (
+                lambda i: admin.get(f"/users/?page_size={page}{bust(i)}"),
+                200,
+            ),
+            "users.retrieve": (
+                lambda i: admin.get(f"/users/{pick(users, i)}/?{bust(i)}"),
+                200,
+            ),
+            "users.create": (
+                lambda i: fixtures["anonymous"].post(
+                    "/users/",
+                    {
+                        "username": f"bench-new-{i}",
+                        "email": f"bench-new-{i}@example.org",
+                        "password": PASSWORD,
+                    },
+                    format="json",
+                ),
+                201,
+            ),
+            "users.login": (
+                lambda i: APIClient().post(
+                    "/users/login/",
+                    {"username": f"bench-{i % len(users)}", "password": PASSWORD},
+                    format="json",
+                ),
+                200,
+            ),
+            "organizations.list": (
+                lambda i: admin.get(f"/organizations/?page_size={page}{bust(i)}"),
+                200,
+            ),
+            "organizations.retrieve": (
+                lambda i: admin.get(
+                    f"/organizations/{pick(organizations, i)}/?{bust(i)}"
+                ),
+                200,
+            ),
+            "organizations.create": (
+                lambda i: admin.post(
+                    "/organizations/",
+                    {
+                        "name": f"Bench New Organization {i}",
+                        "website": "https://new.example.org",
+                        "address": "1 Main St",
+                        "city": "Nashville",
+                        "state": "TN",
+                    },
+                    format="json",
+                ),
+                201,
+            ),
+            "projects.list": (
+                lambda i: admin.get(f"/projects/?page_size={page}{bust(i)}"),
+                200,
+            ),
+            "projects.retrieve": (
+                lambda i: admin.get(f"/projects/{pick(projects, i)}/?{bust(i)}"),
+                200,
+            ),
+            "projects.create": (
+                lambda i: admin.post(
+                    "/projects/",
+                    {
+                        "organization": organizations[0].pk,
+                        "name": f"bench-new-project-{i}",
+                        "description": "Created by run_benchmarks",
+                    },
+                    format="json",
+                ),
+                201,
+            ),
+            "projects.user-projects": (
+                lambda i: owner.get(f"/projects/user-projects/?{bust(i)}"),
+                200,
+            ),
+            "projects.search": (
+                lambda i: admin.get(f"/projects/search/?q=nonprofit{bust(i)}"),
+                200,
+            ),
+            "serializers.users": (
+                lambda i: UserSerializer(page_users, many=True).data,
+                None,
+            ),
+            "serializers.organizations": (
+                lambda i: OrganizationSerializer(page_organizations, many=True).data,
+                None,
+            ),
+            "serializers.projects": (
+                lambda i: ProjectSerializer(page_projects, many=True).data,
+                None,
+            ),
+            "serializers.projects.values": (
+                lambda i: serialize_values(
+                    ProjectSerializer,
+                    Project.objects.order_by("id").values(
+                        "id", *values_plan(ProjectSerializer)[0]
+                    )[:page],
+                ),
+                None,
+            ),
+        }
+
+    def run(self, benchmarks, options):
+        results = {}
+        only = options["only"]
+        counter = iter(range(10**9))  # Unique names across warmup and timed runs
+        for name, (call, expected) in benchmarks.items():
+            if only and not any(part in name for part in only):
+                continue
+            for _ in range(options["warmup"]):
+                self.call(name, call, next(counter), expected)
+
+            durations, query_counts = [], []
+            for _ in range(options["iterations"]):
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    started = time.perf_counter()
+                    self.call(name, call, next(counter), expected)
+                    durations.append(time.perf_counter() - started)
+                query_counts.append(queries.count)
+
+            durations.sort()
+            results[name] = {
+                "median_ms": round(statistics.median(durations) * 1000, 3),
+                "p95_ms": round(durations[int(0.95 * (len(durations) - 1))] * 1000, 3),
+                "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+                "min_ms": round(durations[0] * 1000, 3),
+                "queries": statistics.median_low(query_counts),
+            }
+            self.stderr.write(f"  {name}: {results[name]['median_ms']} ms")
+        return results
+
+    def call(self, name, call, i, expected):
+        response = call(i)
+        if expected is not None and response.status_code != expected:
+            raise CommandError(
+                f"{name}: expected {expected}, got {response.status_code}: "
+                f"{getattr(response, 'data', response.content)!r}"
+            )
+
+    def print_report(self, results, baseline, threshold):
+        regressions = []
+        self.stdout.write(
+            f"{'benchmark':<28} {'median':>10} {'p95':>10} {'queries':>8}"
+            + ("  vs baseline" if baseline else "")
+        )
+        for name, result in results.items():
+            line = (
+                f"{name:<28} {result['median_ms']:>8.2f}ms {result['p95_ms']:>8.2f}ms "
+                f"{result['queries']:>8}"
+            )
+            previous = (baseline or {}).get(name)
+            if previous:
+                change = result["median_ms"] / previous["median_ms"] - 1
+                line += f"  {change:+7.1%}"
+                if change > threshold:
+                    regressions.append(name)
+                    line += "  REGRESSION"
+            self.stdout.write(line)
+        return regressions
@@ -0,0 +1,74 @@
+# npoapi/management/commands/run_provisioner.py
+
+import os
+import socket
+import threading
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+from npoapi.services.github_rate_limiter import BACKGROUND
+from npoapi.services.provisioning_service import ProvisioningService
+
+
+class Command(BaseCommand):
+    help = "Work the project provisioning queue, creating GitHub repositories"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Number of worker threads"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no more jobs are due instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.poll_interval = options["poll_interval"]
+        self.once = options["once"]
+
+        workers = [
+            threading.Thread(
+                target=self.work,
+                args=(f"{socket.gethostname()}:{os.getpid()}:{i}",),
+                daemon=True,
+            )
+            for i in range(options["workers"])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Provisioner running with {len(workers)} worker(s)")
+
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after in-flight jobs finish...")
+            self.stop.set()
+            for worker in workers:
+                worker.join()
+
+    def work(self, worker_id):
+        service = ProvisioningService(priority=BACKGROUND)
+        while not self.stop.is_set():
+            close_old_connections()
+            try:
+                processed = service.run_next(worker_id)
+            except OperationalError as e:
+                # SQLite reports "database is locked" when workers collide
+                self.stderr.write(f"{worker_id}: {e}")
+                processed = False
+
+            if processed:
+                continue
+            if self.once:
+                break
+            self.stop.wait(self.poll_interval)
+        close_old_connections()
@@ -0,0 +1,133 @@
+# npoapi/management/commands/stress_claims.py
+
+import threading
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from npoapi.models import Developer, DeveloperProject, Organization, Project
+from npoapi.services.claim_service import ClaimError, ClaimService
+
+User = get_user_model()
+
+PREFIX = "stress-claims"
+
+
+class Command(BaseCommand):
+    help = (
+        "Race many developers for a few projects through ClaimService and check "
+        "that no project ends up with more claims than max_claimers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--developers", type=int, default=50, help="Competing developers"
+        )
+        parser.add_argument(
+            "--projects", type=int, default=3, help="Projects being claimed"
+        )
+        parser.add_argument(
+            "--max-claimers", type=int, default=2, help="Spots per project"
+        )
+        parser.add_argument(
+            "--threads", type=int, default=16, help="Concurrent worker threads"
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Leave the test rows in place"
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(
+                f"Rows from an earlier run exist (usernames {PREFIX}-*); delete them first"
+            )
+        developers, projects = self.create_fixtures(options)
+
+        # Every developer tries every project, interleaved so threads collide
+        attempts = [
+            (developer, project.pk) for project in projects for developer in developers
+        ]
+        attempts_lock = threading.Lock()
+        outcomes = {"claimed": 0, "rejected": 0, "errors": 0}
+        outcomes_lock = threading.Lock()
+        services = []
+        start = threading.Barrier(options["threads"])
+
+        def work():
+            service = ClaimService()
+            services.append(service)
+            start.wait()  # Release every thread at once
+            while True:
+                with attempts_lock:
+                    if not attempts:
+                        break
+                    developer, project_id = attempts.pop()
+                try:
+                    service.claim(project_id, developer)
+                    outcome = "claimed"
+                except ClaimError:
+                    outcome = "rejected"
+                except Exception as e:
+                    self.stderr.write(f"{type(e).__name__}: {e}")
+                    outcome = "errors"
+                with outcomes_lock:
+                    outcomes[outcome] += 1
+            close_old_connections()
+
+        threads = [threading.Thread(target=work) for _ in range(options["threads"])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        total = sum(outcomes.values())
+        self.stdout.write(
+            f"{total} claim attempts in {elapsed:.2f}s ({total / elapsed:.0f} attempts/s, "
+            f"{outcomes['claimed'] / elapsed:.0f} claims/s): "
+            f"{outcomes['claimed']} claimed, {outcomes['rejected']} rejected, "
+            f"{outcomes['errors']} errors, "
+            f"{sum(service.retries for service in services)} busy retries"
+        )
+
+        oversold = self.verify(projects)
+        if not options["keep"]:
+            User.objects.filter(username__startswith=PREFIX).delete()
+            Organization.objects.filter(name=PREFIX).delete()
+        if oversold or outcomes["errors"]:
+            raise CommandError("Claims are not consistent, see above")
+        self.stdout.write(self.style.SUCCESS("No project was oversold"))
+
+    def create_fixtures(self, options):
+        organization = Organization.objects.create(
+            name=PREFIX, website="https://example.org", address="-", city="-", state="-"
+        )
+        projects = [
+            Project.objects.create(
+                organization=organization,
+                name=f"{PREFIX}-{organization.pk}-{i}",
+                description="Claim stress test",
+                max_claimers=options["max_claimers"],
+            )
+            for i in range(options["projects"])
+        ]
+        users = User.objects.bulk_create(
+            [User(username=f"{PREFIX}-{i}") for i in range(options["developers"])]
+        )
+        developers = Developer.objects.bulk_create(
+            [Developer(user=user) for user in users]
+        )
+        return developers, projects
+
+    def verify(self, projects):
+        oversold = False
+        for project in Project.objects.filter(pk__in=[p.pk for p in projects]):
+            claims = DeveloperProject.objects.filter(project=project).count()
+            ok = claims == project.claim_count and claims <= project.max_claimers
+            oversold |= not ok
+            self.stdout.write(
+                f"  {project.name}: {claims} claims, claim_count {project.claim_count}, "
+                f"max {project.max_claimers} {'ok' if ok else 'INCONSISTENT'}"
+            )
+        return oversold
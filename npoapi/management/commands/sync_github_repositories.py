@@ -0,0 +1,71 @@
+# npoapi/management/commands/sync_github_repositories.py
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from npoapi.services.repository_mirror_service import (
+    MirrorSyncError,
+    RepositoryMirrorService,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the local mirror of nss-npo repositories (conditional requests, "
+        "so unchanged pages are free) and fix projects whose repository was "
+        "renamed, transferred or deleted on GitHub."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Refetch every page instead of sending the stored ETags",
+        )
+        parser.add_argument(
+            "--no-reconcile",
+            action="store_true",
+            help="Only refresh the mirror, leave projects alone",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the project fixes without saving them",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running, syncing every this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.run(options)
+            except MirrorSyncError as e:
+                if options["interval"] is None:
+                    raise CommandError(str(e))
+                self.stderr.write(f"Sync failed: {e}")
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
+
+    def run(self, options):
+        service = RepositoryMirrorService()
+        stats = service.sync(full=options["full"])
+        self.stdout.write(
+            f"Mirror: {stats['repositories']} repositories, {stats['pages']} pages "
+            f"({stats['not_modified']} not modified), {stats['updated']} updated, "
+            f"{stats['deleted']} deleted"
+        )
+        if options["no_reconcile"]:
+            return
+        changes, changed = service.reconcile(dry_run=options["dry_run"])
+        if options["dry_run"]:
+            for project in changed:
+                repository = project.repository_url or "no repository"
+                self.stdout.write(f"  project {project.pk}: {repository}")
+        self.stdout.write(
+            f"Projects: {changes['linked']} linked, {changes['moved']} moved, "
+            f"{changes['missing']} missing their repository"
+            + (" (dry run, nothing saved)" if options["dry_run"] else "")
+        )
@@ -0,0 +1,381 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+# In-process metrics, rendered in the Prometheus text format by /metrics
+# (npoapi/views/metrics_view.py).
+#
+# Each gunicorn worker keeps its own registry. With METRICS_MULTIPROC_DIR set,
+# workers write a JSON snapshot to <dir>/<pid>.json at most every
+# METRICS_FLUSH_INTERVAL seconds and at exit, and /metrics adds up every file,
+# so a scrape sees the whole server whichever worker answers it. Files of
+# workers that have exited are kept so counters never go backwards; empty the
+# directory when the server (not a single worker) restarts.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_registry = []
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(key), _copy(value)] for key, value in self._values.items()]
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": samples,
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [count per bucket (non-cumulative), +Inf count, sum]
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        return dict(super().snapshot(), buckets=list(self.buckets))
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. In multi-process mode the workers' values
+    are added up, or with multiprocess="self" only the scraped worker's value
+    is reported (for state every worker sees the same way, e.g. read from the
+    shared cache by a collector).
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), multiprocess="sum"):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess = multiprocess
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def snapshot(self):
+        return dict(super().snapshot(), multiprocess=self.multiprocess)
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+# --------------------------------
+# Metrics recorded by this app
+# --------------------------------
+HTTP_REQUESTS = Counter(
+    "npoapi_http_requests_total",
+    "HTTP responses by view, method and status code.",
+    ["view", "method", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "npoapi_http_request_duration_seconds",
+    "Time to produce a response, by view and method.",
+    ["view", "method"],
+)
+HTTP_RESPONSE_BYTES = Histogram(
+    "npoapi_http_response_size_bytes",
+    "Response body sizes by view (streamed responses are not measured).",
+    ["view"],
+    buckets=SIZE_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "npoapi_db_queries_per_request",
+    "Database queries run while handling one request, by view.",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "npoapi_db_query_duration_seconds_per_request",
+    "Time spent in database queries while handling one request, by view.",
+    ["view"],
+)
+GITHUB_REQUESTS = Counter(
+    "npoapi_github_requests_total",
+    "Outbound GitHub API calls by endpoint and status code (error: no response).",
+    ["endpoint", "status"],
+)
+GITHUB_REQUEST_SECONDS = Histogram(
+    "npoapi_github_request_duration_seconds",
+    "Outbound GitHub API call latency by endpoint, one sample per attempt.",
+    ["endpoint"],
+)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    "npoapi_github_rate_limit_remaining",
+    "Installation API calls GitHub reported left until the reset (-1: unknown).",
+    multiprocess="self",
+)
+GITHUB_RATE_LIMIT_LIMIT = Gauge(
+    "npoapi_github_rate_limit_limit",
+    "Installation API calls GitHub allows per window (-1: unknown).",
+    multiprocess="self",
+)
+GITHUB_RATE_LIMIT_BLOCKED_SECONDS = Gauge(
+    "npoapi_github_rate_limit_blocked_seconds",
+    "Seconds until calls may resume after a secondary rate limit (0: not blocked).",
+    multiprocess="self",
+)
+GITHUB_SCHEDULER_QUEUE_DEPTH = Gauge(
+    "npoapi_github_scheduler_queue_depth",
+    "GitHub calls waiting for rate-limit budget, by priority.",
+    ["priority"],
+)
+GITHUB_SCHEDULER_WAIT_SECONDS = Histogram(
+    "npoapi_github_scheduler_wait_seconds",
+    "Time GitHub calls waited for rate-limit budget, by priority.",
+    ["priority"],
+)
+GITHUB_SCHEDULER_REJECTED = Counter(
+    "npoapi_github_scheduler_rejected_total",
+    "GitHub calls given up on after waiting too long for budget, by priority.",
+    ["priority"],
+)
+GITHUB_WEBHOOKS = Counter(
+    "npoapi_github_webhooks_total",
+    "GitHub webhook deliveries received, by event and outcome.",
+    ["event", "outcome"],
+)
+
+# Called on each scrape, to refresh values read from elsewhere
+_collectors = []
+
+
+def register_collector(collector):
+    _collectors.append(collector)
+
+
+def snapshot():
+    return {metric.name: metric.snapshot() for metric in _registry}
+
+
+# --------------------------------
+# Multi-process aggregation
+# --------------------------------
+_flushed_at = 0.0
+_flush_lock = threading.Lock()
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f"{pid}.json")
+
+
+def flush(force=False):
+    """Write this process's snapshot for the other workers' /metrics"""
+    global _flushed_at
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _flushed_at < settings.METRICS_FLUSH_INTERVAL:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return  # Another thread is writing it right now
+    try:
+        _flushed_at = now
+        path = _snapshot_path(directory, os.getpid())
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(snapshot(), f)
+        os.replace(f"{path}.tmp", path)  # Readers never see a partial file
+    finally:
+        _flush_lock.release()
+
+
+atexit.register(flush, force=True)
+
+
+def collect():
+    """This process's metrics plus, in multi-process mode, every other worker's"""
+    for collector in _collectors:
+        collector()
+    own = snapshot()
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return own
+    others = []
+    own_file = f"{os.getpid()}.json"
+    for name in os.listdir(directory):
+        if not name.endswith(".json") or name == own_file:
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                others.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Written by a newer worker as we read; the next scrape has it
+    return merge([own, *others])
+
+
+def merge(snapshots):
+    """Add up snapshots; the first is the scraped worker's own"""
+    merged = {}
+    for index, metrics in enumerate(snapshots):
+        for name, metric in metrics.items():
+            target = merged.setdefault(name, dict(metric, samples={}))
+            if index and metric.get("multiprocess") == "self":
+                continue
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = _copy(value)
+                elif isinstance(value, list):
+                    target["samples"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["samples"][key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(k), v] for k, v in metric["samples"].items()]
+    return merged
+
+
+# --------------------------------
+# Prometheus text format
+# --------------------------------
+def render(metrics):
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for labels, value in sorted(metric["samples"]):
+            pairs = list(zip(labelnames, labels))
+            if metric["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip(metric["buckets"], value):
+                    cumulative += count
+                    le = [("le", _number(bound))]
+                    lines.append(f"{name}_bucket{_labels(pairs + le)} {cumulative}")
+                total = cumulative + value[len(metric["buckets"])]
+                inf = [("le", "+Inf")]
+                lines.append(f"{name}_bucket{_labels(pairs + inf)} {total}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(pairs)} {total}")
+            else:
+                lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    inner = ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+    return "{" + inner + "}"
+
+
+def _escape_label(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _escape_help(text):
+    return text.replace("\\", r"\\").replace("\n", r"\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --------------------------------
+# Request middleware
+# --------------------------------
+class _QueryTimer:
+    """connection.execute_wrapper() hook counting and timing queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, response size and database work per view. Views
+    are labelled by URL name (e.g. "project-detail"), never by raw path, so the
+    number of series stays bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name or match.route) if match else "unmatched"
+        HTTP_REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        HTTP_REQUEST_SECONDS.observe(elapsed, view=view, method=request.method)
+        if not response.streaming:
+            HTTP_RESPONSE_BYTES.observe(len(response.content), view=view)
+        DB_QUERIES.observe(timer.count, view=view)
+        DB_QUERY_SECONDS.observe(timer.seconds, view=view)
+        flush()
+        return response
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:10
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def dedupe_before_constraints(apps, schema_editor):
+    """Existing duplicates would make the new unique constraints fail to apply."""
+    Project = apps.get_model("npoapi", "Project")
+    DeveloperProject = apps.get_model("npoapi", "DeveloperProject")
+
+    # Project names are also their GitHub repository names, so duplicates are
+    # reported for someone to rename or merge rather than renamed here
+    names = {}
+    for pk, name in Project.objects.order_by("id").values_list("id", "name"):
+        names.setdefault(name.lower(), []).append((pk, name))
+    duplicates = [projects for projects in names.values() if len(projects) > 1]
+    if duplicates:
+        listed = "\n".join(
+            "  " + ", ".join(f"{name!r} (id {pk})" for pk, name in projects)
+            for projects in duplicates
+        )
+        raise RuntimeError(
+            "Project names must be unique regardless of case. Rename or merge "
+            "these projects (and their GitHub repositories), then run migrate "
+            f"again:\n{listed}"
+        )
+
+    seen = set()
+    for claim in DeveloperProject.objects.order_by("date_claimed", "id"):
+        key = (claim.developer_id, claim.project_id)
+        if key in seen:
+            claim.delete()
+        seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0005_timestamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_before_constraints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='developerproject',
+            index=models.Index(fields=['developer', '-date_claimed'], name='claim_developer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='developerproject',
+            index=models.Index(fields=['project', '-date_claimed'], name='claim_project_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['user', 'id'], name='organization_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['name', 'id'], name='organization_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['updated_at'], name='organization_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['organization', 'id'], name='project_org_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['name', 'id'], name='project_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['updated_at'], name='project_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='developerproject',
+            constraint=models.UniqueConstraint(fields=('developer', 'project'), name='unique_developer_project'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='project_name_ci_unique'),
+        ),
+    ]
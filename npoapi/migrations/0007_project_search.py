@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# Full-text index for /projects/search/ (npoapi/search.py). SQLite only; the
+# rowid is the project id. The rows and the triggers that keep them in sync are
+# added by the post_migrate handler in npoapi/signals.py instead of here, since
+# SQLite table rebuilds in later migrations would break on the triggers.
+# Postgres builds its tsvector at query time and needs nothing here.
+FTS_TABLE = "npoapi_project_fts"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description, organization_name,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS npoapi_organization_fts_update",
+    "DROP TRIGGER IF EXISTS npoapi_project_fts_delete",
+    "DROP TRIGGER IF EXISTS npoapi_project_fts_update",
+    "DROP TRIGGER IF EXISTS npoapi_project_fts_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts5_available(connection):
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.npoapi_fts5_probe USING fts5(x)")
+        except Exception:
+            return False
+        cursor.execute("DROP TABLE temp.npoapi_fts5_probe")
+    return True
+
+
+def create_fts(apps, schema_editor):
+    connection = schema_editor.connection
+    # Without FTS5 the search endpoint falls back to substring matching
+    if connection.vendor != "sqlite" or not fts5_available(connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("npoapi", "0006_indexes_and_constraints"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
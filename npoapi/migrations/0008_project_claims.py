@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_claims(apps, schema_editor):
+    """Start claim_count from the claims already recorded, and make room for them"""
+    Project = apps.get_model("npoapi", "Project")
+    claimed = Project.objects.annotate(claims=Count("developerproject")).filter(
+        claims__gt=0
+    )
+    for project in claimed:
+        project.claim_count = project.claims
+        project.max_claimers = max(project.max_claimers, project.claims)
+        project.save(update_fields=["claim_count", "max_claimers"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0007_project_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='claim_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='max_claimers',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(count_existing_claims, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:43
+
+from django.db import migrations, models
+import django.db.models.functions.text
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0009_token_proxy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubRepository',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('github_id', models.BigIntegerField(unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('full_name', models.CharField(max_length=200)),
+                ('html_url', models.URLField()),
+                ('description', models.TextField(blank=True, null=True)),
+                ('private', models.BooleanField(default=False)),
+                ('archived', models.BooleanField(default=False)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GitHubRepositoryPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.PositiveIntegerField(unique=True)),
+                ('etag', models.CharField(blank=True, default='', max_length=200)),
+                ('repository_ids', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='github_repository_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='githubrepository',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='github_repository_name_ci'),
+        ),
+    ]
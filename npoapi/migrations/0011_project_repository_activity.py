@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0010_github_repository_mirror'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='repository_open_issues',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='repository_pushed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='repository_stars',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivery_id', models.CharField(max_length=64, unique=True)),
+                ('event', models.CharField(max_length=50)),
+                ('action', models.CharField(blank=True, default='', max_length=50)),
+                ('repository_id', models.BigIntegerField(blank=True, null=True)),
+                ('payload', models.JSONField()),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='webhook_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def compute_existing_stats(apps, schema_editor):
+    """One stats row per organization, from the projects and claims so far"""
+    Organization = apps.get_model("npoapi", "Organization")
+    OrganizationStats = apps.get_model("npoapi", "OrganizationStats")
+    Project = apps.get_model("npoapi", "Project")
+    DeveloperProject = apps.get_model("npoapi", "DeveloperProject")
+    projects = dict(
+        Project.objects.values("organization_id")
+        .annotate(count=Count("id"))
+        .values_list("organization_id", "count")
+    )
+    claims = {
+        row["project__organization_id"]: row
+        for row in DeveloperProject.objects.values("project__organization_id").annotate(
+            claimed=Count("project", distinct=True),
+            developers=Count("developer", distinct=True),
+            latest=Max("date_claimed"),
+        )
+    }
+    OrganizationStats.objects.bulk_create(
+        [
+            OrganizationStats(
+                organization_id=pk,
+                project_count=projects.get(pk, 0),
+                claimed_project_count=claims.get(pk, {}).get("claimed", 0),
+                active_developer_count=claims.get(pk, {}).get("developers", 0),
+                latest_claim_date=claims.get(pk, {}).get("latest"),
+            )
+            for pk in Organization.objects.values_list("pk", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0011_project_repository_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationStats',
+            fields=[
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='npoapi.organization')),
+                ('project_count', models.PositiveIntegerField(default=0)),
+                ('claimed_project_count', models.PositiveIntegerField(default=0)),
+                ('active_developer_count', models.PositiveIntegerField(default=0)),
+                ('latest_claim_date', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'organization stats',
+            },
+        ),
+        migrations.RunPython(compute_existing_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0012_organization_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provisioningjob',
+            name='repository_url',
+            field=models.URLField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('npoapi', '0013_provisioningjob_repository_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='repository_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
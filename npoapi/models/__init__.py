@@ -3,3 +3,8 @@ from .organization import Organization
 from .project import Project
 from .developer_project import DeveloperProject
 from .organization import Organization
+from .provisioning_job import ProvisioningJob
+from .token import Token
+from .github_repository import GitHubRepository, GitHubRepositoryPage
+from .webhook_event import WebhookEvent
+from .organization_stats import OrganizationStats
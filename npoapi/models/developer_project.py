@@ -6,6 +6,25 @@ class DeveloperProject(models.Model):
     developer = models.ForeignKey(Developer, on_delete=models.CASCADE)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     date_claimed = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Drives ETag/Last-Modified
+
+    class Meta:
+        indexes = [
+            # Claims by developer and by project, newest first
+            models.Index(
+                fields=["developer", "-date_claimed"], name="claim_developer_date_idx"
+            ),
+            models.Index(
+                fields=["project", "-date_claimed"], name="claim_project_date_idx"
+            ),
+        ]
+        constraints = [
+            # A developer claims a project at most once
+            models.UniqueConstraint(
+                fields=["developer", "project"], name="unique_developer_project"
+            ),
+        ]
 
     def __str__(self):
         return f'{self.developer} - {self.project}'
\ No newline at end of file
@@ -0,0 +1,97 @@
+from django.db import models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+class GitHubRepository(models.Model):
+    """
+    Local copy of an nss-npo repository, refreshed by
+    `manage.py sync_github_repositories` and whenever this app creates or looks
+    up a repository, so name checks don't need a GitHub call.
+    """
+
+    github_id = models.BigIntegerField(unique=True)
+    name = models.CharField(max_length=100)
+    full_name = models.CharField(max_length=200)
+    html_url = models.URLField()
+    description = models.TextField(null=True, blank=True)
+    private = models.BooleanField(default=False)
+    archived = models.BooleanField(default=False)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(default=timezone.now)  # Last seen on GitHub
+
+    class Meta:
+        constraints = [
+            # GitHub repository names are unique regardless of case
+            models.UniqueConstraint(Lower("name"), name="github_repository_name_ci"),
+        ]
+
+    def __str__(self):
+        return self.full_name
+
+    @classmethod
+    def named(cls, name):
+        return cls.objects.annotate(lower_name=Lower("name")).filter(
+            lower_name=name.lower()
+        )
+
+    @classmethod
+    def upsert(cls, repositories):
+        """Insert or update rows from GitHub's repository JSON objects"""
+        now = timezone.now()
+        rows = {
+            repository["id"]: cls(
+                github_id=repository["id"],
+                name=repository["name"],
+                full_name=repository.get("full_name") or repository["name"],
+                html_url=repository["html_url"],
+                description=repository.get("description"),
+                private=bool(repository.get("private")),
+                archived=bool(repository.get("archived")),
+                pushed_at=parse_datetime(repository.get("pushed_at") or ""),
+                synced_at=now,
+            )
+            for repository in repositories
+        }
+        if not rows:
+            return 0
+        with transaction.atomic():
+            # A repository renamed to a name another one had before: the old
+            # holder was renamed or deleted too, and will be seen again if not
+            cls.objects.annotate(lower_name=Lower("name")).filter(
+                lower_name__in=[row.name.lower() for row in rows.values()]
+            ).exclude(github_id__in=rows).delete()
+            cls.objects.bulk_create(
+                rows.values(),
+                update_conflicts=True,
+                unique_fields=["github_id"],
+                update_fields=[
+                    "name",
+                    "full_name",
+                    "html_url",
+                    "description",
+                    "private",
+                    "archived",
+                    "pushed_at",
+                    "synced_at",
+                ],
+            )
+        return len(rows)
+
+
+class GitHubRepositoryPage(models.Model):
+    """
+    One page of the organization's repository listing as last fetched: its
+    ETag, sent back as If-None-Match so an unchanged page answers 304 (free
+    of rate limit), and the ids it listed, so a 304 still says which
+    repositories exist.
+    """
+
+    page = models.PositiveIntegerField(unique=True)
+    etag = models.CharField(max_length=200, blank=True, default="")
+    repository_ids = models.JSONField(default=list)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Repository page {self.page}"
@@ -18,12 +18,22 @@ class Organization(models.Model):
         null=True,
         blank=True,
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Drives ETag/Last-Modified
 
     class Meta:
         permissions = [
             ("can_manage_organization", "Can manage organization details"),
             ("can_manage_users", "Can manage users"),
         ]
+        indexes = [
+            # Organizations by user (organizations/user, user-projects)
+            models.Index(fields=["user", "id"], name="organization_user_id_idx"),
+            # Keyset pagination with ?ordering=name
+            models.Index(fields=["name", "id"], name="organization_name_id_idx"),
+            # max(updated_at) for ETag/Last-Modified
+            models.Index(fields=["updated_at"], name="organization_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+from .organization import Organization
+
+
+class OrganizationStats(models.Model):
+    """
+    Dashboard numbers for an organization, kept up to date by
+    services/organization_stats_service.py in the same transaction as the
+    project and claim writes, so reading them is a primary key lookup.
+    `manage.py rebuild_org_stats` recomputes them from scratch.
+    """
+
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    project_count = models.PositiveIntegerField(default=0)
+    # Projects with at least one DeveloperProject claim
+    claimed_project_count = models.PositiveIntegerField(default=0)
+    # Developers with at least one claim on the organization's projects
+    active_developer_count = models.PositiveIntegerField(default=0)
+    latest_claim_date = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)  # Drives ETag/Last-Modified
+
+    class Meta:
+        verbose_name_plural = "organization stats"
+
+    def __str__(self):
+        return f"Stats for organization {self.organization_id}"
+
+    @property
+    def unclaimed_project_count(self):
+        return self.project_count - self.claimed_project_count
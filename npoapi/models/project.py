@@ -1,15 +1,62 @@
 from django.db import models
+from django.db.models.functions import Lower
 from .organization import Organization
 from django.contrib.auth.models import Group
 
 
 class Project(models.Model):
+    PROVISIONING_READY = "ready"
+    PROVISIONING_PENDING = "pending"
+    PROVISIONING_FAILED = "failed"
+    PROVISIONING_STATUS_CHOICES = [
+        (PROVISIONING_READY, "Ready"),
+        (PROVISIONING_PENDING, "Pending"),
+        (PROVISIONING_FAILED, "Failed"),
+    ]
+
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
     name = models.CharField(
         max_length=255, default="Unnamed Project"
     )  # Add default here
     repository_url = models.URLField(null=True, blank=True)  # Allow it to be null/blank
+    # GitHub's id of the repository, which survives renames; linked by
+    # `manage.py sync_github_repositories`
+    github_repository_id = models.BigIntegerField(null=True, blank=True, db_index=True)
     description = models.TextField()
+    # Repository activity, from GitHub webhooks (services/webhook_service.py)
+    repository_pushed_at = models.DateTimeField(null=True, blank=True)
+    repository_open_issues = models.PositiveIntegerField(null=True, blank=True)
+    repository_stars = models.PositiveIntegerField(null=True, blank=True)
+    # GitHub's updated_at of the newest repository snapshot applied, so a late
+    # redelivery of an older one doesn't roll the counts back
+    repository_updated_at = models.DateTimeField(null=True, blank=True)
+    # Tracks the GitHub repository while it is created in the background
+    provisioning_status = models.CharField(
+        max_length=20,
+        choices=PROVISIONING_STATUS_CHOICES,
+        default=PROVISIONING_READY,
+    )
+    # Developers that can claim the project at once; claim_count is kept in step
+    # with DeveloperProject rows by services/claim_service.py
+    max_claimers = models.PositiveIntegerField(default=1)
+    claim_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Drives ETag/Last-Modified
+
+    class Meta:
+        indexes = [
+            # Projects by organization in id order (user-projects, keyset pages)
+            models.Index(fields=["organization", "id"], name="project_org_id_idx"),
+            # Keyset pagination with ?ordering=name
+            models.Index(fields=["name", "id"], name="project_name_id_idx"),
+            # max(updated_at) for ETag/Last-Modified
+            models.Index(fields=["updated_at"], name="project_updated_idx"),
+        ]
+        constraints = [
+            # The name is used as the nss-npo repository name, which GitHub
+            # treats case-insensitively
+            models.UniqueConstraint(Lower("name"), name="project_name_ci_unique"),
+        ]
 
     def __str__(self):
         return self.description
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+from .project import Project
+
+
+class ProvisioningJob(models.Model):
+    """A queued request to create the GitHub repository for a project."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    project = models.OneToOneField(
+        Project, on_delete=models.CASCADE, related_name="provisioning_job"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)  # Backoff between retries
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    # Set as soon as GitHub creates the repository, so a retry of a job that
+    # failed afterwards reuses it instead of taking over a same-named repo
+    repository_url = models.URLField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"Provisioning {self.project_id}: {self.status}"
@@ -1,10 +1,60 @@
+from datetime import timedelta
 from django.conf import settings
-from django.db import models
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.authtoken.models import Token as DefaultToken
-from django.contrib.auth.models import Group
 
 
 class Token(DefaultToken):
+    """
+    DRF's auth token with an expiry and sliding rotation.
+
+    A token expires TOKEN_TTL after it was issued. Once it is older than
+    TOKEN_ROTATE_AFTER, the next authenticated request swaps it for a new key
+    (npoapi/authentication.py), so active clients never hit the expiry.
+    """
+
     # Do not redefine the 'user' field here as it already exists in the base class
     class Meta:
         proxy = True  # This is a proxy model for the default Token model
+
+    @property
+    def expires_at(self):
+        return self.created + timedelta(seconds=settings.TOKEN_TTL)
+
+    def is_expired(self, now=None):
+        return (now or timezone.now()) >= self.expires_at
+
+    def needs_rotation(self, now=None):
+        age = (now or timezone.now()) - self.created
+        return age >= timedelta(seconds=settings.TOKEN_ROTATE_AFTER)
+
+    @classmethod
+    def issue(cls, user):
+        """The user's live token, replacing it if it has expired"""
+        token, created = cls.objects.get_or_create(user=user)
+        if not created and token.is_expired():
+            token = token.rotate() or cls.objects.get(user=user)
+        return token
+
+    def rotate(self):
+        """
+        Replace this token with a new key and a fresh expiry. Returns the new
+        token, or None if a concurrent request already rotated or revoked it.
+        """
+        with transaction.atomic():
+            deleted, _ = Token.objects.filter(key=self.key).delete()
+            if not deleted:
+                return None
+            return Token.objects.create(user_id=self.user_id)
+
+    @classmethod
+    def revoke(cls, user):
+        """
+        Delete the user's token and forget its cached validations, including a
+        key it replaced that is still in its rotation grace period.
+        """
+        from npoapi.authentication import forget_user_tokens  # Imports this module
+
+        cls.objects.filter(user=user).delete()
+        forget_user_tokens(user.pk)
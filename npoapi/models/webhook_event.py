@@ -0,0 +1,29 @@
+from django.db import models
+from django.utils import timezone
+
+
+class WebhookEvent(models.Model):
+    """
+    A GitHub webhook delivery, stored as received by the webhook view and
+    applied later by `manage.py process_webhook_events`.
+    """
+
+    # X-GitHub-Delivery; GitHub redelivers with the same id, stored once
+    delivery_id = models.CharField(max_length=64, unique=True)
+    event = models.CharField(max_length=50)  # X-GitHub-Event
+    action = models.CharField(max_length=50, blank=True, default="")
+    repository_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Why the payload couldn't be applied; such events are marked processed
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # The consumer's queue scan, and purging processed events
+            models.Index(fields=["processed_at", "id"], name="webhook_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.delivery_id}"
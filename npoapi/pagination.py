@@ -0,0 +1,149 @@
+import base64
+import json
+from datetime import datetime
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor keyset pagination on (ordering field, id).
+
+    Each page is a single indexed range scan: the cursor carries the last row's
+    ordering value and id, so deep pages cost the same as the first one. No
+    COUNT(*) runs unless the client asks for it with ?include_total=true.
+
+    Views can set `keyset_ordering_fields` (allowed ?ordering= values, each
+    non-null) and `keyset_default_ordering`.
+    """
+
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    total_query_param = "include_total"
+    invalid_cursor_message = "Invalid cursor"
+
+    # Key to wrap results under (e.g. "projects"); None returns a bare list and
+    # puts the next link in a Link header, so existing list clients keep working.
+    envelope = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering, self.descending = self.get_ordering(request, view)
+        self.limit = self.get_page_size(request)
+        self.total = queryset.count() if self.wants_total(request) else None
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+
+        if self.ordering == "id":
+            order_by = ["-id" if self.descending else "id"]
+        else:
+            prefix = "-" if self.descending else ""
+            order_by = [f"{prefix}{self.ordering}", f"{prefix}id"]
+
+        # Fetch one extra row to learn whether there is a next page
+        rows = list(queryset.order_by(*order_by)[: self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[: self.limit]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_ordering(self, request, view):
+        fields = getattr(view, "keyset_ordering_fields", ["id"])
+        default = getattr(view, "keyset_default_ordering", "id")
+        ordering = request.query_params.get(self.ordering_query_param, default)
+        field = ordering.lstrip("-")
+        if field not in fields:
+            ordering, field = default, default.lstrip("-")
+        return field, ordering.startswith("-")
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def wants_total(self, request):
+        value = request.query_params.get(self.total_query_param, "")
+        return value.lower() in ("1", "true", "yes")
+
+    def after(self, cursor):
+        """Rows strictly after the cursor in (ordering, id) order"""
+        value, last_id = cursor
+        op = "lt" if self.descending else "gt"
+        if self.ordering == "id":
+            return Q(**{f"id__{op}": last_id})
+        return Q(**{f"{self.ordering}__{op}": value}) | Q(
+            **{self.ordering: value, f"id__{op}": last_id}
+        )
+
+    def _value(self, row, field):
+        return row[field] if isinstance(row, dict) else getattr(row, field)
+
+    def encode_cursor(self, row):
+        value = self._value(row, self.ordering)
+        if isinstance(value, datetime):
+            # DjangoJSONEncoder cuts datetimes to milliseconds, which would skip
+            # rows between the cursor and the real value
+            value = value.isoformat()
+        payload = {
+            "o": self.ordering,
+            "d": self.descending,
+            "v": value,
+            "i": self._value(row, "id"),
+        }
+        raw = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            payload = json.loads(raw)
+            if payload["o"] != self.ordering or payload["d"] != self.descending:
+                raise ValueError("cursor was issued for a different ordering")
+            value = model._meta.get_field(self.ordering).to_python(payload["v"])
+            return value, int(payload["i"])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        """The enveloped page, for views that add their own keys around it"""
+        page = {self.envelope: data, "next": self.get_next_link()}
+        if self.total is not None:
+            page["total"] = self.total
+        return page
+
+    def get_paginated_response(self, data):
+        if self.envelope:
+            return Response(self.get_paginated_data(data))
+
+        headers = {}
+        next_link = self.get_next_link()
+        if next_link:
+            headers["Link"] = f'<{next_link}>; rel="next"'
+        if self.total is not None:
+            headers["X-Total-Count"] = str(self.total)
+        return Response(data, headers=headers)
+
+
+class ProjectKeysetPagination(KeysetPagination):
+    envelope = "projects"
@@ -0,0 +1,259 @@
+import re
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from npoapi.models import Project
+
+# Search terms are reduced to plain words, so user input can never be parsed
+# as FTS5 / tsquery syntax. Every word must match, as a prefix, so results
+# update while the user is still typing.
+WORD = re.compile(r"\w+", re.UNICODE)
+
+# Highlight markers that can't appear in stored text; swapped for <mark> tags
+# after the text around them has been HTML-escaped.
+START, STOP = "\x02", "\x03"
+
+FTS_TABLE = "npoapi_project_fts"  # Created by migration 0007 on SQLite
+
+# Keep the FTS rows in step with every write, including bulk_create/bulk_update
+# and raw SQL that skip model signals
+FTS_TRIGGERS = {
+    "npoapi_project_fts_insert": f"""
+        CREATE TRIGGER npoapi_project_fts_insert AFTER INSERT ON npoapi_project
+        BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, name, description, organization_name)
+            VALUES (
+                new.id, new.name, new.description,
+                (SELECT name FROM npoapi_organization WHERE id = new.organization_id)
+            );
+        END
+    """,
+    "npoapi_project_fts_update": f"""
+        CREATE TRIGGER npoapi_project_fts_update
+        AFTER UPDATE OF name, description, organization_id ON npoapi_project
+        BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE} (rowid, name, description, organization_name)
+            VALUES (
+                new.id, new.name, new.description,
+                (SELECT name FROM npoapi_organization WHERE id = new.organization_id)
+            );
+        END
+    """,
+    "npoapi_project_fts_delete": f"""
+        CREATE TRIGGER npoapi_project_fts_delete AFTER DELETE ON npoapi_project
+        BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    """,
+    "npoapi_organization_fts_update": f"""
+        CREATE TRIGGER npoapi_organization_fts_update
+        AFTER UPDATE OF name ON npoapi_organization
+        BEGIN
+            UPDATE {FTS_TABLE} SET organization_name = new.name
+            WHERE rowid IN (
+                SELECT id FROM npoapi_project WHERE organization_id = new.id
+            );
+        END
+    """,
+}
+
+FTS_REBUILD = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+        INSERT INTO {FTS_TABLE} (rowid, name, description, organization_name)
+        SELECT project.id, project.name, project.description, organization.name
+        FROM npoapi_project project
+        LEFT JOIN npoapi_organization organization
+            ON organization.id = project.organization_id
+    """,
+]
+
+
+def _sqlite_objects(connection, object_type):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = %s", [object_type]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def drop_fts_triggers(connection):
+    """
+    SQLite rebuilds a table to alter it, and the rename step fails on triggers
+    that reference the table, so they are dropped before migrations run.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+# Any project whose index row is missing or differs, or index rows left over
+FTS_STALE = f"""
+    SELECT EXISTS (
+        SELECT 1 FROM npoapi_project project
+        LEFT JOIN npoapi_organization organization
+            ON organization.id = project.organization_id
+        LEFT JOIN {FTS_TABLE} fts ON fts.rowid = project.id
+        WHERE fts.rowid IS NULL
+            OR fts.name IS NOT project.name
+            OR fts.description IS NOT project.description
+            OR fts.organization_name IS NOT organization.name
+    ) OR (SELECT COUNT(*) FROM {FTS_TABLE}) != (SELECT COUNT(*) FROM npoapi_project)
+"""
+
+
+def install_fts_triggers(connection):
+    """
+    (Re)create missing triggers after migrations, then rebuild the index only
+    if writes made without them (e.g. data migrations) left it out of date.
+    """
+    if connection.vendor != "sqlite":
+        return
+    if FTS_TABLE not in _sqlite_objects(connection, "table"):
+        return
+    missing = set(FTS_TRIGGERS) - _sqlite_objects(connection, "trigger")
+    with connection.cursor() as cursor:
+        for name in missing:
+            cursor.execute(FTS_TRIGGERS[name])
+        cursor.execute(FTS_STALE)
+        if cursor.fetchone()[0]:
+            for sql in FTS_REBUILD:
+                cursor.execute(sql)
+
+
+def search_terms(query):
+    return WORD.findall(query)[:10]
+
+
+def _highlighted(text):
+    if text is None:
+        return None
+    return escape(text).replace(START, "<mark>").replace(STOP, "</mark>")
+
+
+class SQLiteFTSBackend:
+    """FTS5 with BM25 ranking; name matches weigh most, then organization name"""
+
+    def search(self, connection, terms, limit, offset=0):
+        match = " ".join(f'"{term}"*' for term in terms)
+        sql = f"""
+            SELECT rowid,
+                   bm25({FTS_TABLE}, 10.0, 1.0, 3.0) AS rank,
+                   highlight({FTS_TABLE}, 0, %s, %s),
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', 24)
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY rank
+            LIMIT %s OFFSET %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [START, STOP, START, STOP, match, limit, offset])
+            return [
+                # bm25() is lower-is-better; flip it so higher ranks first everywhere
+                (project_id, -rank, name, snippet)
+                for project_id, rank, name, snippet in cursor.fetchall()
+            ]
+
+
+class PostgresSearchBackend:
+    """tsvector/tsquery over the same fields, ranked with ts_rank"""
+
+    config = "english"
+
+    def search(self, connection, terms, limit, offset=0):
+        from django.contrib.postgres.search import (
+            SearchHeadline,
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+
+        vector = (
+            SearchVector("name", weight="A", config=self.config)
+            + SearchVector("organization__name", weight="B", config=self.config)
+            + SearchVector("description", weight="C", config=self.config)
+        )
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms),
+            search_type="raw",
+            config=self.config,
+        )
+        options = {"start_sel": START, "stop_sel": STOP, "config": self.config}
+        rows = (
+            Project.objects.using(connection.alias)
+            .annotate(
+                rank=SearchRank(vector, query),
+                name_highlight=SearchHeadline(
+                    "name", query, highlight_all=True, **options
+                ),
+                snippet=SearchHeadline(
+                    "description", query, max_words=24, min_words=8, **options
+                ),
+            )
+            .filter(rank__gt=0)
+            .order_by("-rank", "id")
+            .values_list("id", "rank", "name_highlight", "snippet")
+        )
+        return list(rows[offset : offset + limit])
+
+
+class SubstringSearchBackend:
+    """Unranked fallback for databases without full-text support"""
+
+    def search(self, connection, terms, limit, offset=0):
+        projects = Project.objects.using(connection.alias)
+        for term in terms:
+            projects = projects.filter(
+                Q(name__icontains=term)
+                | Q(description__icontains=term)
+                | Q(organization__name__icontains=term)
+            )
+        rows = projects.order_by("id").values_list("id", "name", "description")
+        return [
+            (project_id, 0.0, name, description)
+            for project_id, name, description in rows[offset : offset + limit]
+        ]
+
+
+_fts_tables = {}
+
+
+def get_search_backend(connection):
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite":
+        if connection.alias not in _fts_tables:
+            _fts_tables[connection.alias] = (
+                FTS_TABLE in connection.introspection.table_names()
+            )
+        if _fts_tables[connection.alias]:
+            return SQLiteFTSBackend()
+    return SubstringSearchBackend()
+
+
+def search_projects(query, limit=20, offset=0):
+    """
+    Projects matching `query`, best first, as (project, rank, highlights)
+    tuples. Highlights are HTML-escaped with matches wrapped in <mark>.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    # Same database the router picks for other project reads (a replica for views)
+    connection = connections[router.db_for_read(Project)]
+    rows = get_search_backend(connection).search(connection, terms, limit, offset)
+    projects = Project.objects.using(connection.alias).in_bulk(
+        [row[0] for row in rows]
+    )
+    return [
+        (
+            projects[project_id],
+            rank,
+            {"name": _highlighted(name), "description": _highlighted(snippet)},
+        )
+        for project_id, rank, name, snippet in rows
+        if project_id in projects
+    ]
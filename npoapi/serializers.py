@@ -1,7 +1,14 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
-from .models import Organization, Project  # Import the Organization and Project models
+from django.db.models.functions import Lower
+from .models import (  # Import the Organization and Project models
+    GitHubRepository,
+    Organization,
+    OrganizationStats,
+    Project,
+)
 from .services.github_service import (
     GitHubService,
 )  # Import a utility for GitHub repo creation
@@ -74,6 +81,8 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class OrganizationSerializer(serializers.ModelSerializer):
+    # One indexed join on auth_group.name per validation; a cached group id would
+    # go stale in every worker when create_groups runs elsewhere
     user = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.filter(groups__name="Organization User"),
         required=False,
@@ -84,14 +93,163 @@ class OrganizationSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "website", "address", "city", "state", "user"]
 
 
+class OrganizationStatsSerializer(serializers.ModelSerializer):
+    unclaimed_project_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = OrganizationStats
+        fields = [
+            "project_count",
+            "claimed_project_count",
+            "unclaimed_project_count",
+            "active_developer_count",
+            "latest_claim_date",
+        ]
+        read_only_fields = fields
+
+
+class OrganizationWithStatsSerializer(OrganizationSerializer):
+    """OrganizationSerializer plus the stats, for ?include=stats"""
+
+    stats = OrganizationStatsSerializer(read_only=True)
+
+    class Meta(OrganizationSerializer.Meta):
+        fields = OrganizationSerializer.Meta.fields + ["stats"]
+
+
+class ProjectListSerializer(serializers.ListSerializer):
+    """
+    many=True validation for /projects/bulk/ that keeps going past invalid
+    items: validated_data holds None where item_errors has that item's errors.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Expected a list of items."]}
+            )
+        self.item_errors = []
+        validated = []
+        for item in data:
+            try:
+                validated.append(self.child.run_validation(item))
+                self.item_errors.append({})
+            except serializers.ValidationError as exc:
+                validated.append(None)
+                self.item_errors.append(exc.detail)
+        return validated
+
+
+PROJECT_NAME_TAKEN = "A project with this name already exists."
+REPOSITORY_NAME_TAKEN = "A GitHub repository with this name already exists."
+# Owner of names only the repository mirror knows; no project matches it
+MIRRORED_REPOSITORY = "github-repository"
+
+
+def taken_project_names(names):
+    """
+    Lowercased name -> id of the existing projects using any of these names,
+    or MIRRORED_REPOSITORY for nss-npo repositories without a project, in two
+    queries. Passed to ProjectSerializer as context["taken_names"] so a batch
+    doesn't run uniqueness queries per item.
+    """
+    lower_names = {name.lower() for name in names if name}
+    taken = dict(
+        Project.objects.annotate(lower_name=Lower("name"))
+        .filter(lower_name__in=lower_names)
+        .values_list("lower_name", "id")
+    )
+    repositories = (
+        GitHubRepository.objects.annotate(lower_name=Lower("name"))
+        .filter(lower_name__in=lower_names)
+        .values_list("lower_name", flat=True)
+    )
+    for name in repositories:
+        taken.setdefault(name, MIRRORED_REPOSITORY)
+    return taken
+
+
+class ProjectOrganizationField(serializers.PrimaryKeyRelatedField):
+    """Looks ids up in context["organizations"] (prefetched for a batch) first"""
+
+    def to_internal_value(self, data):
+        organizations = self.context.get("organizations")
+        if organizations is not None:
+            try:
+                return organizations[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
 class ProjectSerializer(serializers.ModelSerializer):
+    organization = ProjectOrganizationField(queryset=Organization.objects.all())
+
     class Meta:
+        list_serializer_class = ProjectListSerializer
         model = Project
-        fields = ["id", "organization", "name", "repository_url", "description"]
+        fields = [
+            "id",
+            "organization",
+            "name",
+            "repository_url",
+            "description",
+            "provisioning_status",
+            "max_claimers",
+            "claim_count",
+            "repository_pushed_at",
+            "repository_open_issues",
+            "repository_stars",
+        ]
         read_only_fields = [
-            "repository_url"
+            "repository_url",
+            "provisioning_status",
+            "claim_count",
+            # Kept up to date from GitHub webhooks
+            "repository_pushed_at",
+            "repository_open_issues",
+            "repository_stars",
         ]  # Make repository_url read-only, as it's set after GitHub repo creation
 
+    def validate_name(self, value):
+        taken = self.context.get("taken_names")
+        if taken is not None:
+            # New items get a unique owner, so two of them can't share a name
+            owner = self.instance.pk if self.instance is not None else object()
+            if value.lower() in taken and taken[value.lower()] != owner:
+                raise serializers.ValidationError(
+                    REPOSITORY_NAME_TAKEN
+                    if taken[value.lower()] == MIRRORED_REPOSITORY
+                    else PROJECT_NAME_TAKEN
+                )
+            taken[value.lower()] = owner  # Later items in the batch can't reuse it
+            return value
+
+        # The name becomes the GitHub repository name, unique regardless of case.
+        # Filtering on Lower("name") lets the lookup use project_name_ci_unique.
+        projects = Project.objects.annotate(lower_name=Lower("name")).filter(
+            lower_name=value.lower()
+        )
+        if self.instance is not None:
+            projects = projects.exclude(pk=self.instance.pk)
+        if projects.exists():
+            raise serializers.ValidationError(PROJECT_NAME_TAKEN)
+        # Repositories created outside this app: a local lookup in the mirror
+        # instead of a failed create call to GitHub
+        renamed = self.instance is None or self.instance.name.lower() != value.lower()
+        if renamed and GitHubRepository.named(value).exists():
+            raise serializers.ValidationError(REPOSITORY_NAME_TAKEN)
+        return value
+
+    def validate_max_claimers(self, value):
+        if value < 1:
+            raise serializers.ValidationError("A project needs at least one spot.")
+        if self.instance is not None and value < self.instance.claim_count:
+            raise serializers.ValidationError(
+                f"{self.instance.claim_count} developers have already claimed this project."
+            )
+        return value
+
     def create(self, validated_data):
         # Create the Project instance
         return Project.objects.create(**validated_data)
@@ -0,0 +1,119 @@
+import random
+import time
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+from npoapi.models import Developer, DeveloperProject, Project
+from npoapi.signals import invalidate_projects
+from .organization_stats_service import OrganizationStatsService
+
+
+class ClaimError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ClaimService:
+    """
+    Claims and releases spots on projects for developers.
+
+    A claim takes a spot with one conditional UPDATE
+    (claim_count < max_claimers) and inserts the DeveloperProject row in the
+    same transaction, so concurrent claims can't oversell a project and no
+    table or global lock is needed. Postgres re-checks the condition after
+    waiting on the row lock; SQLite serializes writers and answers "database
+    is locked" when it gives up waiting, which is retried here. The
+    organization's OrganizationStats change in the same transaction.
+    """
+
+    def __init__(self):
+        self.max_retries = settings.CLAIM_MAX_RETRIES
+        self.retry_backoff = settings.CLAIM_RETRY_BACKOFF
+        self.retries = 0  # Busy retries so far, for the stress_claims report
+        self.stats = OrganizationStatsService()
+
+    def get_developer(self, user):
+        """The user's Developer profile, created on first use for the Developer group"""
+        developer = Developer.objects.filter(user=user).first()
+        if developer is None and user.groups.filter(name="Developer").exists():
+            developer, _ = Developer.objects.get_or_create(user=user)
+        return developer
+
+    def claim(self, project_id, developer):
+        claim = self._with_retries(self._claim, project_id, developer)
+        self._invalidate(project_id)
+        return claim
+
+    def unclaim(self, project_id, developer):
+        self._with_retries(self._unclaim, project_id, developer)
+        self._invalidate(project_id)
+
+    def _claim(self, project_id, developer):
+        now = timezone.now()
+        with transaction.atomic():
+            taken = Project.objects.filter(
+                pk=project_id, claim_count__lt=F("max_claimers")
+            ).update(claim_count=F("claim_count") + 1, updated_at=now)
+            if not taken:
+                if not Project.objects.filter(pk=project_id).exists():
+                    raise ClaimError("Project not found.", 404)
+                if DeveloperProject.objects.filter(
+                    project_id=project_id, developer=developer
+                ).exists():
+                    raise ClaimError("You have already claimed this project.", 409)
+                raise ClaimError("This project has no open spots left.", 409)
+
+            try:
+                claim = DeveloperProject.objects.create(
+                    developer=developer, project_id=project_id, date_claimed=now
+                )
+            except IntegrityError:
+                # unique_developer_project; leaving the block gives the spot back
+                raise ClaimError("You have already claimed this project.", 409)
+            self.stats.claim_added(claim)
+            return claim
+
+    def _unclaim(self, project_id, developer):
+        with transaction.atomic():
+            # Read first: the stats need the claim's date
+            claim = DeveloperProject.objects.filter(
+                project_id=project_id, developer=developer
+            ).first()
+            if claim is not None:
+                claim.stats_counted = True  # claim_removed() below, not the signal
+            # Deleting by pk still counts, in case a concurrent unclaim won
+            deleted = claim is not None and claim.delete()[0]
+            if not deleted:
+                raise ClaimError("You have not claimed this project.", 404)
+            Project.objects.filter(pk=project_id, claim_count__gt=0).update(
+                claim_count=F("claim_count") - 1, updated_at=timezone.now()
+            )
+            self.stats.claim_removed(claim)
+
+    def _with_retries(self, operation, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return operation(*args)
+            except OperationalError as e:
+                if not _is_busy(e) or attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                # Full jitter so the losers don't all come back at once
+                time.sleep(random.uniform(0, self.retry_backoff * (2**attempt)))
+
+    def _invalidate(self, project_id):
+        # Queryset updates skip the signals that invalidate cached responses
+        organization_id = (
+            Project.objects.filter(pk=project_id)
+            .values_list("organization_id", flat=True)
+            .first()
+        )
+        invalidate_projects([project_id], [organization_id])
+
+
+def _is_busy(error):
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message
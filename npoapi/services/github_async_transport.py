@@ -0,0 +1,90 @@
+import asyncio
+import time
+import weakref
+
+import httpx
+from .github_rate_limiter import scheduler
+from .github_transport import BaseGitHubTransport, IDEMPOTENT_METHODS
+
+# One client per event loop: httpx connections can't be shared across loops
+_transports = weakref.WeakKeyDictionary()
+
+
+def get_async_transport():
+    """Return the shared async transport for the running event loop."""
+    loop = asyncio.get_running_loop()
+    transport = _transports.get(loop)
+    if transport is None:
+        transport = _transports[loop] = AsyncGitHubTransport()
+    return transport
+
+
+class AsyncGitHubTransport(BaseGitHubTransport):
+    """
+    Async counterpart of GitHubTransport for ASGI views: the same timeouts,
+    retry policy and stats, on a pooled httpx.AsyncClient so one worker can
+    keep hundreds of GitHub calls in flight.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=self.pool_maxsize,
+            ),
+        )
+
+    async def get(self, url, endpoint=None, **kwargs):
+        return await self.request("GET", url, endpoint=endpoint, **kwargs)
+
+    async def post(self, url, endpoint=None, **kwargs):
+        return await self.request("POST", url, endpoint=endpoint, **kwargs)
+
+    async def request(self, method, url, endpoint=None, priority=None, **kwargs):
+        """
+        Send a request with the same retry rules and rate limit scheduling as
+        GitHubTransport.request. Raises httpx.HTTPError once the retries are
+        used up, or RateLimitExceeded if no budget comes in time.
+        """
+        method = method.upper()
+        endpoint = self._endpoint(method, url, endpoint)
+
+        attempt = 0
+        while True:
+            if priority is not None:
+                await scheduler.aacquire(priority)
+            started = time.monotonic()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError as e:
+                self._record(endpoint, time.monotonic() - started, None, 0, attempt)
+                if attempt >= self.max_retries or not self._can_retry_exception(method, e):
+                    raise
+                attempt += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+
+            self._record(
+                endpoint,
+                time.monotonic() - started,
+                response.status_code,
+                len(response.content),
+                attempt,
+            )
+            if priority is not None:
+                scheduler.observe(response)
+
+            delay = self._retry_delay(method, response, attempt)
+            if delay is None or attempt >= self.max_retries:
+                return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _can_retry_exception(self, method, exc):
+        if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)):
+            return True
+        if isinstance(exc, httpx.TransportError):
+            return method in IDEMPOTENT_METHODS
+        return False
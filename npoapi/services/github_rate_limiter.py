@@ -0,0 +1,253 @@
+import asyncio
+import bisect
+import itertools
+import threading
+import time
+import httpx
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from npoapi import metrics
+
+INTERACTIVE = "interactive"  # A user is waiting on the response
+BACKGROUND = "background"  # Provisioner, repository sync and other batch work
+PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1}
+
+BUDGET_KEY = "npoapi:github:ratelimit:budget"
+BLOCKED_KEY = "npoapi:github:ratelimit:blocked-until"
+TAT_KEY = "npoapi:github:ratelimit:tat"
+
+# Every worker paces installation-token API calls from state in the shared
+# cache:
+#   - the budget GitHub last reported (X-RateLimit-Remaining/Limit/Reset),
+#   - a "blocked until" time set by Retry-After, secondary rate limits or an
+#     exhausted budget, which stops every worker at once,
+#   - a token bucket, kept as a GCRA "theoretical arrival time": calls are
+#     spread evenly over what is left of the window, with a burst allowance.
+#     Reads and writes are not atomic across workers, so concurrent workers
+#     can overshoot by a few calls; the next response's headers correct it.
+# Until GitHub has reported a budget (or against a stand-in without headers),
+# calls are not paced, only blocked.
+#
+# Within a worker, calls queue by priority: only the first in line asks for
+# budget, so interactive calls go before background ones, and background
+# calls also leave GITHUB_RATE_LIMIT_BACKGROUND_RESERVE of the budget alone.
+
+
+class RateLimitExceeded(requests.RequestException, httpx.HTTPError):
+    """
+    No budget within the caller's wait limit. Caught by both the requests and
+    httpx error handling of the callers, like a network error.
+    """
+
+    def __init__(self, message):
+        requests.RequestException.__init__(self, message)
+        self.message = message
+
+
+class RateLimitScheduler:
+    def __init__(self):
+        self._queue = []  # Sorted (priority rank, sequence) tickets
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    # --------------------------------
+    # Waiting for budget
+    # --------------------------------
+    def acquire(self, priority=INTERACTIVE):
+        """Wait for budget for one call; raises RateLimitExceeded if it won't come"""
+        if not settings.GITHUB_RATE_LIMIT_ENABLED:
+            return
+        started = time.monotonic()
+        deadline = started + self._max_wait(priority)
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                # Only the first in line takes budget, so _take runs outside
+                # the lock and aacquire() never waits on this thread's cache I/O
+                delay = self._take(priority) if self._queue[0] == ticket else None
+                if delay == 0:
+                    break
+                left = deadline - time.monotonic()
+                if left <= 0 or (delay is not None and delay > left):
+                    self._reject(priority, delay)
+                with self._condition:
+                    # Checked under the lock, so a _dequeue() can't slip in
+                    # between and leave its notify_all() unheard
+                    if delay is None and self._queue[0] == ticket:
+                        continue
+                    self._condition.wait(timeout=min(delay or left, left))
+        finally:
+            self._dequeue(priority, ticket)
+        metrics.GITHUB_SCHEDULER_WAIT_SECONDS.observe(
+            time.monotonic() - started, priority=priority
+        )
+
+    async def aacquire(self, priority=INTERACTIVE):
+        """
+        acquire() for the event loop: the cache is read through its async
+        methods and waiting polls with asyncio.sleep() instead of blocking. The
+        lock is only held for the in-memory queue, never across cache calls.
+        """
+        if not settings.GITHUB_RATE_LIMIT_ENABLED:
+            return
+        started = time.monotonic()
+        deadline = started + self._max_wait(priority)
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                delay = (
+                    await self._atake(priority) if self._queue[0] == ticket else None
+                )
+                if delay == 0:
+                    break
+                left = deadline - time.monotonic()
+                if left <= 0 or (delay is not None and delay > left):
+                    self._reject(priority, delay)
+                await asyncio.sleep(min(delay or 0.05, left))
+        finally:
+            self._dequeue(priority, ticket)
+        metrics.GITHUB_SCHEDULER_WAIT_SECONDS.observe(
+            time.monotonic() - started, priority=priority
+        )
+
+    def _max_wait(self, priority):
+        if priority == BACKGROUND:
+            return settings.GITHUB_RATE_LIMIT_BACKGROUND_MAX_WAIT
+        return settings.GITHUB_RATE_LIMIT_MAX_WAIT
+
+    def _enqueue(self, priority):
+        ticket = (PRIORITIES[priority], next(self._sequence))
+        with self._condition:
+            bisect.insort(self._queue, ticket)
+        metrics.GITHUB_SCHEDULER_QUEUE_DEPTH.inc(priority=priority)
+        return ticket
+
+    def _dequeue(self, priority, ticket):
+        with self._condition:
+            self._queue.remove(ticket)
+            self._condition.notify_all()  # The next in line may go
+        metrics.GITHUB_SCHEDULER_QUEUE_DEPTH.dec(priority=priority)
+
+    def _reject(self, priority, delay):
+        metrics.GITHUB_SCHEDULER_REJECTED.inc(priority=priority)
+        wait = f"{delay:.0f}s" if delay is not None else "its turn"
+        raise RateLimitExceeded(
+            f"GitHub rate limit: a {priority} call would wait {wait}, "
+            f"longer than {self._max_wait(priority):.0f}s"
+        )
+
+    def _take(self, priority):
+        """Take budget for one call: 0, or the seconds until some is available"""
+        now = time.time()
+        state = cache.get_many([BUDGET_KEY, BLOCKED_KEY, TAT_KEY])
+        delay, tat = self._decide(priority, state, now)
+        if tat is not None:
+            cache.set(TAT_KEY, tat, timeout=self._tat_timeout(state, now))
+        return delay
+
+    async def _atake(self, priority):
+        """_take() without blocking the event loop"""
+        now = time.time()
+        state = await cache.aget_many([BUDGET_KEY, BLOCKED_KEY, TAT_KEY])
+        delay, tat = self._decide(priority, state, now)
+        if tat is not None:
+            await cache.aset(TAT_KEY, tat, timeout=self._tat_timeout(state, now))
+        return delay
+
+    def _decide(self, priority, state, now):
+        """(delay, new theoretical arrival time or None) for the cached state"""
+        blocked_until = state.get(BLOCKED_KEY) or 0
+        if blocked_until > now:
+            return blocked_until - now, None
+
+        budget = state.get(BUDGET_KEY)
+        if budget is None or budget["reset"] <= now:
+            return 0, None  # Budget unknown or renewed: nothing to pace against yet
+        remaining = budget["remaining"]
+        if priority == BACKGROUND:
+            remaining -= budget["limit"] * settings.GITHUB_RATE_LIMIT_BACKGROUND_RESERVE
+        if remaining < 1:
+            return budget["reset"] - now, None
+
+        # GCRA: one call per `interval`, up to `burst` calls ahead of schedule
+        window = budget["reset"] - now
+        interval = window / remaining
+        burst = settings.GITHUB_RATE_LIMIT_BURST
+        tat = max(state.get(TAT_KEY) or now, now)
+        allowed_at = tat - burst * interval
+        if allowed_at > now:
+            return allowed_at - now, None
+        return 0, tat + interval
+
+    def _tat_timeout(self, state, now):
+        return int(state[BUDGET_KEY]["reset"] - now) + 1
+
+    # --------------------------------
+    # Learning from responses
+    # --------------------------------
+    def observe(self, response):
+        """Record the budget and any pause GitHub asked for in this response"""
+        if not settings.GITHUB_RATE_LIMIT_ENABLED:
+            return
+        headers = response.headers
+        now = time.time()
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                budget = {
+                    "remaining": int(remaining),
+                    "limit": int(headers.get("X-RateLimit-Limit") or remaining),
+                    "reset": int(reset),
+                }
+            except ValueError:
+                budget = None
+            if budget is not None and budget["reset"] > now:
+                cache.set(BUDGET_KEY, budget, timeout=int(budget["reset"] - now) + 1)
+                metrics.GITHUB_RATE_LIMIT_REMAINING.set(budget["remaining"])
+                metrics.GITHUB_RATE_LIMIT_LIMIT.set(budget["limit"])
+
+        if response.status_code not in (403, 429):
+            return
+        retry_after = headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            self.block(now + int(retry_after))
+        elif remaining == "0" and reset and reset.isdigit():
+            self.block(int(reset))
+        elif "secondary rate limit" in response.text.lower():
+            self.block(now + settings.GITHUB_SECONDARY_RATE_LIMIT_PAUSE)
+
+    def block(self, until):
+        """Stop every worker's calls until this time (epoch seconds)"""
+        current = cache.get(BLOCKED_KEY) or 0
+        if until > current:
+            cache.set(BLOCKED_KEY, until, timeout=int(until - time.time()) + 1)
+
+    def status(self):
+        """The shared state, for metrics and diagnostics"""
+        state = cache.get_many([BUDGET_KEY, BLOCKED_KEY])
+        budget = state.get(BUDGET_KEY) or {}
+        return {
+            "remaining": budget.get("remaining"),
+            "limit": budget.get("limit"),
+            "reset": budget.get("reset"),
+            "blocked_seconds": max((state.get(BLOCKED_KEY) or 0) - time.time(), 0),
+            "queued": len(self._queue),
+        }
+
+
+# One per process; the budget itself lives in the cache
+scheduler = RateLimitScheduler()
+
+
+def _collect_rate_limit_metrics():
+    status = scheduler.status()
+    remaining = status["remaining"]
+    limit = status["limit"]
+    metrics.GITHUB_RATE_LIMIT_REMAINING.set(-1 if remaining is None else remaining)
+    metrics.GITHUB_RATE_LIMIT_LIMIT.set(-1 if limit is None else limit)
+    metrics.GITHUB_RATE_LIMIT_BLOCKED_SECONDS.set(round(status["blocked_seconds"], 3))
+
+
+metrics.register_collector(_collect_rate_limit_metrics)
@@ -1,23 +1,38 @@
+import logging
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings  # Import settings to access GITHUB_INSTALLATION_ID
+from django.db import DatabaseError
+from npoapi.models import GitHubRepository
+from .github_rate_limiter import INTERACTIVE
+from .github_token_service import GitHubTokenService
+from .github_transport import get_transport
+from .github_async_transport import get_async_transport
+
+logger = logging.getLogger(__name__)
 
 
 class GitHubService:
-    def __init__(self, token, is_jwt=False):
+    def __init__(self, token, is_jwt=False, priority=INTERACTIVE):
         """
         token: The token to use (JWT or Installation Token).
         is_jwt: If true, indicates that the token is a JWT. Otherwise, it’s an installation token.
+        priority: INTERACTIVE or BACKGROUND; installation token calls share the
+        installation's rate limit and are scheduled with this priority.
         """
         self.token = token
         self.is_jwt = is_jwt
-        self.api_base_url = "https://api.github.com"
+        self.priority = priority
+        self.api_base_url = settings.GITHUB_API_URL
+        self.transport = get_transport()
 
     def check_github_app_permissions(self):
         """
         Check the GitHub App's installation permissions using the JWT.
         """
         if not self.is_jwt:
-            print("Error: A JWT is required to check GitHub App permissions.")
+            logger.error("A JWT is required to check GitHub App permissions")
             return None
 
         url = f"{self.api_base_url}/app/installations/{settings.GITHUB_INSTALLATION_ID}"
@@ -26,27 +41,34 @@ class GitHubService:
             "Accept": "application/vnd.github.v3+json",
         }
 
-        print(f"Checking GitHub App permissions with URL: {url}")
-        print(f"Headers: {headers}")
-
-        response = requests.get(url, headers=headers)
+        try:
+            response = self.transport.get(
+                url, endpoint="app.installation", headers=headers
+            )
+        except requests.RequestException as e:
+            logger.error("Error checking app permissions", extra={"error": str(e)})
+            return None
 
-        print(f"GitHub API Status Code (Permissions Check): {response.status_code}")
-        print(f"GitHub API Response (Permissions Check): {response.text}")
+        logger.debug(
+            "App permissions response", extra={"status": response.status_code}
+        )
 
         if response.status_code == 200:
             return response.json()
         else:
-            print(
-                f"Failed to retrieve app permissions: {response.status_code}, {response.text}"
+            logger.warning(
+                "Failed to retrieve app permissions",
+                extra={"status": response.status_code, "body": response.text[:500]},
             )
             return None
 
-    def create_github_repo(self, name, description):
-        headers = {
+    def _headers(self):
+        return {
             "Authorization": f"Bearer {self.token}",
             "Accept": "application/vnd.github.v3+json",
         }
+
+    def create_github_repo(self, name, description):
         data = {
             "name": name,
             "description": description,
@@ -54,35 +76,172 @@ class GitHubService:
         }
 
         # Ensure we're creating the repo under the correct organization 'nss-npo'
-        response = requests.post(
-            f"{self.api_base_url}/orgs/nss-npo/repos",  # Using the target org 'nss-npo'
-            json=data,
-            headers=headers,
-        )
+        try:
+            response = self.transport.post(
+                f"{self.api_base_url}/orgs/nss-npo/repos",  # Using the target org 'nss-npo'
+                endpoint="org.repos.create",
+                priority=self.priority,
+                json=data,
+                headers=self._headers(),
+            )
+        except requests.RequestException as e:
+            logger.error("Error creating repo", extra={"repo": name, "error": str(e)})
+            return None
+
+        repo_url = self._created_repo_url(response)
+        if repo_url:
+            self._mirror(response.json())
+        return repo_url
 
+    def _created_repo_url(self, response):
         if response.status_code == 201:  # Success
             return response.json().get("html_url")
         else:
-            print(f"Failed to create repo: {response.status_code}, {response.text}")
+            logger.warning(
+                "Failed to create repo",
+                extra={"status": response.status_code, "body": response.text[:500]},
+            )
+            self._discard_token_if_unauthorized(response)
             return None
 
     def check_if_repo_exists(self, name):
         """
-        Check if a repository with the given name already exists.
+        Check if a repository with the given name already exists. Answered from
+        the local mirror when it knows the name; GitHub is asked otherwise, as
+        the repository may be newer than the last sync.
         """
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Accept": "application/vnd.github.v3+json",
-        }
+        mirrored = GitHubRepository.named(name).values_list("html_url", flat=True)
+        repo_url = mirrored.first()
+        if repo_url:
+            return repo_url
+
         url = f"{self.api_base_url}/repos/nss-npo/{name}"
 
-        print(f"Checking if repo {name} exists with URL: {url}")
+        try:
+            response = self.transport.get(
+                url,
+                endpoint="repos.get",
+                priority=self.priority,
+                headers=self._headers(),
+            )
+        except requests.RequestException as e:
+            logger.error(
+                "Error checking if repo exists", extra={"repo": name, "error": str(e)}
+            )
+            return None
 
-        response = requests.get(url, headers=headers)
+        repo_url = self._existing_repo_url(name, response)
+        if repo_url:
+            self._mirror(response.json())
+        return repo_url
 
+    def _existing_repo_url(self, name, response):
         if response.status_code == 200:
-            print(f"Repo {name} exists.")
+            logger.debug("Repo exists", extra={"repo": name})
             return response.json().get("html_url")
         else:
-            print(f"Repo {name} does not exist. Status Code: {response.status_code}")
+            logger.debug(
+                "Repo not found", extra={"repo": name, "status": response.status_code}
+            )
+            self._discard_token_if_unauthorized(response)
+            return None
+
+    # --------------------------------
+    # Async variants for ASGI views
+    # --------------------------------
+    async def acreate_github_repo(self, name, description):
+        data = {
+            "name": name,
+            "description": description,
+            "private": False,
+        }
+        try:
+            response = await get_async_transport().post(
+                f"{self.api_base_url}/orgs/nss-npo/repos",
+                endpoint="org.repos.create",
+                priority=self.priority,
+                json=data,
+                headers=self._headers(),
+            )
+        except httpx.HTTPError as e:
+            logger.error("Error creating repo", extra={"repo": name, "error": str(e)})
+            return None
+
+        repo_url = self._created_repo_url(response)
+        if repo_url:
+            await sync_to_async(self._mirror)(response.json())
+        return repo_url
+
+    async def acheck_if_repo_exists(self, name):
+        mirrored = GitHubRepository.named(name).values_list("html_url", flat=True)
+        repo_url = await mirrored.afirst()
+        if repo_url:
+            return repo_url
+
+        url = f"{self.api_base_url}/repos/nss-npo/{name}"
+        try:
+            response = await get_async_transport().get(
+                url,
+                endpoint="repos.get",
+                priority=self.priority,
+                headers=self._headers(),
+            )
+        except httpx.HTTPError as e:
+            logger.error(
+                "Error checking if repo exists", extra={"repo": name, "error": str(e)}
+            )
             return None
+
+        repo_url = self._existing_repo_url(name, response)
+        if repo_url:
+            await sync_to_async(self._mirror)(response.json())
+        return repo_url
+
+    def list_org_repositories(self, page, per_page=100, etag=None):
+        """
+        One page of the organization's repositories, oldest first so new ones
+        only change the last page. With the page's previous ETag, GitHub
+        answers 304 if nothing changed. Returns the response, or None on a
+        network error.
+        """
+        headers = self._headers()
+        if etag:
+            headers["If-None-Match"] = etag
+        try:
+            return self.transport.get(
+                f"{self.api_base_url}/orgs/nss-npo/repos",
+                endpoint="org.repos.list",
+                priority=self.priority,
+                params={
+                    "type": "all",
+                    "sort": "created",
+                    "direction": "asc",
+                    "per_page": per_page,
+                    "page": page,
+                },
+                headers=headers,
+            )
+        except requests.RequestException as e:
+            logger.error(
+                "Error listing repositories", extra={"page": page, "error": str(e)}
+            )
+            return None
+
+    def _mirror(self, repository):
+        """Keep the local mirror up to date with repositories seen in responses"""
+        try:
+            GitHubRepository.upsert([repository])
+        except DatabaseError as e:
+            # A sync will pick it up; never fail a GitHub call over the mirror
+            logger.warning(
+                "Could not mirror repository",
+                extra={"repo": repository.get("name"), "error": str(e)},
+            )
+
+    def _discard_token_if_unauthorized(self, response):
+        """
+        A 401 means the cached installation token was revoked or expired early,
+        so drop it and let the next caller mint a fresh one.
+        """
+        if response.status_code == 401 and not self.is_jwt:
+            GitHubTokenService().invalidate_installation_token(self.token)
@@ -1,50 +1,175 @@
 import jwt
+import logging
 import time
+import asyncio
+import calendar
+import threading
+import weakref
+import httpx
 import requests
+from functools import lru_cache
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from django.conf import settings
+from django.core.cache import cache
+from .github_transport import get_transport
+from .github_async_transport import get_async_transport
+
+logger = logging.getLogger(__name__)
+
+# Process-local copies of the tokens we also keep in the shared Django cache, so a
+# warm worker answers without a cache round trip.
+_local_jwts = {}
+_local_installation_tokens = {}
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+_async_refresh_locks = weakref.WeakKeyDictionary()  # event loop -> {installation: Lock}
+
+
+@lru_cache(maxsize=4)
+def _load_private_key(pem):
+    """Parse the GitHub App PEM once per process and reuse the key object."""
+    return load_pem_private_key(pem.encode(), password=None)
+
+
+def _refresh_lock(installation_id):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(installation_id, threading.Lock())
+
+
+def _async_refresh_lock(installation_id):
+    locks = _async_refresh_locks.setdefault(asyncio.get_running_loop(), {})
+    return locks.setdefault(installation_id, asyncio.Lock())
 
 
 class GitHubTokenService:
     def __init__(self):
-        self.api_base_url = "https://api.github.com"
+        self.api_base_url = settings.GITHUB_API_URL
         self.github_app_id = settings.GITHUB_APP_ID
         self.github_private_key = settings.GITHUB_PRIVATE_KEY.replace("\\n", "\n")
         self.github_installation_id = settings.GITHUB_INSTALLATION_ID
+        self.jwt_ttl = settings.GITHUB_JWT_TTL
+        self.refresh_margin = settings.GITHUB_TOKEN_REFRESH_MARGIN
+
+    def _cache_key(self, suffix):
+        return f"github:installation:{self.github_installation_id}:{suffix}"
 
     def generate_jwt(self):
-        """Generate a JWT to authenticate the GitHub App"""
+        """Generate a JWT to authenticate the GitHub App, reusing it until it nearly expires"""
+        now = time.time()
+        cached = _local_jwts.get(self.github_app_id)
+        if cached and cached["expires_at"] - 60 > now:
+            return cached["token"]
+
         payload = {
-            "iat": int(time.time()),  # Issued at time
-            "exp": int(time.time()) + (5 * 60),  # Expires after 5 minutes
-            "iss": self.github_app_id,  # GitHub App ID
+            "iat": int(now),  # Issued at time
+            "exp": int(now) + self.jwt_ttl,  # Expires after GITHUB_JWT_TTL seconds
+            "iss": str(self.github_app_id),  # GitHub App ID
         }
 
         try:
-            # Debugging: Show the payload
-            print(f"JWT Payload: {payload}")
-
-            # Debugging: Show the first part of the private key (for security reasons, only show part of it)
-            # print(f"Private Key (truncated): {self.github_private_key[:50]}...")
-
-            # Generate the JWT
-            jwt_token = jwt.encode(payload, self.github_private_key, algorithm="RS256")
-
-            # Debugging: Print the generated JWT
-            print(f"Generated JWT: {jwt_token}")
+            # Generate the JWT with the key parsed once per process
+            private_key = _load_private_key(self.github_private_key)
+            jwt_token = jwt.encode(payload, private_key, algorithm="RS256")
 
+            _local_jwts[self.github_app_id] = {
+                "token": jwt_token,
+                "expires_at": payload["exp"],
+            }
             return jwt_token
 
         except Exception as e:
-            # Debugging: Print error if JWT generation fails
-            print(f"Error generating JWT: {e}")
+            logger.error("Error generating JWT", extra={"error": str(e)})
             return None
 
     def get_installation_token(self):
-        """Generate the installation access token from GitHub"""
+        """Return a cached installation access token, minting a new one when needed"""
+        entry = self._get_installation_entry()
+        return entry["token"] if entry else None
+
+    def get_installation_permissions(self):
+        """Return the permissions GitHub granted alongside the cached installation token"""
+        entry = self._get_installation_entry()
+        return entry["permissions"] if entry else None
+
+    def invalidate_installation_token(self, token=None):
+        """
+        Throw away the cached installation token, e.g. after GitHub answered 401.
+        token: only discard the entry if it still holds this token, so a token that
+        another worker already refreshed is left alone.
+        """
+        key = self._cache_key("token")
+        entry = _local_installation_tokens.get(key) or cache.get(key)
+        if token and entry and entry["token"] != token:
+            return
+        _local_installation_tokens.pop(key, None)
+        cache.delete(key)
+
+    def _is_usable(self, entry, now):
+        return entry is not None and entry["expires_at"] > now + 30
+
+    def _is_fresh(self, entry, now):
+        return entry is not None and entry["expires_at"] - self.refresh_margin > now
+
+    def _get_installation_entry(self):
+        key = self._cache_key("token")
+        now = time.time()
+
+        entry = _local_installation_tokens.get(key)
+        if self._is_fresh(entry, now):
+            return entry
+
+        shared_entry = cache.get(key)
+        if self._is_fresh(shared_entry, now):
+            _local_installation_tokens[key] = shared_entry
+            return shared_entry
+        entry = shared_entry or entry
+
+        # Single flight: one thread per process, and one process across the
+        # cache, refreshes the token. Everyone else keeps using the old token
+        # while it is still valid, or waits for the new one.
+        lock = _refresh_lock(self.github_installation_id)
+        if not lock.acquire(blocking=not self._is_usable(entry, now)):
+            return entry
+
+        try:
+            entry = _local_installation_tokens.get(key) or cache.get(key)
+            if self._is_fresh(entry, time.time()):
+                return entry
+
+            lock_key = self._cache_key("refresh-lock")
+            if cache.add(lock_key, True, timeout=30):
+                try:
+                    return self._mint_installation_token(key) or (
+                        entry if self._is_usable(entry, time.time()) else None
+                    )
+                finally:
+                    cache.delete(lock_key)
+
+            if self._is_usable(entry, time.time()):
+                return entry
+            return self._wait_for_installation_token(key, lock_key)
+        finally:
+            lock.release()
+
+    def _wait_for_installation_token(self, key, lock_key):
+        """Wait for the worker holding the refresh lock to publish a new token"""
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            time.sleep(0.1)
+            entry = cache.get(key)
+            if self._is_usable(entry, time.time()):
+                _local_installation_tokens[key] = entry
+                return entry
+            if cache.get(lock_key) is None:
+                break
+        return self._mint_installation_token(key)
+
+    def _access_token_request(self):
+        """URL and headers for minting an installation token, or None without a JWT"""
         jwt_token = self.generate_jwt()
 
         if not jwt_token:
-            print("JWT generation failed.")
+            logger.warning("No JWT, cannot request an installation token")
             return None
 
         headers = {
@@ -52,26 +177,134 @@ class GitHubTokenService:
             "Accept": "application/vnd.github.v3+json",
         }
         url = f"{self.api_base_url}/app/installations/{self.github_installation_id}/access_tokens"
+        return url, headers
 
-        try:
-            # Debugging: Print the request details
-            print(f"Requesting installation token with JWT: {jwt_token}")
-            print(f"Request Headers: {headers}")
-            print(f"Request URL: {url}")
+    def _token_entry(self, response):
+        """Turn GitHub's access_tokens response into a cache entry, or None on failure"""
+        logger.debug(
+            "Installation token response", extra={"status": response.status_code}
+        )
 
-            response = requests.post(url, headers=headers)
+        if response.status_code == 201:
+            data = response.json()
+            return {
+                "token": data.get("token"),
+                "expires_at": self._parse_expires_at(data.get("expires_at")),
+                "permissions": data.get("permissions") or {},
+            }
 
-            # Debugging: Print the status code and response
-            print(f"GitHub API Status Code: {response.status_code}")
-            print(f"GitHub API Response: {response.text}")
+        logger.warning(
+            "Failed to retrieve installation token",
+            extra={"status": response.status_code},
+        )
+        if response.status_code == 401:
+            _local_jwts.pop(self.github_app_id, None)
+        return None
 
-            if response.status_code == 201:
-                return response.json().get("token")
-            else:
-                print(f"Failed to retrieve installation token: {response.status_code}")
-                return None
+    def _entry_timeout(self, entry):
+        return max(int(entry["expires_at"] - time.time()), 1)
 
+    def _mint_installation_token(self, key):
+        """Generate the installation access token from GitHub and cache it"""
+        token_request = self._access_token_request()
+        if token_request is None:
+            return None
+        url, headers = token_request
+
+        try:
+            response = get_transport().post(
+                url, endpoint="app.installation.access_tokens", headers=headers
+            )
         except requests.RequestException as e:
-            # Debugging: Catch and log any request-related exceptions
-            print(f"Error fetching installation token: {e}")
+            logger.error("Error fetching installation token", extra={"error": str(e)})
             return None
+
+        entry = self._token_entry(response)
+        if entry:
+            _local_installation_tokens[key] = entry
+            cache.set(key, entry, timeout=self._entry_timeout(entry))
+        return entry
+
+    # --------------------------------
+    # Async variants for ASGI views
+    # --------------------------------
+    async def aget_installation_token(self):
+        entry = await self._aget_installation_entry()
+        return entry["token"] if entry else None
+
+    async def aget_installation_permissions(self):
+        entry = await self._aget_installation_entry()
+        return entry["permissions"] if entry else None
+
+    async def _aget_installation_entry(self):
+        key = self._cache_key("token")
+        now = time.time()
+
+        entry = _local_installation_tokens.get(key)
+        if self._is_fresh(entry, now):
+            return entry
+
+        shared_entry = await cache.aget(key)
+        if self._is_fresh(shared_entry, now):
+            _local_installation_tokens[key] = shared_entry
+            return shared_entry
+        entry = shared_entry or entry
+
+        lock = _async_refresh_lock(self.github_installation_id)
+        if lock.locked() and self._is_usable(entry, now):
+            return entry
+
+        async with lock:
+            entry = _local_installation_tokens.get(key) or await cache.aget(key)
+            if self._is_fresh(entry, time.time()):
+                return entry
+
+            lock_key = self._cache_key("refresh-lock")
+            if await cache.aadd(lock_key, True, timeout=30):
+                try:
+                    return await self._amint_installation_token(key) or (
+                        entry if self._is_usable(entry, time.time()) else None
+                    )
+                finally:
+                    await cache.adelete(lock_key)
+
+            if self._is_usable(entry, time.time()):
+                return entry
+
+            deadline = time.time() + 30
+            while time.time() < deadline:
+                await asyncio.sleep(0.1)
+                entry = await cache.aget(key)
+                if self._is_usable(entry, time.time()):
+                    _local_installation_tokens[key] = entry
+                    return entry
+                if await cache.aget(lock_key) is None:
+                    break
+            return await self._amint_installation_token(key)
+
+    async def _amint_installation_token(self, key):
+        token_request = self._access_token_request()
+        if token_request is None:
+            return None
+        url, headers = token_request
+
+        try:
+            response = await get_async_transport().post(
+                url, endpoint="app.installation.access_tokens", headers=headers
+            )
+        except httpx.HTTPError as e:
+            logger.error("Error fetching installation token", extra={"error": str(e)})
+            return None
+
+        entry = self._token_entry(response)
+        if entry:
+            _local_installation_tokens[key] = entry
+            await cache.aset(key, entry, timeout=self._entry_timeout(entry))
+        return entry
+
+    def _parse_expires_at(self, expires_at):
+        """GitHub returns e.g. '2024-09-20T13:54:00Z'; fall back to the documented one hour"""
+        try:
+            return calendar.timegm(time.strptime(expires_at, "%Y-%m-%dT%H:%M:%SZ"))
+        except (TypeError, ValueError):
+            return time.time() + 3600
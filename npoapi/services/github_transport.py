@@ -0,0 +1,210 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from npoapi import metrics
+from .github_rate_limiter import scheduler
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Return this process's shared transport. Keyed by pid so gunicorn workers
+    forked from a preloaded master don't share sockets with it.
+    """
+    pid = os.getpid()
+    transport = _transports.get(pid)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(pid)
+            if transport is None:
+                transport = GitHubTransport()
+                _transports.clear()
+                _transports[pid] = transport
+    return transport
+
+
+class EndpointStats:
+    """Per-endpoint request, error, latency and size counters for one process"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, elapsed, status_code, size, attempt):
+        with self._lock:
+            stats = self._stats.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "seconds_total": 0.0,
+                    "seconds_max": 0.0,
+                    "bytes_total": 0,
+                    "status_codes": {},
+                },
+            )
+            stats["requests"] += 1
+            stats["retries"] += 1 if attempt else 0
+            stats["seconds_total"] += elapsed
+            stats["seconds_max"] = max(stats["seconds_max"], elapsed)
+            stats["bytes_total"] += size
+            if status_code is None or status_code >= 400:
+                stats["errors"] += 1
+            code = str(status_code or "error")
+            stats["status_codes"][code] = stats["status_codes"].get(code, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: dict(stats, status_codes=dict(stats["status_codes"]))
+                for endpoint, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Shared by the sync and async transports of this process
+endpoint_stats = EndpointStats()
+
+
+class BaseGitHubTransport:
+    """
+    Timeouts, retry policy and stats shared by the sync and async transports.
+    """
+
+    def __init__(self):
+        self.connect_timeout = settings.GITHUB_CONNECT_TIMEOUT
+        self.read_timeout = settings.GITHUB_READ_TIMEOUT
+        self.max_retries = settings.GITHUB_MAX_RETRIES
+        self.backoff = settings.GITHUB_RETRY_BACKOFF
+        self.max_retry_wait = settings.GITHUB_MAX_RETRY_WAIT
+        self.pool_maxsize = settings.GITHUB_POOL_MAXSIZE
+
+    def _endpoint(self, method, url, endpoint):
+        return endpoint or f"{method} {urlparse(url).path}"
+
+    def _retry_delay(self, method, response, attempt):
+        """Seconds to wait before retrying this response, or None to return it"""
+        if self._is_secondary_rate_limit(response):
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = int(retry_after)
+                return delay if delay <= self.max_retry_wait else None
+            return self._backoff_delay(attempt + 1)
+
+        if response.status_code in RETRYABLE_STATUS_CODES and method in IDEMPOTENT_METHODS:
+            return self._backoff_delay(attempt + 1)
+        return None
+
+    def _is_secondary_rate_limit(self, response):
+        if response.status_code not in (403, 429):
+            return False
+        if "Retry-After" in response.headers:
+            return True
+        return "secondary rate limit" in response.text.lower()
+
+    def _backoff_delay(self, attempt):
+        """Full jitter: anywhere between zero and the exponential backoff ceiling"""
+        return random.uniform(0, min(self.backoff * (2 ** attempt), self.max_retry_wait))
+
+    def _record(self, endpoint, elapsed, status_code, size, attempt):
+        endpoint_stats.record(endpoint, elapsed, status_code, size, attempt)
+        metrics.GITHUB_REQUESTS.inc(endpoint=endpoint, status=status_code or "error")
+        metrics.GITHUB_REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+
+    def snapshot(self):
+        """Per-endpoint latency, size and status counters for export"""
+        return endpoint_stats.snapshot()
+
+    def reset_stats(self):
+        endpoint_stats.reset()
+
+
+class GitHubTransport(BaseGitHubTransport):
+    """
+    Shared HTTP transport for every GitHub call: a keep-alive connection pool,
+    connect/read timeouts, retries with jittered backoff and per-endpoint stats.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.timeout = (self.connect_timeout, self.read_timeout)
+        self.session = self._build_session(self.pool_maxsize)
+
+    def _build_session(self, pool_maxsize):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url, endpoint=None, **kwargs):
+        return self.request("GET", url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        return self.request("POST", url, endpoint=endpoint, **kwargs)
+
+    def request(self, method, url, endpoint=None, priority=None, **kwargs):
+        """
+        Send a request, retrying 5xx responses, secondary rate limits and
+        connection failures. Non-idempotent requests are only retried when
+        GitHub cannot have acted on them (connect errors and rate limits).
+        priority: pace each attempt through the shared rate limit scheduler
+        (installation-token calls). Raises requests.RequestException once the
+        retries are used up, or RateLimitExceeded if no budget comes in time.
+        """
+        method = method.upper()
+        endpoint = self._endpoint(method, url, endpoint)
+        kwargs.setdefault("timeout", self.timeout)
+
+        attempt = 0
+        while True:
+            if priority is not None:
+                scheduler.acquire(priority)
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._record(endpoint, time.monotonic() - started, None, 0, attempt)
+                if attempt >= self.max_retries or not self._can_retry_exception(method, e):
+                    raise
+                attempt += 1
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            self._record(
+                endpoint,
+                time.monotonic() - started,
+                response.status_code,
+                len(response.content),
+                attempt,
+            )
+            if priority is not None:
+                scheduler.observe(response)
+
+            delay = self._retry_delay(method, response, attempt)
+            if delay is None or attempt >= self.max_retries:
+                return response
+            attempt += 1
+            time.sleep(delay)
+
+    def _can_retry_exception(self, method, exc):
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return method in IDEMPOTENT_METHODS or isinstance(
+                exc, requests.ConnectTimeout
+            )
+        return False
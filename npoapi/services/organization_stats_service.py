@@ -0,0 +1,171 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from npoapi.models import DeveloperProject, Organization, OrganizationStats, Project
+
+
+def _decrement(field):
+    # Never below zero, even if the row had drifted before a rebuild
+    return Greatest(F(field) - 1, Value(0))
+
+
+class OrganizationStatsService:
+    """
+    Keeps OrganizationStats in step with Project and DeveloperProject writes.
+
+    Changes are deltas applied with UPDATEs inside the caller's transaction:
+    ClaimService calls in for claims, the model signals in npoapi/signals.py
+    for project saves and deletes, and bulk writes call in themselves.
+    Claims touch the stats row first, which takes its row lock, so concurrent
+    claims in one organization see each other's rows when they check whether
+    a project or a developer had other claims. Cascades that drop several
+    claims at once (deleting a claimed project or a developer) refresh() the
+    organizations instead. Organizations without a stats row (e.g. bulk
+    inserted) are left alone until `manage.py rebuild_org_stats`.
+    """
+
+    def create(self, organization_id):
+        OrganizationStats.objects.get_or_create(organization_id=organization_id)
+
+    def projects_added(self, organization_ids):
+        """organization_ids: one per new project; new projects have no claims"""
+        now = timezone.now()
+        for organization_id, count in Counter(organization_ids).items():
+            OrganizationStats.objects.filter(pk=organization_id).update(
+                project_count=F("project_count") + count, updated_at=now
+            )
+
+    def project_removed(self, organization_id):
+        """A project without claims was deleted"""
+        OrganizationStats.objects.filter(pk=organization_id).update(
+            project_count=_decrement("project_count"), updated_at=timezone.now()
+        )
+
+    def claim_added(self, claim):
+        organization_id = self._organization_id(claim.project_id)
+        date = Value(claim.date_claimed, output_field=DateTimeField())
+        stats = OrganizationStats.objects.filter(pk=organization_id)
+        if not stats.update(
+            latest_claim_date=Greatest(Coalesce("latest_claim_date", date), date),
+            updated_at=timezone.now(),
+        ):
+            return
+
+        others = DeveloperProject.objects.exclude(pk=claim.pk)
+        first_on_project = not others.filter(project_id=claim.project_id).exists()
+        first_for_developer = not others.filter(
+            developer_id=claim.developer_id, project__organization_id=organization_id
+        ).exists()
+        if first_on_project or first_for_developer:
+            stats.update(
+                claimed_project_count=F("claimed_project_count")
+                + int(first_on_project),
+                active_developer_count=F("active_developer_count")
+                + int(first_for_developer),
+            )
+
+    def claim_removed(self, claim):
+        """claim: the DeveloperProject just deleted, the only one removed"""
+        organization_id = self._organization_id(claim.project_id)
+        stats = OrganizationStats.objects.filter(pk=organization_id)
+        if not stats.update(updated_at=timezone.now()):
+            return
+
+        claims = DeveloperProject.objects.filter(
+            project__organization_id=organization_id
+        )
+        changes = {}
+        if not claims.filter(project_id=claim.project_id).exists():
+            changes["claimed_project_count"] = _decrement("claimed_project_count")
+        if not claims.filter(developer_id=claim.developer_id).exists():
+            changes["active_developer_count"] = _decrement("active_developer_count")
+        latest = stats.values_list("latest_claim_date", flat=True).first()
+        if latest is None or claim.date_claimed >= latest:
+            # The latest claim went; only now is the organization's max needed
+            changes["latest_claim_date"] = claims.aggregate(
+                latest=Max("date_claimed")
+            )["latest"]
+        if changes:
+            stats.update(**changes)
+
+    def _organization_id(self, project_id):
+        return (
+            Project.objects.filter(pk=project_id)
+            .values_list("organization_id", flat=True)
+            .first()
+        )
+
+    def refresh(self, organization_ids=None, create=False, batch_size=500):
+        """
+        Recompute the stats of these organizations (all of them by default)
+        from Project and DeveloperProject: after a project moved, a cascade,
+        or in rebuild_org_stats. create: also insert missing rows; off inside
+        deletes, which may be about to delete the organization itself.
+        Returns the number of organizations refreshed.
+        """
+        if organization_ids is None:
+            organization_ids = Organization.objects.order_by("pk").values_list(
+                "pk", flat=True
+            )
+        organization_ids = [pk for pk in organization_ids if pk is not None]
+        for start in range(0, len(organization_ids), batch_size):
+            self._refresh_batch(organization_ids[start : start + batch_size], create)
+        return len(organization_ids)
+
+    def _refresh_batch(self, organization_ids, create):
+        with transaction.atomic():
+            projects = dict(
+                Project.objects.filter(organization_id__in=organization_ids)
+                .values("organization_id")
+                .annotate(count=Count("id"))
+                .values_list("organization_id", "count")
+            )
+            claims = {
+                row["project__organization_id"]: row
+                for row in DeveloperProject.objects.filter(
+                    project__organization_id__in=organization_ids
+                )
+                .values("project__organization_id")
+                .annotate(
+                    claimed=Count("project", distinct=True),
+                    developers=Count("developer", distinct=True),
+                    latest=Max("date_claimed"),
+                )
+            }
+            if create:
+                # Organizations deleted since their ids were read get no row
+                existing = Organization.objects.filter(pk__in=organization_ids)
+            else:
+                existing = OrganizationStats.objects.filter(pk__in=organization_ids)
+            now = timezone.now()
+            rows = []
+            for organization_id in existing.values_list("pk", flat=True):
+                claimed = claims.get(organization_id, {})
+                rows.append(
+                    OrganizationStats(
+                        organization_id=organization_id,
+                        project_count=projects.get(organization_id, 0),
+                        claimed_project_count=claimed.get("claimed", 0),
+                        active_developer_count=claimed.get("developers", 0),
+                        latest_claim_date=claimed.get("latest"),
+                        updated_at=now,
+                    )
+                )
+            fields = [
+                "project_count",
+                "claimed_project_count",
+                "active_developer_count",
+                "latest_claim_date",
+                "updated_at",
+            ]
+            if create:
+                OrganizationStats.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["organization"],
+                    update_fields=fields,
+                )
+            else:
+                OrganizationStats.objects.bulk_update(rows, fields)
@@ -0,0 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from npoapi.models import Project, ProvisioningJob
+from npoapi.signals import invalidate_projects
+from .github_rate_limiter import INTERACTIVE
+from .github_token_service import GitHubTokenService
+from .github_service import GitHubService
+
+
+class ProvisioningError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ProvisioningService:
+    """
+    Creates GitHub repositories for projects, either inline or from the
+    DB-backed job queue worked by `manage.py run_provisioner`.
+    """
+
+    def __init__(self, priority=INTERACTIVE):
+        """priority: of the GitHub calls; the job queue worker runs as BACKGROUND"""
+        self.priority = priority
+        self.lock_timeout = timedelta(seconds=settings.PROVISIONING_LOCK_TIMEOUT)
+        self.retry_backoff = settings.PROVISIONING_RETRY_BACKOFF
+        self.max_attempts = settings.PROVISIONING_MAX_ATTEMPTS
+
+    def create_repository(self, name, description):
+        """
+        Create the nss-npo repository and return its URL.
+        Raises ProvisioningError with the HTTP status the API should answer with.
+        """
+        github_service = GitHubService(
+            token=self._installation_token(), priority=self.priority
+        )
+        repo_url = github_service.create_github_repo(name=name, description=description)
+        if not repo_url:
+            raise ProvisioningError("Failed to create the GitHub repository.", 400)
+        return repo_url
+
+    def create_repositories(self, repositories):
+        """
+        Create several repositories concurrently, with one permission check and
+        one installation token for the whole batch.
+        repositories: list of (name, description) pairs.
+        Returns, in the same order, each repo URL or the ProvisioningError for it.
+        Raises ProvisioningError if the App can't create repositories at all.
+        """
+        github_service = GitHubService(
+            token=self._installation_token(), priority=self.priority
+        )
+
+        def create(repository):
+            name, description = repository
+            repo_url = github_service.create_github_repo(
+                name=name, description=description
+            )
+            if not repo_url:
+                return ProvisioningError("Failed to create the GitHub repository.", 400)
+            return repo_url
+
+        # Bounded by the transport's connection pool so threads don't queue for sockets
+        workers = min(
+            settings.BULK_PROVISIONING_CONCURRENCY, settings.GITHUB_POOL_MAXSIZE
+        )
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            return list(executor.map(create, repositories))
+
+    def _installation_token(self):
+        github_token_service = GitHubTokenService()
+
+        permissions = github_token_service.get_installation_permissions()
+        if not permissions:
+            raise ProvisioningError(
+                "GitHub App does not have the required permissions to create repositories.",
+                403,
+            )
+
+        installation_token = github_token_service.get_installation_token()
+        if not installation_token:
+            raise ProvisioningError("Unable to retrieve installation token.", 401)
+        return installation_token
+
+    async def acreate_repository(self, name, description):
+        """Async counterpart of create_repository for ASGI views"""
+        github_token_service = GitHubTokenService()
+
+        permissions = await github_token_service.aget_installation_permissions()
+        if not permissions:
+            raise ProvisioningError(
+                "GitHub App does not have the required permissions to create repositories.",
+                403,
+            )
+
+        installation_token = await github_token_service.aget_installation_token()
+        if not installation_token:
+            raise ProvisioningError("Unable to retrieve installation token.", 401)
+
+        github_service = GitHubService(token=installation_token, priority=self.priority)
+        repo_url = await github_service.acreate_github_repo(
+            name=name, description=description
+        )
+        if not repo_url:
+            raise ProvisioningError("Failed to create the GitHub repository.", 400)
+        return repo_url
+
+    def enqueue(self, project):
+        """Queue repository creation for a project that was saved without one"""
+        return ProvisioningJob.objects.create(
+            project=project, max_attempts=self.max_attempts
+        )
+
+    def enqueue_many(self, projects):
+        return ProvisioningJob.objects.bulk_create(
+            [
+                ProvisioningJob(project=project, max_attempts=self.max_attempts)
+                for project in projects
+            ]
+        )
+
+    def _claimable(self, now):
+        return Q(status=ProvisioningJob.PENDING, run_after__lte=now) | Q(
+            status=ProvisioningJob.RUNNING, locked_at__lt=now - self.lock_timeout
+        )
+
+    def claim_next_job(self, worker_id):
+        """
+        Lock the next due job for this worker. The conditional UPDATE means two
+        workers racing for the same row can't both win it.
+        """
+        now = timezone.now()
+        candidates = list(
+            ProvisioningJob.objects.filter(self._claimable(now))
+            .order_by("run_after", "id")
+            .values_list("id", flat=True)[:10]
+        )
+        for job_id in candidates:
+            claimed = (
+                ProvisioningJob.objects.filter(self._claimable(now), pk=job_id).update(
+                    status=ProvisioningJob.RUNNING,
+                    locked_by=worker_id,
+                    locked_at=now,
+                    attempts=F("attempts") + 1,
+                    updated_at=now,
+                )
+            )
+            if claimed:
+                return ProvisioningJob.objects.select_related("project").get(pk=job_id)
+        return None
+
+    def run_job(self, job):
+        """Create the repository for a claimed job and record the outcome"""
+        project = job.project
+        # A repository with the project's name that this job didn't create
+        # belongs to someone else: GitHub answers 422 and the attempt fails
+        repo_url = job.repository_url
+        if not repo_url:
+            try:
+                repo_url = self.create_repository(project.name, project.description)
+            except ProvisioningError as e:
+                self._record_failure(job, e.message)
+                return False
+            except Exception as e:
+                self._record_failure(job, f"{type(e).__name__}: {e}")
+                return False
+            # Committed on its own, before anything else can fail
+            ProvisioningJob.objects.filter(pk=job.pk).update(
+                repository_url=repo_url, updated_at=timezone.now()
+            )
+
+        with transaction.atomic():
+            Project.objects.filter(pk=project.pk).update(
+                repository_url=repo_url,
+                provisioning_status=Project.PROVISIONING_READY,
+                updated_at=timezone.now(),
+            )
+            ProvisioningJob.objects.filter(pk=job.pk).update(
+                status=ProvisioningJob.SUCCEEDED,
+                locked_by="",
+                locked_at=None,
+                last_error="",
+                updated_at=timezone.now(),
+            )
+        # The queryset updates skip the signals that drop cached responses
+        invalidate_projects([project.pk], [project.organization_id])
+        return True
+
+    def _record_failure(self, job, error):
+        now = timezone.now()
+        failed = job.attempts >= job.max_attempts
+        with transaction.atomic():
+            if failed:
+                Project.objects.filter(pk=job.project_id).update(
+                    provisioning_status=Project.PROVISIONING_FAILED, updated_at=now
+                )
+                status = ProvisioningJob.FAILED
+                run_after = now
+            else:
+                status = ProvisioningJob.PENDING
+                run_after = now + timedelta(
+                    seconds=self.retry_backoff * (2 ** (job.attempts - 1))
+                )
+            ProvisioningJob.objects.filter(pk=job.pk).update(
+                status=status,
+                run_after=run_after,
+                locked_by="",
+                locked_at=None,
+                last_error=error,
+                updated_at=now,
+            )
+        if failed:
+            invalidate_projects([job.project_id], [job.project.organization_id])
+
+    def run_next(self, worker_id):
+        """Claim and run one job; returns False when the queue has nothing due"""
+        job = self.claim_next_job(worker_id)
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
@@ -0,0 +1,189 @@
+import logging
+from urllib.parse import urlsplit
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from npoapi.models import GitHubRepository, GitHubRepositoryPage, Project
+from npoapi.signals import invalidate_projects
+from .github_rate_limiter import BACKGROUND
+from .github_service import GitHubService
+from .github_token_service import GitHubTokenService
+
+logger = logging.getLogger(__name__)
+
+ORG = "nss-npo"
+PER_PAGE = 100  # GitHub's maximum
+
+
+class MirrorSyncError(Exception):
+    pass
+
+
+def repository_name_from_url(url):
+    """The repository name of an https://github.com/nss-npo/<name> URL, or None"""
+    parts = urlsplit(url or "")
+    path = [part for part in parts.path.split("/") if part]
+    if parts.netloc.lower() != "github.com" or len(path) != 2:
+        return None
+    if path[0].lower() != ORG:
+        return None
+    return path[1].removesuffix(".git")
+
+
+class RepositoryMirrorService:
+    """
+    Keeps GitHubRepository in step with the nss-npo organization, and
+    Project.repository_url in step with the mirror.
+    """
+
+    def sync(self, full=False):
+        """
+        Walk the organization's repository listing. Pages are requested with
+        the ETag they had last time, so unchanged pages answer 304 and cost no
+        rate limit. Repositories missing from a complete walk are deleted from
+        the mirror. full: ignore the stored ETags and refetch every page.
+        Raises MirrorSyncError, leaving the mirror as it was, if a page fails.
+        """
+        token = GitHubTokenService().get_installation_token()
+        if not token:
+            raise MirrorSyncError("Unable to retrieve installation token.")
+        service = GitHubService(token=token, priority=BACKGROUND)
+        started = timezone.now()
+        stored = {page.page: page for page in GitHubRepositoryPage.objects.all()}
+        stats = {"pages": 0, "not_modified": 0, "updated": 0, "deleted": 0}
+
+        seen = set()
+        page = 1
+        while True:
+            previous = stored.get(page)
+            etag = previous.etag if previous is not None and not full else None
+            response = service.list_org_repositories(page, PER_PAGE, etag=etag)
+            if response is None:
+                raise MirrorSyncError(f"Page {page}: network error")
+            stats["pages"] += 1
+
+            if response.status_code == 304 and previous is not None:
+                stats["not_modified"] += 1
+                ids = previous.repository_ids
+            elif response.status_code == 200:
+                repositories = response.json()
+                ids = [repository["id"] for repository in repositories]
+                stats["updated"] += GitHubRepository.upsert(repositories)
+                GitHubRepositoryPage.objects.update_or_create(
+                    page=page,
+                    defaults={
+                        "etag": response.headers.get("ETag", ""),
+                        "repository_ids": ids,
+                        "fetched_at": timezone.now(),
+                    },
+                )
+            else:
+                raise MirrorSyncError(f"Page {page}: HTTP {response.status_code}")
+
+            seen.update(ids)
+            if len(ids) < PER_PAGE:
+                break
+            page += 1
+
+        # Only now is the listing known to be complete. Rows mirrored since the
+        # walk started (repositories created meanwhile) are kept.
+        with transaction.atomic():
+            GitHubRepositoryPage.objects.filter(page__gt=page).delete()
+            gone = GitHubRepository.objects.filter(synced_at__lt=started)
+            gone = list(set(gone.values_list("github_id", flat=True)) - seen)
+            for start in range(0, len(gone), 500):
+                GitHubRepository.objects.filter(
+                    github_id__in=gone[start : start + 500]
+                ).delete()
+        stats["deleted"] = len(gone)
+        stats["repositories"] = len(seen)
+        logger.info("Repository mirror synced", extra=stats)
+        return stats
+
+    def reconcile(self, dry_run=False, batch_size=500):
+        """
+        Fix projects whose repository drifted on GitHub, in batched updates:
+        renamed or transferred repositories get their new URL, and projects
+        whose repository was deleted lose the URL and are marked failed.
+        Projects are matched by github_repository_id, or by the name in their
+        URL until they have one. Only run after a complete sync().
+        """
+        if not GitHubRepository.objects.exists():
+            # An empty mirror would "delete" every repository
+            raise MirrorSyncError("The repository mirror is empty; sync it first.")
+
+        by_id = {}
+        by_name = {}
+        for github_id, name, html_url in GitHubRepository.objects.values_list(
+            "github_id", "name", "html_url"
+        ):
+            by_id[github_id] = (github_id, html_url)
+            by_name[name.lower()] = (github_id, html_url)
+
+        projects = (
+            Project.objects.filter(
+                Q(repository_url__gt="") | Q(github_repository_id__isnull=False)
+            )
+            .values_list(
+                "id", "organization_id", "repository_url", "github_repository_id"
+            )
+            .iterator(chunk_size=2000)
+        )
+        now = timezone.now()
+        changes = {"linked": 0, "moved": 0, "missing": 0}
+        changed = []
+        for project_id, organization_id, url, github_id in projects:
+            if github_id is not None:
+                repository = by_id.get(github_id)
+            else:
+                name = repository_name_from_url(url)
+                if name is None:
+                    continue  # Not an nss-npo repository; nothing to check
+                repository = by_name.get(name.lower())
+
+            project = Project(
+                pk=project_id,
+                organization_id=organization_id,
+                repository_url=url,
+                github_repository_id=github_id,
+                updated_at=now,
+            )
+            if repository is None:
+                project.repository_url = None
+                project.github_repository_id = None
+                project.provisioning_status = Project.PROVISIONING_FAILED
+                changes["missing"] += 1
+            elif repository != (github_id, url):
+                if url != repository[1]:
+                    changes["moved"] += 1
+                else:
+                    changes["linked"] += 1
+                project.github_repository_id, project.repository_url = repository
+                project.provisioning_status = Project.PROVISIONING_READY
+            else:
+                continue
+            changed.append(project)
+
+        if not dry_run:
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start : start + batch_size]
+                with transaction.atomic():
+                    Project.objects.bulk_update(
+                        batch,
+                        [
+                            "repository_url",
+                            "github_repository_id",
+                            "provisioning_status",
+                            "updated_at",
+                        ],
+                    )
+                # bulk_update skips the signals that invalidate cached responses
+                invalidate_projects(
+                    [project.pk for project in batch],
+                    {project.organization_id for project in batch},
+                )
+        logger.info(
+            "Projects reconciled with the repository mirror",
+            extra=dict(changes, dry_run=dry_run),
+        )
+        return changes, changed
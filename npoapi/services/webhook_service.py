@@ -0,0 +1,247 @@
+import hashlib
+import hmac
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from npoapi.models import Project, WebhookEvent
+from npoapi.signals import invalidate_projects
+
+logger = logging.getLogger(__name__)
+
+COUNT_FIELDS = ["repository_open_issues", "repository_stars"]
+METADATA_FIELDS = ["repository_pushed_at", *COUNT_FIELDS]
+EARLIEST = datetime.min.replace(tzinfo=dt_timezone.utc)
+
+
+def signature(body, secret):
+    """The X-Hub-Signature-256 header GitHub sends for this body"""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def _timestamp(value):
+    # Push events send Unix timestamps, every other event ISO 8601 strings
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError) as e:
+            raise ValueError(f"Invalid timestamp {value!r}") from e
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"Invalid timestamp {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _count(value):
+    if value is None or (
+        isinstance(value, int) and not isinstance(value, bool) and value >= 0
+    ):
+        return value
+    raise ValueError(f"Invalid count {value!r}")
+
+
+def _snapshot(repository):
+    """What one delivery reports about its repository; ValueError if malformed"""
+    html_url = repository.get("html_url")
+    return {
+        "html_url": html_url if isinstance(html_url, str) else None,
+        "updated_at": _timestamp(repository.get("updated_at")),
+        "repository_pushed_at": _timestamp(repository.get("pushed_at")),
+        "repository_open_issues": _count(repository.get("open_issues_count")),
+        "repository_stars": _count(repository.get("stargazers_count")),
+    }
+
+
+def _merge(latest, snapshot, order):
+    """
+    Fold a snapshot into the repository's so far. Deliveries can arrive out
+    of order: the latest push wins, and the URL and counts come from the
+    newest snapshot that has them, by GitHub's updated_at and then arrival.
+    Fields a delivery leaves out don't erase earlier values.
+    """
+    pushed_at = snapshot["repository_pushed_at"]
+    previous = latest.get("repository_pushed_at")
+    if pushed_at and (previous is None or pushed_at > previous):
+        latest["repository_pushed_at"] = pushed_at
+    order = (snapshot["updated_at"] or EARLIEST, order)
+    for field in ["html_url", *COUNT_FIELDS]:
+        value = snapshot[field]
+        if value is not None and (field not in latest or order > latest[field][0]):
+            latest[field] = (order, value)
+
+
+class WebhookEventService:
+    """
+    Queues GitHub webhook deliveries and applies the repository activity
+    they carry (last push, open issues, stars) to projects.
+    """
+
+    def verify(self, body, supplied):
+        """Whether `supplied` is the X-Hub-Signature-256 of body"""
+        secret = settings.GITHUB_WEBHOOK_SECRET
+        if not secret or not supplied:
+            return False
+        return hmac.compare_digest(signature(body, secret), supplied)
+
+    def record(self, delivery_id, event, payload):
+        """
+        Queue a delivery; redeliveries of a stored one are ignored. Only events
+        about a repository are kept, since that is all process() reads.
+        Returns whether the delivery was queued.
+        """
+        repository = payload.get("repository")
+        if not isinstance(repository, dict) or "id" not in repository:
+            return False
+        WebhookEvent.objects.bulk_create(
+            [
+                WebhookEvent(
+                    delivery_id=delivery_id,
+                    event=event,
+                    action=payload.get("action") or "",
+                    repository_id=repository["id"],
+                    payload=payload,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        return True
+
+    def process(self, batch_size=1000):
+        """
+        Apply the oldest batch of queued events. Events are coalesced per
+        repository first: each event carries a snapshot of the repository,
+        so a burst of 50 pushes is one update with the newest counts and the
+        latest push time. Projects are updated with one bulk_update, in the
+        transaction that marks the events processed; a batch that fails is
+        retried whole, which is safe as the update is a snapshot. Events with
+        a malformed payload are marked processed with an error instead, so
+        one of them can't hold up the queue.
+        Renames, transfers and deletions are left to
+        `manage.py sync_github_repositories`.
+        Returns {"events", "failed", "repositories", "projects"} counts.
+        """
+        with transaction.atomic():
+            events = list(
+                WebhookEvent.objects.filter(processed_at__isnull=True)
+                .order_by("id")
+                .values_list("id", "payload")[:batch_size]
+            )
+            if not events:
+                return {"events": 0, "failed": 0, "repositories": 0, "projects": 0}
+
+            activity, failed = {}, {}
+            for pk, payload in events:
+                try:
+                    repository = payload["repository"]
+                    snapshot = _snapshot(repository)
+                    _merge(activity.setdefault(repository["id"], {}), snapshot, pk)
+                except (AttributeError, KeyError, TypeError, ValueError) as e:
+                    failed[pk] = f"{type(e).__name__}: {e}"
+            changed = self._apply(activity)
+
+            now = timezone.now()
+            WebhookEvent.objects.filter(
+                pk__in=[pk for pk, _ in events if pk not in failed]
+            ).update(processed_at=now)
+            for pk, error in failed.items():
+                WebhookEvent.objects.filter(pk=pk).update(processed_at=now, error=error)
+                logger.warning(
+                    "Malformed webhook event", extra={"event": pk, "error": error}
+                )
+
+        if changed:
+            # bulk_update skips the signals that invalidate cached responses
+            invalidate_projects(
+                [project.pk for project in changed],
+                {project.organization_id for project in changed},
+            )
+        stats = {
+            "events": len(events),
+            "failed": len(failed),
+            "repositories": len(activity),
+            "projects": len(changed),
+        }
+        logger.info("Webhook events processed", extra=stats)
+        return stats
+
+    def _apply(self, activity):
+        """Update the projects of these repositories; returns the changed ones"""
+        urls = {
+            values["html_url"][1]: github_id
+            for github_id, values in activity.items()
+            if "html_url" in values
+        }
+        projects = Project.objects.filter(
+            Q(github_repository_id__in=activity)
+            # Not linked by id until the next sync_github_repositories
+            | Q(github_repository_id__isnull=True, repository_url__in=urls)
+        ).only(
+            "id",
+            "organization_id",
+            "github_repository_id",
+            "repository_url",
+            "repository_updated_at",
+            "updated_at",
+            *METADATA_FIELDS,
+        )
+
+        now = timezone.now()
+        saved, changed = [], []
+        for project in projects:
+            linked = project.github_repository_id is None
+            if linked:
+                project.github_repository_id = urls[project.repository_url]
+            values = activity[project.github_repository_id]
+            updates = {}
+            pushed_at = values.get("repository_pushed_at")
+            current = project.repository_pushed_at
+            # An older push than the one applied already is ignored
+            if pushed_at and (current is None or pushed_at > current):
+                updates["repository_pushed_at"] = pushed_at
+            applied = project.repository_updated_at
+            newest = applied
+            for field in COUNT_FIELDS:
+                if field not in values:
+                    continue
+                (updated_at, _), value = values[field]
+                if updated_at != EARLIEST:
+                    if applied and updated_at < applied:
+                        continue  # A snapshot older than the one applied already
+                    newest = max(filter(None, [newest, updated_at]))
+                if value != getattr(project, field):
+                    updates[field] = value
+            if not updates and not linked and newest == applied:
+                continue
+            for field, value in updates.items():
+                setattr(project, field, value)
+            project.repository_updated_at = newest
+            saved.append(project)
+            if updates or linked:
+                project.updated_at = now  # A new ETag for the changed representation
+                changed.append(project)
+
+        Project.objects.bulk_update(
+            saved,
+            [
+                "github_repository_id",
+                *METADATA_FIELDS,
+                "repository_updated_at",
+                "updated_at",
+            ],
+            batch_size=500,
+        )
+        return changed
+
+    def purge(self):
+        """Delete processed events older than WEBHOOK_EVENT_RETENTION"""
+        cutoff = timezone.now() - timedelta(seconds=settings.WEBHOOK_EVENT_RETENTION)
+        deleted, _ = WebhookEvent.objects.filter(processed_at__lt=cutoff).delete()
+        return deleted
@@ -0,0 +1,314 @@
+# npoapi/signals.py
+# Registered from NpoapiConfig.ready()
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import connections
+from django.db.models import Count, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_migrate,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token as DefaultToken
+from .auth_backends import (
+    ALL_PERMISSIONS_TAG,
+    invalidate_permissions,
+)
+from .authentication import forget_tokens, forget_user_tokens
+from .caching import bump_tags
+from .models import DeveloperProject, Organization, Project, Token
+from .search import drop_fts_triggers, install_fts_triggers
+from .services.organization_stats_service import OrganizationStatsService
+
+User = get_user_model()
+
+
+# --------------------------------
+# Response cache invalidation (npoapi/caching.py)
+# --------------------------------
+def _organization_user_ids(*organization_ids):
+    return set(
+        Organization.objects.filter(pk__in=[pk for pk in organization_ids if pk])
+        .exclude(user__isnull=True)
+        .values_list("user_id", flat=True)
+    )
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_organization(sender, instance, **kwargs):
+    # A project moved to another organization leaves the old owner's list too
+    instance._previous_organization_id = (
+        Project.objects.filter(pk=instance.pk)
+        .values_list("organization_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+def invalidate_projects(project_ids, organization_ids):
+    """Bump the tags for these projects; bulk writes call it since they skip signals"""
+    user_ids = _organization_user_ids(*organization_ids)
+    bump_tags(
+        "projects",
+        *[f"project:{pk}" for pk in project_ids],
+        *[f"user-projects:{user_id}" for user_id in user_ids],
+        # Every project or claim write can change its organization's stats
+        "organization-stats",
+        *[f"organization-stats:{pk}" for pk in organization_ids if pk],
+    )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_responses(sender, instance, **kwargs):
+    invalidate_projects(
+        [instance.pk],
+        [
+            instance.organization_id,
+            getattr(instance, "_previous_organization_id", None),
+        ],
+    )
+
+
+@receiver(pre_save, sender=Organization)
+def remember_organization_user(sender, instance, **kwargs):
+    instance._previous_user_id = (
+        Organization.objects.filter(pk=instance.pk)
+        .values_list("user_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_organization_responses(sender, instance, **kwargs):
+    user_ids = {instance.user_id, getattr(instance, "_previous_user_id", None)} - {None}
+    bump_tags(
+        "organizations",
+        f"organization:{instance.pk}",
+        *[f"user-organization:{user_id}" for user_id in user_ids],
+        # /projects/user-projects/ resolves the organization through its user
+        *[f"user-projects:{user_id}" for user_id in user_ids],
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_responses(sender, instance, **kwargs):
+    bump_tags("users", f"user:{instance.pk}")
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_group_responses(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if reverse:
+        # group.user_set changed: instance is the group, pk_set the users
+        user_ids = pk_set or set(instance.user_set.values_list("pk", flat=True))
+    else:
+        user_ids = {instance.pk}
+    bump_tags("users", *[f"user:{user_id}" for user_id in user_ids])
+
+
+# --------------------------------
+# Permission cache invalidation (npoapi/auth_backends.py)
+# --------------------------------
+def _m2m_targets(instance, action, reverse, pk_set, related_ids):
+    """
+    Ids of the forward side whose permissions changed, for an m2m_changed call.
+    A reverse clear() doesn't say which rows it removes, so they are read in
+    pre_clear and kept on the instance until post_clear.
+    """
+    if not reverse:
+        return {instance.pk}
+    if action == "pre_clear":
+        instance._cleared_ids = set(related_ids())
+    if action == "post_clear":
+        return getattr(instance, "_cleared_ids", set())
+    return set(pk_set or ())
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_group_permissions(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    user_ids = _m2m_targets(
+        instance,
+        action,
+        reverse,
+        pk_set,
+        lambda: instance.user_set.values_list("pk", flat=True),
+    )
+    if action.startswith("post_"):
+        invalidate_permissions(user_ids=user_ids)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    user_ids = _m2m_targets(
+        instance,
+        action,
+        reverse,
+        pk_set,
+        lambda: instance.user_set.values_list("pk", flat=True),
+    )
+    if action.startswith("post_"):
+        invalidate_permissions(user_ids=user_ids)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    group_ids = _m2m_targets(
+        instance,
+        action,
+        reverse,
+        pk_set,
+        lambda: instance.group_set.values_list("pk", flat=True),
+    )
+    if action.startswith("post_"):
+        invalidate_permissions(group_ids=group_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_flag_permissions(sender, instance, **kwargs):
+    # is_superuser and is_active decide what the backend returns
+    invalidate_permissions(user_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group_permissions(sender, instance, **kwargs):
+    invalidate_permissions(group_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_all_permissions(sender, instance, **kwargs):
+    bump_tags(ALL_PERMISSIONS_TAG)
+
+
+# --------------------------------
+# Cached token validations (npoapi/authentication.py)
+# --------------------------------
+@receiver(post_delete, sender=Token)
+@receiver(post_delete, sender=DefaultToken)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_saved_user_tokens(sender, instance, **kwargs):
+    # Cached validations carry a copy of the user's fields, e.g. is_active
+    forget_user_tokens(instance.pk)
+
+
+# --------------------------------
+# Organization statistics (services/organization_stats_service.py)
+# --------------------------------
+# Raw saves (loaddata) are skipped; run `manage.py rebuild_org_stats` after.
+@receiver(post_save, sender=Organization)
+def create_organization_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        OrganizationStatsService().create(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+def count_saved_project(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        OrganizationStatsService().projects_added([instance.organization_id])
+        return
+    previous = getattr(instance, "_previous_organization_id", None)
+    if previous is not None and previous != instance.organization_id:
+        # The project took its claims along
+        OrganizationStatsService().refresh([previous, instance.organization_id])
+
+
+@receiver(post_delete, sender=Project)
+def count_deleted_project(sender, instance, **kwargs):
+    if instance.claim_count:
+        # Its claims went first, in the same cascade
+        OrganizationStatsService().refresh([instance.organization_id])
+    else:
+        OrganizationStatsService().project_removed(instance.organization_id)
+
+
+def _cascaded_claim(instance, origin):
+    # ClaimService accounts for the claims it deletes, and count_deleted_project
+    # for a project's; this covers the rest, e.g. deleting a developer
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return not getattr(instance, "stats_counted", False) and model not in (
+        Project,
+        Organization,
+    )
+
+
+@receiver(pre_delete, sender=DeveloperProject)
+def collect_cascaded_claim(sender, instance, origin=None, **kwargs):
+    # One delete can drop many claims. The Collector sends every pre_delete
+    # before it deletes anything, so their projects are gathered on the object
+    # being deleted and counted once, by the first post_delete below.
+    if origin is not None and _cascaded_claim(instance, origin):
+        if not hasattr(origin, "_claimed_project_ids"):
+            origin._claimed_project_ids = set()
+        origin._claimed_project_ids.add(instance.project_id)
+
+
+@receiver(post_delete, sender=DeveloperProject)
+def count_cascaded_claims(sender, instance, origin=None, **kwargs):
+    # Still inside the delete's transaction, after all of its claims are gone
+    if origin is None:
+        project_ids = {instance.project_id} if _cascaded_claim(instance, origin) else ()
+    else:
+        project_ids = getattr(origin, "_claimed_project_ids", ())
+        origin._claimed_project_ids = set()
+    if project_ids:
+        recount_claims(project_ids)
+
+
+def recount_claims(project_ids):
+    """Bring claim_count and the stats back in line after a cascade removed claims"""
+    claims = (
+        DeveloperProject.objects.filter(project=OuterRef("pk"))
+        .values("project")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Project.objects.filter(pk__in=project_ids).update(
+        claim_count=Coalesce(Subquery(claims), 0), updated_at=timezone.now()
+    )
+    organization_ids = set(
+        Project.objects.filter(pk__in=project_ids).values_list(
+            "organization_id", flat=True
+        )
+    )
+    OrganizationStatsService().refresh(organization_ids)
+    # Queryset updates skip the signals that invalidate cached responses
+    invalidate_projects(project_ids, organization_ids)
+
+
+# --------------------------------
+# SQLite full-text index triggers (npoapi/search.py)
+# --------------------------------
+@receiver(pre_migrate)
+def drop_search_triggers(sender, app_config, using, plan=None, **kwargs):
+    if app_config.name == "npoapi" and plan:
+        drop_fts_triggers(connections[using])
+
+
+@receiver(post_migrate)
+def install_search_triggers(sender, app_config, using, **kwargs):
+    if app_config.name == "npoapi":
+        install_fts_triggers(connections[using])
@@ -1,3 +1,619 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from npoapi import authentication
+from npoapi.github_fake import FakeGitHub, install_fake_github
+from npoapi.models import (
+    Developer,
+    DeveloperProject,
+    Organization,
+    OrganizationStats,
+    Project,
+    ProvisioningJob,
+    Token,
+    WebhookEvent,
+)
+from npoapi.services.claim_service import ClaimError, ClaimService
+from npoapi.services.provisioning_service import ProvisioningService
+from npoapi.services.webhook_service import WebhookEventService, signature
 
-# Create your tests here.
+User = get_user_model()
+
+
+def create_organization(name="Helping Hands", user=None):
+    return Organization.objects.create(
+        name=name,
+        website="https://example.org",
+        address="1 Main St",
+        city="Nashville",
+        state="TN",
+        user=user,
+    )
+
+
+def create_project(organization, name, **fields):
+    return Project.objects.create(
+        organization=organization, name=name, description="A project", **fields
+    )
+
+
+def create_developer(username):
+    return Developer.objects.create(user=User.objects.create_user(username))
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        # Response cache, tag versions and token validations live in the cache
+        cache.clear()
+        authentication._local.clear()
+        self.client = APIClient()
+
+
+# --------------------------------
+# Users and tokens (npoapi/authentication.py)
+# --------------------------------
+class UserLogoutTests(APITestCase):
+    def test_anonymous_logout_is_rejected(self):
+        response = self.client.post("/users/logout/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_the_token(self):
+        user = User.objects.create_user("alice", password="secret")
+        token = Token.issue(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = self.client.post("/users/logout/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Token.objects.filter(user=user).exists())
+        self.assertEqual(self.client.get("/users/").status_code, 401)
+
+
+@override_settings(TOKEN_TTL=3600, TOKEN_ROTATE_AFTER=600, TOKEN_ROTATION_GRACE=60)
+class TokenRotationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("alice", password="secret")
+
+    def issue(self, age):
+        token = Token.issue(self.user)
+        Token.objects.filter(pk=token.pk).update(
+            created=timezone.now() - timedelta(seconds=age)
+        )
+        return token.key
+
+    def get(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+        return self.client.get("/users/")
+
+    def test_fresh_token_is_not_rotated(self):
+        key = self.issue(age=0)
+        response = self.get(key)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(authentication.ROTATED_TOKEN_HEADER, response)
+
+    def test_old_token_is_rotated_and_kept_for_the_grace_period(self):
+        old_key = self.issue(age=601)
+
+        response = self.get(old_key)
+
+        self.assertEqual(response.status_code, 200)
+        new_key = response[authentication.ROTATED_TOKEN_HEADER]
+        self.assertNotEqual(new_key, old_key)
+        self.assertEqual(Token.objects.get(user=self.user).key, new_key)
+        # Requests already in flight with the old key still get through
+        self.assertEqual(self.get(old_key).status_code, 200)
+        self.assertEqual(self.get(new_key).status_code, 200)
+
+    def test_logout_revokes_the_rotated_away_key(self):
+        old_key = self.issue(age=601)
+        new_key = self.get(old_key)[authentication.ROTATED_TOKEN_HEADER]
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {new_key}")
+        self.assertEqual(self.client.post("/users/logout/").status_code, 200)
+
+        self.assertEqual(self.get(new_key).status_code, 401)
+        self.assertEqual(self.get(old_key).status_code, 401)
+
+    def test_grace_period_ends(self):
+        old_key = self.issue(age=601)
+        self.get(old_key)
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch("npoapi.authentication.timezone.now", return_value=later):
+            self.assertEqual(self.get(old_key).status_code, 401)
+
+    def test_expired_token_is_rejected_and_deleted(self):
+        key = self.issue(age=3601)
+        self.assertEqual(self.get(key).status_code, 401)
+        self.assertFalse(Token.objects.filter(key=key).exists())
+
+    def test_deactivating_the_user_drops_cached_validations(self):
+        key = self.issue(age=0)
+        self.assertEqual(self.get(key).status_code, 200)  # Now cached
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get(key).status_code, 401)
+
+
+# --------------------------------
+# Claims (services/claim_service.py)
+# --------------------------------
+class ClaimTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.organization = create_organization()
+        self.project = create_project(self.organization, "Food Bank", max_claimers=1)
+        self.developer = create_developer("dev")
+        self.other = create_developer("other")
+
+    def post(self, developer, action):
+        self.client.force_authenticate(developer.user)
+        return self.client.post(f"/projects/{self.project.pk}/{action}/")
+
+    def assertClaimCount(self, expected):
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.claim_count, expected)
+        self.assertEqual(
+            DeveloperProject.objects.filter(project=self.project).count(), expected
+        )
+
+    def test_claims_stop_at_max_claimers(self):
+        response = self.post(self.developer, "claim")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["claim_count"], 1)
+
+        response = self.post(self.other, "claim")
+        self.assertEqual(response.status_code, 409)
+        self.assertClaimCount(1)
+
+    def test_claiming_twice_is_rejected(self):
+        self.project.max_claimers = 2
+        self.project.save()
+        self.post(self.developer, "claim")
+        self.assertEqual(self.post(self.developer, "claim").status_code, 409)
+        self.assertClaimCount(1)
+
+    def test_unclaim_frees_the_spot(self):
+        self.post(self.developer, "claim")
+        self.assertEqual(self.post(self.developer, "unclaim").status_code, 200)
+        self.assertClaimCount(0)
+        self.assertEqual(self.post(self.other, "claim").status_code, 201)
+
+    def test_unclaim_without_a_claim_is_not_found(self):
+        self.assertEqual(self.post(self.developer, "unclaim").status_code, 404)
+        self.assertClaimCount(0)
+
+
+class ClaimCascadeTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizations = [create_organization(f"Org {i}") for i in range(2)]
+        self.projects = [
+            create_project(self.organizations[i % 2], f"Project {i}", max_claimers=1)
+            for i in range(4)
+        ]
+        self.developer = create_developer("dev")
+        self.other = create_developer("other")
+        for project in self.projects:
+            ClaimService().claim(project.pk, self.developer)
+
+    def assertFreed(self):
+        for project in Project.objects.all():
+            self.assertEqual(project.claim_count, 0)
+        # The spots are free again
+        ClaimService().claim(self.projects[0].pk, self.other)
+        for organization in self.organizations:
+            stats = OrganizationStats.objects.get(pk=organization.pk)
+            self.assertEqual(stats.project_count, 2)
+            expected = 1 if organization == self.organizations[0] else 0
+            self.assertEqual(stats.claimed_project_count, expected)
+            self.assertEqual(stats.active_developer_count, expected)
+
+    def test_deleting_the_developer_frees_their_spots(self):
+        Developer.objects.filter(pk=self.developer.pk).delete()
+        self.assertFreed()
+
+    def test_deleting_the_user_frees_their_spots(self):
+        self.developer.user.delete()
+        self.assertFreed()
+
+    def test_deleting_claims_by_queryset_frees_the_spots(self):
+        DeveloperProject.objects.filter(developer=self.developer).delete()
+        self.assertFreed()
+
+    def test_cached_responses_see_the_freed_spots(self):
+        admin = User.objects.create_superuser("admin", "admin@example.org", "pw")
+        self.client.force_authenticate(admin)
+        url = f"/projects/{self.projects[0].pk}/"
+        stats_url = f"/organizations/{self.organizations[0].pk}/stats/"
+        self.assertEqual(self.client.get(url).data["claim_count"], 1)
+        self.assertEqual(self.client.get(stats_url).data["active_developer_count"], 1)
+
+        self.developer.user.delete()
+
+        self.assertEqual(self.client.get(url).data["claim_count"], 0)
+        self.assertEqual(self.client.get(stats_url).data["active_developer_count"], 0)
+
+
+class ClaimRaceTests(TransactionTestCase):
+    """Threads with their own connections, so each claim is its own transaction"""
+
+    def race(self, operation, arguments):
+        barrier = threading.Barrier(len(arguments))
+        outcomes = []
+
+        def work(*args):
+            barrier.wait()  # Release every thread at once
+            try:
+                operation(*args)
+                outcomes.append("ok")
+            except ClaimError as e:
+                outcomes.append(e.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=args) for args in arguments]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_claims_never_oversell(self):
+        project = create_project(create_organization(), "Shelter", max_claimers=2)
+        developers = [create_developer(f"dev-{i}") for i in range(10)]
+
+        outcomes = self.race(
+            ClaimService().claim, [(project.pk, developer) for developer in developers]
+        )
+
+        self.assertEqual(outcomes.count("ok"), 2)
+        self.assertEqual(outcomes.count(409), 8)
+        project.refresh_from_db()
+        self.assertEqual(project.claim_count, 2)
+        self.assertEqual(DeveloperProject.objects.filter(project=project).count(), 2)
+
+    def test_concurrent_unclaims_release_one_spot(self):
+        project = create_project(create_organization(), "Shelter", max_claimers=2)
+        developer = create_developer("dev")
+        ClaimService().claim(project.pk, developer)
+
+        outcomes = self.race(ClaimService().unclaim, [(project.pk, developer)] * 4)
+
+        self.assertEqual(outcomes.count("ok"), 1)
+        self.assertEqual(outcomes.count(404), 3)
+        project.refresh_from_db()
+        self.assertEqual(project.claim_count, 0)
+
+
+# --------------------------------
+# Keyset pagination (npoapi/pagination.py)
+# --------------------------------
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        organization = create_organization()
+        for name in ["Delta", "alpha", "Echo", "bravo", "Charlie"]:
+            create_project(organization, name)
+        self.client.force_authenticate(User.objects.create_user("alice"))
+
+    def walk(self, url):
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [project["name"] for project in response.data["projects"]]
+            url = response.data["next"]
+        return names
+
+    def test_pages_cover_every_row_once_in_id_order(self):
+        names = self.walk("/projects/?page_size=2")
+        self.assertEqual(names, ["Delta", "alpha", "Echo", "bravo", "Charlie"])
+
+    def test_descending_ordering(self):
+        names = self.walk("/projects/?page_size=2&ordering=-name")
+        self.assertEqual(names, sorted(names, reverse=True))
+        self.assertEqual(len(names), 5)
+
+    def test_rows_inserted_before_the_cursor_do_not_shift_the_next_page(self):
+        first = self.client.get("/projects/?page_size=2&ordering=name")
+        create_project(Organization.objects.get(), "Aardvark")
+        second = self.client.get(first.data["next"])
+        names = [project["name"] for project in first.data["projects"]]
+        names += [project["name"] for project in second.data["projects"]]
+        self.assertEqual(len(set(names)), 4)
+
+    def test_total_only_when_asked(self):
+        self.assertNotIn("total", self.client.get("/projects/").data)
+        response = self.client.get("/projects/?page_size=2&include_total=true")
+        self.assertEqual(response.data["total"], 5)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get("/projects/?cursor=nonsense").status_code, 404)
+
+    def test_cursor_from_another_ordering_is_not_found(self):
+        next_url = self.client.get("/projects/?page_size=2").data["next"]
+        response = self.client.get(next_url + "&ordering=-name")
+        self.assertEqual(response.status_code, 404)
+
+
+# --------------------------------
+# Conditional GET (npoapi/conditional.py)
+# --------------------------------
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.organization = create_organization()
+        self.projects = [
+            create_project(self.organization, f"Project {i}") for i in range(3)
+        ]
+        self.client.force_authenticate(User.objects.create_user("alice"))
+
+    def later(self, seconds=5):
+        # Tag versions date Last-Modified; HTTP dates only have whole seconds
+        now = time.time_ns() + seconds * 10**9
+        return mock.patch("npoapi.caching.time.time_ns", return_value=now)
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get("/projects/")
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response = self.client.get("/projects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        response = self.client.get("/projects/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unchanged_project_is_not_modified(self):
+        url = f"/projects/{self.projects[0].pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_update_changes_the_validators(self):
+        etag = self.client.get("/projects/")["ETag"]
+        self.projects[2].description = "Changed"
+        self.projects[2].save()
+        response = self.client.get("/projects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_changes_the_validators(self):
+        response = self.client.get("/projects/")
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        # The oldest row: max(updated_at) stays the same
+        with self.later():
+            self.projects[0].delete()
+
+        response = self.client.get("/projects/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["projects"]), 2)
+        response = self.client.get("/projects/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cascaded_claim_delete_changes_the_stats_validators(self):
+        url = f"/organizations/{self.organization.pk}/stats/"
+        admin = User.objects.create_superuser("admin", "admin@example.org", "pw")
+        self.client.force_authenticate(admin)
+        etag = self.client.get(url)["ETag"]
+
+        developer = create_developer("dev")
+        with self.later():
+            ClaimService().claim(self.projects[0].pk, developer)
+            developer.user.delete()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+# --------------------------------
+# GitHub webhooks (services/webhook_service.py)
+# --------------------------------
+@override_settings(GITHUB_WEBHOOK_SECRET="webhook-secret")
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.project = create_project(
+            create_organization(),
+            "Pantry",
+            repository_url="https://github.com/nss-npo/pantry",
+        )
+
+    def deliver(self, payload, delivery_id="1", secret="webhook-secret", event="push"):
+        body = json.dumps(payload).encode()
+        return self.client.post(
+            "/github/webhook/",
+            body,
+            content_type="application/json",
+            HTTP_X_HUB_SIGNATURE_256=signature(body, secret),
+            HTTP_X_GITHUB_EVENT=event,
+            HTTP_X_GITHUB_DELIVERY=delivery_id,
+        )
+
+    def repository(self, updated_at, stars, pushed_at=None):
+        return {
+            "repository": {
+                "id": 42,
+                "html_url": "https://github.com/nss-npo/pantry",
+                "updated_at": updated_at,
+                "pushed_at": pushed_at,
+                "open_issues_count": 1,
+                "stargazers_count": stars,
+            }
+        }
+
+    def test_valid_signature_is_queued(self):
+        response = self.deliver(self.repository("2026-01-01T00:00:00Z", 1))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_wrong_signature_is_rejected(self):
+        response = self.deliver(self.repository("2026-01-01T00:00:00Z", 1), secret="x")
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_missing_signature_is_rejected(self):
+        response = self.client.post(
+            "/github/webhook/",
+            json.dumps(self.repository("2026-01-01T00:00:00Z", 1)),
+            content_type="application/json",
+            HTTP_X_GITHUB_DELIVERY="1",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(GITHUB_WEBHOOK_SECRET="")
+    def test_nothing_is_accepted_without_a_secret(self):
+        response = self.deliver(self.repository("2026-01-01T00:00:00Z", 1), secret="")
+        self.assertEqual(response.status_code, 401)
+
+    def test_redelivery_is_stored_once(self):
+        payload = self.repository("2026-01-01T00:00:00Z", 1)
+        self.deliver(payload, delivery_id="abc")
+        self.deliver(payload, delivery_id="abc")
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_a_burst_is_coalesced_into_one_update(self):
+        # Out of order: the newest snapshot (stars=7) arrives in the middle
+        self.deliver(
+            self.repository("2026-01-01T10:00:00Z", 5, 1767261600), delivery_id="1"
+        )
+        self.deliver(
+            self.repository("2026-01-01T12:00:00Z", 7, 1767268800), delivery_id="2"
+        )
+        self.deliver(
+            self.repository("2026-01-01T11:00:00Z", 6, 1767265200), delivery_id="3"
+        )
+
+        stats = WebhookEventService().process()
+
+        self.assertEqual(
+            stats, {"events": 3, "failed": 0, "repositories": 1, "projects": 1}
+        )
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.repository_stars, 7)
+        self.assertEqual(self.project.github_repository_id, 42)
+        self.assertEqual(self.project.repository_pushed_at.hour, 12)
+        unprocessed = WebhookEvent.objects.filter(processed_at__isnull=True)
+        self.assertFalse(unprocessed.exists())
+
+    def test_an_older_snapshot_processed_later_is_ignored(self):
+        self.deliver(self.repository("2026-01-01T12:00:00Z", 7), delivery_id="1")
+        WebhookEventService().process()
+        self.deliver(self.repository("2026-01-01T10:00:00Z", 5), delivery_id="2")
+        WebhookEventService().process()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.repository_stars, 7)
+
+    def test_malformed_event_is_set_aside(self):
+        self.deliver(self.repository("not a date", 3), delivery_id="1")
+        self.deliver(self.repository("2026-01-01T10:00:00Z", 4), delivery_id="2")
+
+        stats = WebhookEventService().process()
+
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["projects"], 1)
+        failed = WebhookEvent.objects.get(delivery_id="1")
+        self.assertIsNotNone(failed.processed_at)
+        self.assertIn("ValueError", failed.error)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.repository_stars, 4)
+
+
+# --------------------------------
+# Repository provisioning queue (services/provisioning_service.py)
+# --------------------------------
+@override_settings(PROVISIONING_RETRY_BACKOFF=30, PROVISIONING_MAX_ATTEMPTS=3)
+class ProvisioningTests(TestCase):
+    def setUp(self):
+        self.fake_github = install_fake_github(FakeGitHub())
+        self.fake = self.fake_github.__enter__()
+        self.addCleanup(self.fake_github.__exit__, None, None, None)
+        self.organization = create_organization()
+        self.service = ProvisioningService()
+
+    def enqueue(self, name):
+        project = create_project(
+            self.organization, name, provisioning_status=Project.PROVISIONING_PENDING
+        )
+        return project, self.service.enqueue(project)
+
+    def make_due(self, job):
+        ProvisioningJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+    def test_job_creates_the_repository(self):
+        project, job = self.enqueue("Garden")
+
+        self.assertTrue(self.service.run_next("worker"))
+
+        project.refresh_from_db()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProvisioningJob.SUCCEEDED)
+        self.assertEqual(project.provisioning_status, Project.PROVISIONING_READY)
+        self.assertEqual(project.repository_url, "https://github.com/nss-npo/Garden")
+        self.assertFalse(self.service.run_next("worker"))
+
+    def test_failures_back_off_exponentially_then_give_up(self):
+        # Someone else's repository has the name: GitHub answers 422
+        self.service.create_repository("Garden", "Not ours")
+        project, job = self.enqueue("Garden")
+
+        started = timezone.now()
+        self.assertTrue(self.service.run_next("worker"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProvisioningJob.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertNotEqual(job.last_error, "")
+        self.assertAlmostEqual((job.run_after - started).total_seconds(), 30, delta=5)
+        # Not due yet
+        self.assertFalse(self.service.run_next("worker"))
+
+        self.make_due(job)
+        started = timezone.now()
+        self.service.run_next("worker")
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        self.assertAlmostEqual((job.run_after - started).total_seconds(), 60, delta=5)
+
+        self.make_due(job)
+        self.service.run_next("worker")
+        job.refresh_from_db()
+        project.refresh_from_db()
+        self.assertEqual(job.status, ProvisioningJob.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(project.provisioning_status, Project.PROVISIONING_FAILED)
+        self.assertFalse(self.service.run_next("worker"))
+
+    def test_retry_reuses_the_repository_the_job_created(self):
+        project, job = self.enqueue("Garden")
+        ProvisioningJob.objects.filter(pk=job.pk).update(
+            repository_url="https://github.com/nss-npo/Garden"
+        )
+        self.service.create_repository("Garden", "Created by the first attempt")
+
+        self.service.run_next("worker")
+
+        project.refresh_from_db()
+        self.assertEqual(project.provisioning_status, Project.PROVISIONING_READY)
+        self.assertEqual(project.repository_url, "https://github.com/nss-npo/Garden")
+
+    def test_stuck_job_is_taken_over(self):
+        project, job = self.enqueue("Garden")
+        self.service.claim_next_job("crashed-worker")
+        self.assertIsNone(self.service.claim_next_job("worker"))
+
+        ProvisioningJob.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - self.service.lock_timeout - timedelta(seconds=1)
+        )
+
+        taken = self.service.claim_next_job("worker")
+        self.assertEqual(taken.pk, job.pk)
+        self.assertEqual(taken.attempts, 2)
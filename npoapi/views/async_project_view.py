@@ -0,0 +1,110 @@
+import logging
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from npoapi.models import Project
+from npoapi.serializers import ProjectSerializer
+from npoapi.services.provisioning_service import ProvisioningService, ProvisioningError
+
+logger = logging.getLogger(__name__)
+
+
+def _authenticate_and_validate(request):
+    """
+    Run DRF authentication (token or session, including its CSRF check) and
+    serializer validation. Both touch the database, so this runs in a thread.
+    """
+    drf_request = Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[
+            auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    if not drf_request.user or not drf_request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+
+    serializer = ProjectSerializer(
+        data=drf_request.data, context={"request": drf_request}
+    )
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def _create_pending_project(project_data):
+    with transaction.atomic():
+        project = Project.objects.create(
+            **project_data, provisioning_status=Project.PROVISIONING_PENDING
+        )
+        ProvisioningService().enqueue(project)
+    return project
+
+
+def _create_project(project_data, repo_url):
+    # One transaction with its organization's stats, as in the sync create
+    with transaction.atomic():
+        project = Project.objects.create(**project_data, repository_url=repo_url)
+    logger.info(
+        "Project created", extra={"project": project.pk, "repository": repo_url}
+    )
+    return project
+
+
+# Django 4.2's csrf_exempt wraps the view in a plain function, so it is marked
+# as a coroutine function again. SessionAuthentication enforces CSRF itself, as
+# for the viewsets.
+@markcoroutinefunction
+@csrf_exempt
+async def async_create_project(request):
+    """
+    Async version of POST /projects/. The GitHub calls are awaited on the
+    event loop, so under ASGI one worker can have many creations in flight.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        project_data = await sync_to_async(_authenticate_and_validate)(request)
+    except exceptions.APIException as e:
+        detail = e.detail if isinstance(e.detail, (list, dict)) else {"detail": e.detail}
+        return JsonResponse(detail, status=e.status_code, safe=False)
+
+    if settings.ASYNC_PROJECT_PROVISIONING:
+        project = await sync_to_async(_create_pending_project)(project_data)
+        return JsonResponse(
+            {
+                "message": "Project created. GitHub repository is being provisioned.",
+                "project": ProjectSerializer(project).data,
+                "provisioning_url": request.build_absolute_uri(
+                    reverse("project-provisioning", args=[project.pk])
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    try:
+        repo_url = await ProvisioningService().acreate_repository(
+            name=project_data["name"], description=project_data["description"]
+        )
+    except ProvisioningError as e:
+        logger.warning(
+            "Failed to create GitHub repository",
+            extra={"project": project_data["name"], "error": e.message},
+        )
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
+    project = await sync_to_async(_create_project)(project_data, repo_url)
+    return JsonResponse(
+        {
+            "message": "Project created and GitHub repository created.",
+            "project": ProjectSerializer(project).data,
+            "github_repo": repo_url,
+        },
+        status=status.HTTP_201_CREATED,
+    )
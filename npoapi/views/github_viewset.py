@@ -1,3 +1,4 @@
+import logging
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.http import HttpResponse
@@ -5,6 +6,13 @@ from django.conf import settings
 from django.contrib.auth import login as auth_login, get_user_model
 from requests_oauthlib import OAuth2Session
 from datetime import timedelta
+from asgiref.sync import sync_to_async
+import httpx
+import requests
+from npoapi.services.github_transport import get_transport
+from npoapi.services.github_async_transport import get_async_transport
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -17,7 +25,7 @@ def github_login(request):
         scope=["repo", "user"],
     )
     authorization_url, state = oauth.authorization_url(
-        "https://github.com/login/oauth/authorize"
+        f"{settings.GITHUB_OAUTH_URL}/login/oauth/authorize"
     )
     request.session["oauth_state"] = state
     return redirect(authorization_url)
@@ -35,25 +43,40 @@ def github_callback(request):
     if state != session_state:
         return HttpResponse("Invalid state", status=400)
 
-    oauth = OAuth2Session(
-        settings.GITHUB_CLIENT_ID,
-        redirect_uri=settings.GITHUB_REDIRECT_URI,
-        state=state,
-    )
-    token_url = "https://github.com/login/oauth/access_token"
-    token_response = oauth.fetch_token(
-        token_url,
-        client_secret=settings.GITHUB_CLIENT_SECRET,
-        code=code,
-        include_client_id=True,
-    )
+    transport = get_transport()
+    token_url = f"{settings.GITHUB_OAUTH_URL}/login/oauth/access_token"
+    try:
+        token_response = transport.post(
+            token_url,
+            endpoint="oauth.access_token",
+            data={
+                "client_id": settings.GITHUB_CLIENT_ID,
+                "client_secret": settings.GITHUB_CLIENT_SECRET,
+                "code": code,
+                "redirect_uri": settings.GITHUB_REDIRECT_URI,
+                "state": state,
+            },
+            headers={"Accept": "application/json"},
+        ).json()
+    except (requests.RequestException, ValueError):
+        return HttpResponse("Unable to reach GitHub", status=502)
 
-    print("Token Response:", token_response)  # <-- Debugging: Print the token
+    if "access_token" not in token_response:
+        return HttpResponse("GitHub did not return an access token", status=400)
 
     # Fetch user info
-    user_info_url = "https://api.github.com/user"
-    oauth = OAuth2Session(settings.GITHUB_CLIENT_ID, token=token_response)
-    user_info = oauth.get(user_info_url).json()
+    user_info_url = f"{settings.GITHUB_API_URL}/user"
+    try:
+        user_info = transport.get(
+            user_info_url,
+            endpoint="user",
+            headers={
+                "Authorization": f"Bearer {token_response['access_token']}",
+                "Accept": "application/vnd.github.v3+json",
+            },
+        ).json()
+    except (requests.RequestException, ValueError):
+        return HttpResponse("Unable to reach GitHub", status=502)
 
     # Find or create the user
     user, created = User.objects.get_or_create(
@@ -75,6 +98,98 @@ def github_callback(request):
         httponly=True,  # Prevent access via JavaScript
         secure=False,  # Use True for HTTPS, False for local development (adjust as necessary)
     )
-    print("OAuth token set in cookie:", response.cookies.get("oauth_token"))
+    logger.info("GitHub login", extra={"user": user.pk, "new_user": created})
 
     return response  # Ensure this is inside the function
+
+
+# --------------------------------
+# Async variants, used when ASYNC_GITHUB_VIEWS is on and the app runs under ASGI
+# --------------------------------
+async def async_github_login(request):
+    """Redirects to GitHub for authentication without blocking a worker thread."""
+    oauth = OAuth2Session(
+        settings.GITHUB_CLIENT_ID,
+        redirect_uri=settings.GITHUB_REDIRECT_URI,
+        scope=["repo", "user"],
+    )
+    authorization_url, state = oauth.authorization_url(
+        f"{settings.GITHUB_OAUTH_URL}/login/oauth/authorize"
+    )
+    # Session access loads from the database, so it has to run off the event loop
+    await sync_to_async(request.session.__setitem__)("oauth_state", state)
+    return redirect(authorization_url)
+
+
+async def async_github_callback(request):
+    """Handles the GitHub callback with non-blocking HTTP calls and logs in the user."""
+    state = request.GET.get("state")
+    code = request.GET.get("code")
+
+    if not state or not code:
+        return HttpResponse("Missing state or code", status=400)
+
+    session_state = await sync_to_async(request.session.get)("oauth_state")
+    if state != session_state:
+        return HttpResponse("Invalid state", status=400)
+
+    transport = get_async_transport()
+    token_url = f"{settings.GITHUB_OAUTH_URL}/login/oauth/access_token"
+    try:
+        token_response = (
+            await transport.post(
+                token_url,
+                endpoint="oauth.access_token",
+                data={
+                    "client_id": settings.GITHUB_CLIENT_ID,
+                    "client_secret": settings.GITHUB_CLIENT_SECRET,
+                    "code": code,
+                    "redirect_uri": settings.GITHUB_REDIRECT_URI,
+                    "state": state,
+                },
+                headers={"Accept": "application/json"},
+            )
+        ).json()
+    except (httpx.HTTPError, ValueError):
+        return HttpResponse("Unable to reach GitHub", status=502)
+
+    if "access_token" not in token_response:
+        return HttpResponse("GitHub did not return an access token", status=400)
+
+    # Fetch user info
+    try:
+        user_info = (
+            await transport.get(
+                f"{settings.GITHUB_API_URL}/user",
+                endpoint="user",
+                headers={
+                    "Authorization": f"Bearer {token_response['access_token']}",
+                    "Accept": "application/vnd.github.v3+json",
+                },
+            )
+        ).json()
+    except (httpx.HTTPError, ValueError):
+        return HttpResponse("Unable to reach GitHub", status=502)
+
+    # Find or create the user
+    user, created = await User.objects.aget_or_create(
+        username=user_info["login"],
+        defaults={
+            "email": user_info.get("email", ""),
+            "first_name": user_info.get("name", ""),
+        },
+    )
+
+    # Log the user in
+    await sync_to_async(auth_login)(request, user)
+
+    response = redirect(reverse("home"))
+    response.set_cookie(
+        "oauth_token",
+        token_response["access_token"],
+        max_age=timedelta(days=30),  # Cookie expiration time
+        httponly=True,  # Prevent access via JavaScript
+        secure=False,  # Use True for HTTPS, False for local development (adjust as necessary)
+    )
+    logger.info("GitHub login", extra={"user": user.pk, "new_user": created})
+    return response
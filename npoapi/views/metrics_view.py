@@ -0,0 +1,22 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from npoapi.metrics import collect, render
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. With METRICS_TOKEN set, the scraper must send
+    it as a bearer token (Prometheus' `authorization` scrape option). Without
+    one it is only served with DEBUG on (npoapi.W001).
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=404)
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {token}"):
+            return HttpResponse(status=401)
+    return HttpResponse(render(collect()), content_type=PROMETHEUS_CONTENT_TYPE)
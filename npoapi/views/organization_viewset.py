@@ -1,13 +1,40 @@
 # views/organization_viewset.py
+from django.db import transaction
 from rest_framework import viewsets, status
 from rest_framework.permissions import DjangoModelPermissions, IsAuthenticated
 from rest_framework.response import Response
-from npoapi.models import Organization, Project
-from npoapi.serializers import OrganizationSerializer, ProjectSerializer
+from npoapi.models import Organization, OrganizationStats, Project
+from npoapi.serializers import (
+    OrganizationSerializer,
+    OrganizationStatsSerializer,
+    OrganizationWithStatsSerializer,
+    ProjectSerializer,
+)
 from rest_framework.decorators import action
+from npoapi.conditional import ConditionalGetMixin
+from npoapi.caching import cached_response
+from npoapi.db_router import ReplicaReadMixin
+from npoapi.exports import ExportMixin
+from npoapi.fastpath import ValuesListMixin
+from npoapi.services.organization_stats_service import OrganizationStatsService
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+def _with_stats(request, tag, stats_tag):
+    # ?include=stats responses also change with the organizations' stats
+    return [tag, stats_tag] if _includes_stats(request) else [tag]
+
+
+def _includes_stats(request):
+    return "stats" in request.query_params.get("include", "").split(",")
+
+
+class OrganizationViewSet(
+    ConditionalGetMixin,
+    ReplicaReadMixin,
+    ExportMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     """
     A viewset for viewing, creating, updating, and deleting organizations.
     Permissions are managed based on Django's built-in group and permission system.
@@ -16,6 +43,16 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = [DjangoModelPermissions]  # Use Django's built-in permissions
+    keyset_ordering_fields = ["id", "name"]
+    keyset_default_ordering = "id"
+    replica_read_actions = [
+        "list",
+        "retrieve",
+        "get_user_organization",
+        "export",
+        "stats",
+    ]
+    export_name = "organizations"
 
     def get_permissions(self):
         """
@@ -33,6 +70,32 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             permission_classes = [DjangoModelPermissions]
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request is not None and _includes_stats(self.request):
+            queryset = queryset.select_related("stats")
+        return queryset
+
+    def get_serializer_class(self):
+        # ?include=stats embeds each organization's stats (nested, so lists
+        # leave the .values() fast path)
+        if self.action in ("list", "retrieve", "export") and _includes_stats(
+            self.request
+        ):
+            return OrganizationWithStatsSerializer
+        return super().get_serializer_class()
+
+    def get_conditional_queryset(self):
+        if self.action == "get_user_organization":
+            return Organization.objects.filter(user=self.request.user)
+        if self.action == "stats":
+            return OrganizationStats.objects.filter(organization_id=self.kwargs["pk"])
+        queryset = super().get_conditional_queryset()
+        if queryset is not None and _includes_stats(self.request):
+            stats = OrganizationStats.objects.filter(organization__in=queryset)
+            return [queryset, stats]
+        return queryset
+
     # Custom action to retrieve the organization associated with the logged-in user
     @action(
         detail=False,
@@ -40,6 +103,7 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         url_path="user",
         permission_classes=[IsAuthenticated],
     )
+    @cached_response(lambda view, request: [f"user-organization:{request.user.pk}"])
     def get_user_organization(self, request):
         """
         Retrieves the organization associated with the logged-in user.
@@ -89,14 +153,24 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @cached_response(
+        lambda view, request: _with_stats(
+            request, "organizations", "organization-stats"
+        )
+    )
     def list(self, request, *args, **kwargs):
         """
-        List all organizations if the user has the necessary permissions.
+        List organizations one keyset page at a time if the user has the necessary
+        permissions. The next page is linked from the Link header.
         """
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        organizations = self.list_data(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(organizations)
 
+    @cached_response(
+        lambda view, request, pk: _with_stats(
+            request, f"organization:{pk}", f"organization-stats:{pk}"
+        )
+    )
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single organization if the user has the necessary permissions.
@@ -104,3 +178,21 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
+
+    @action(detail=True, methods=["get"], url_path="stats")
+    @cached_response(lambda view, request, pk: [f"organization-stats:{pk}"])
+    def stats(self, request, pk=None):
+        """
+        Project count, claimed and unclaimed projects, active developers and
+        the latest claim date, read from the precomputed OrganizationStats row.
+        """
+        organization = self.get_object()
+        stats = OrganizationStats.objects.filter(pk=organization.pk).first()
+        if stats is None:
+            # An organization inserted without one (e.g. in bulk); computed once
+            # here and kept up to date from then on. Inside the transaction the
+            # read goes to the primary, which has the new row.
+            with transaction.atomic():
+                OrganizationStatsService().refresh([organization.pk], create=True)
+                stats = OrganizationStats.objects.get(pk=organization.pk)
+        return Response(OrganizationStatsSerializer(stats).data)
@@ -1,19 +1,76 @@
+import logging
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
-from npoapi.models import Project, Organization
-from npoapi.serializers import ProjectSerializer
-from npoapi.services.github_token_service import GitHubTokenService
-from npoapi.services.github_service import GitHubService
-
-
-class ProjectViewSet(viewsets.ModelViewSet):
+from npoapi.models import Project, Organization, ProvisioningJob
+from npoapi.serializers import ProjectSerializer, taken_project_names
+from npoapi.signals import invalidate_projects
+from npoapi.pagination import ProjectKeysetPagination
+from npoapi.conditional import ConditionalGetMixin
+from npoapi.caching import cached_response
+from npoapi.db_router import ReplicaReadMixin
+from npoapi.exports import ExportMixin
+from npoapi.fastpath import ValuesListMixin
+from npoapi.search import search_projects, search_terms
+from npoapi.services.provisioning_service import ProvisioningService, ProvisioningError
+from npoapi.services.claim_service import ClaimService, ClaimError
+from npoapi.services.organization_stats_service import OrganizationStatsService
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectViewSet(
+    ConditionalGetMixin,
+    ReplicaReadMixin,
+    ExportMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ProjectSerializer
     queryset = (
         Project.objects.all()
     )  # Default queryset for global listing (developer view)
+    pagination_class = ProjectKeysetPagination
+    keyset_ordering_fields = ["id", "name"]
+    keyset_default_ordering = "id"
+    replica_read_actions = [
+        "list",
+        "retrieve",
+        "get_user_projects",
+        "export",
+        "search",
+    ]
+    export_name = "projects"
+
+    def get_conditional_queryset(self):
+        if self.action == "get_user_projects":
+            return Project.objects.filter(organization__user=self.request.user)
+        return super().get_conditional_queryset()
+
+    # --------------------------------
+    # LIST: /projects/ (Global list for developers)
+    # --------------------------------
+    @cached_response(lambda view, request: ["projects"])
+    def list(self, request, *args, **kwargs):
+        """
+        List projects one keyset page at a time (global view, e.g., for developers).
+        Query params: cursor, page_size, ordering (id, name, -id, -name), include_total.
+        """
+        projects = self.list_data(self.filter_queryset(self.get_queryset()))
+
+        return Response(
+            {
+                "message": "Projects retrieved successfully.",
+                **self.paginator.get_paginated_data(projects),
+            },
+            status=status.HTTP_200_OK,
+        )
 
     # Custom action to get projects for the user's organization
     @action(
@@ -22,6 +79,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         url_path="user-projects",
         permission_classes=[IsAuthenticated],
     )
+    @cached_response(lambda view, request: [f"user-projects:{request.user.pk}"])
     def get_user_projects(self, request):
         user = request.user
         try:
@@ -46,76 +104,448 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+    # Lightweight status for clients polling an asynchronously provisioned project
+    @action(detail=True, methods=["get"], url_path="provisioning")
+    def provisioning(self, request, pk=None):
+        project = (
+            Project.objects.filter(pk=pk)
+            .values("id", "provisioning_status", "repository_url")
+            .first()
+        )
+        if project is None:
+            return Response(
+                {"detail": "Project not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        job = (
+            ProvisioningJob.objects.filter(project_id=pk)
+            .values("status", "attempts", "max_attempts", "last_error", "updated_at")
+            .first()
+        )
+        return Response(
+            {
+                "project": project["id"],
+                "status": project["provisioning_status"],
+                "repository_url": project["repository_url"],
+                "job": job,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    # --------------------------------
+    # CLAIM: /projects/<id>/claim/ and /projects/<id>/unclaim/
+    # --------------------------------
+    @action(detail=True, methods=["post"], url_path="claim")
+    def claim(self, request, pk=None):
+        """Take one of the project's max_claimers spots for the current developer"""
+        service = ClaimService()
+        developer = service.get_developer(request.user)
+        if developer is None:
+            return Response(
+                {"error": "Only developers can claim projects."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        project_id = self.get_object().pk  # 404 for unknown or malformed ids
+        try:
+            claim = service.claim(project_id, developer)
+        except ClaimError as e:
+            return Response({"error": e.message}, status=e.status_code)
+
+        spots = Project.objects.values("claim_count", "max_claimers").get(
+            pk=project_id
+        )
+        return Response(
+            {
+                "message": "Project claimed.",
+                "project": project_id,
+                "date_claimed": claim.date_claimed,
+                **spots,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["post"], url_path="unclaim")
+    def unclaim(self, request, pk=None):
+        service = ClaimService()
+        developer = service.get_developer(request.user)
+        if developer is None:
+            return Response(
+                {"error": "You have not claimed this project."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        project_id = self.get_object().pk  # 404 for unknown or malformed ids
+        try:
+            service.unclaim(project_id, developer)
+        except ClaimError as e:
+            return Response({"error": e.message}, status=e.status_code)
+        return Response({"message": "Project unclaimed."}, status=status.HTTP_200_OK)
+
+    # --------------------------------
+    # SEARCH: /projects/search/?q=
+    # --------------------------------
+    @action(detail=False, methods=["get"], url_path="search")
+    @cached_response(lambda view, request: ["projects", "organizations"])
+    def search(self, request):
+        """
+        Full-text search over project name, description and organization name,
+        best match first. Query params: q, page_size (default 20), offset.
+        """
+        query = request.query_params.get("q", "").strip()
+        if not search_terms(query):
+            return Response(
+                {"error": "The q parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("page_size", 20))
+            offset = int(request.query_params.get("offset", 0))
+        except ValueError:
+            return Response(
+                {"error": "page_size and offset must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(max(limit, 1), settings.API_MAX_PAGE_SIZE)
+        offset = max(offset, 0)
+
+        results = []
+        for project, rank, highlights in search_projects(query, limit, offset):
+            data = ProjectSerializer(project).data
+            data["rank"] = rank
+            data["highlights"] = highlights
+            results.append(data)
+        return Response(
+            {
+                "query": query,
+                "projects": results,
+                # Ranked results can't use keyset cursors; page with ?offset=
+                "next_offset": offset + limit if len(results) == limit else None,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    # --------------------------------
+    # BULK: /projects/bulk/
+    # --------------------------------
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create, update or delete many projects in one request.
+        POST: [{"organization", "name", "description"}, ...]
+        PATCH: [{"id", ...fields to change}, ...]
+        DELETE: {"ids": [...]}
+        Answers with one result per item, in request order. A failed item
+        doesn't undo the others; the response is 207 if any item failed.
+        """
+        items = request.data
+        if request.method == "DELETE" and isinstance(items, dict):
+            items = items.get("ids")
+        if not isinstance(items, list):
+            return Response(
+                {"error": "Expected a list of items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.PROJECT_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    "error": f"At most {settings.PROJECT_BULK_MAX_ITEMS} items per request."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.method == "POST":
+            results = self._bulk_create(request, items)
+            if settings.ASYNC_PROJECT_PROVISIONING:
+                success_status = status.HTTP_202_ACCEPTED
+            else:
+                success_status = status.HTTP_201_CREATED
+        elif request.method == "PATCH":
+            results = self._bulk_update(request, items)
+            success_status = status.HTTP_200_OK
+        else:
+            results = self._bulk_delete(items)
+            success_status = status.HTTP_200_OK
+
+        failed = sum(1 for result in results if result["status"] >= 400)
+        return Response(
+            {
+                "message": "Bulk request processed.",
+                "succeeded": len(results) - failed,
+                "failed": failed,
+                "results": results,
+            },
+            status=status.HTTP_207_MULTI_STATUS if failed else success_status,
+        )
+
+    def _bulk_context(self, items):
+        """Everything the serializers look up, fetched once for the whole batch"""
+        items = [item for item in items if isinstance(item, dict)]
+        names = [item["name"] for item in items if isinstance(item.get("name"), str)]
+        organization_ids = [
+            item["organization"]
+            for item in items
+            if isinstance(item.get("organization"), (int, str))
+        ]
+        return {
+            **self.get_serializer_context(),
+            "taken_names": taken_project_names(names),
+            "organizations": Organization.objects.in_bulk(
+                [pk for pk in organization_ids if str(pk).isdigit()]
+            ),
+        }
+
+    def _bulk_create(self, request, items):
+        # One validation pass over the batch, with one name lookup for all items
+        serializer = self.get_serializer(
+            data=items, many=True, context=self._bulk_context(items)
+        )
+        serializer.is_valid()
+
+        results = [None] * len(items)
+        rows = []
+        for index, (data, errors) in enumerate(
+            zip(serializer.validated_data, serializer.item_errors)
+        ):
+            if data is None:
+                results[index] = _failed(index, 400, errors)
+            else:
+                project = Project(
+                    **data, provisioning_status=Project.PROVISIONING_PENDING
+                )
+                rows.append((index, project))
+        projects = [project for _, project in rows]
+        if not projects:
+            return results
+
+        # Insert first: the rows reserve the names before any repository exists
+        try:
+            self._bulk_insert(projects)
+        except IntegrityError:
+            # Another request took one of the names after validation; insert
+            # one by one so only the items that lost the race fail
+            inserted = []
+            for index, project in rows:
+                try:
+                    self._bulk_insert([project])
+                except IntegrityError:
+                    results[index] = _failed(index, 409, NAME_TAKEN)
+                else:
+                    inserted.append((index, project))
+            rows = inserted
+            projects = [project for _, project in rows]
+            if not projects:
+                return results
+
+        if settings.ASYNC_PROJECT_PROVISIONING:
+            for index, project in rows:
+                results[index] = {
+                    "index": index,
+                    "status": 202,
+                    "project": ProjectSerializer(project).data,
+                    "provisioning_url": reverse(
+                        "project-provisioning", args=[project.pk], request=request
+                    ),
+                }
+        else:
+            self._bulk_provision(rows, results)
+
+        invalidate_projects(
+            [project.pk for project in projects],
+            {project.organization_id for project in projects},
+        )
+        return results
+
+    def _bulk_insert(self, projects):
+        with transaction.atomic():
+            Project.objects.bulk_create(projects)
+            # bulk_create skips the signals that count projects
+            OrganizationStatsService().projects_added(
+                [project.organization_id for project in projects]
+            )
+            if settings.ASYNC_PROJECT_PROVISIONING:
+                ProvisioningService().enqueue_many(projects)
+
+    def _bulk_provision(self, rows, results):
+        """Create the repositories in parallel and drop the projects whose repo failed"""
+        try:
+            outcomes = ProvisioningService().create_repositories(
+                [(project.name, project.description) for _, project in rows]
+            )
+        except ProvisioningError as e:
+            outcomes = [e] * len(rows)
+
+        now = timezone.now()
+        provisioned, failed_ids = [], []
+        for (index, project), outcome in zip(rows, outcomes):
+            if isinstance(outcome, ProvisioningError):
+                failed_ids.append(project.pk)
+                results[index] = _failed(
+                    index, outcome.status_code, {"detail": outcome.message}
+                )
+                continue
+            project.repository_url = outcome
+            project.provisioning_status = Project.PROVISIONING_READY
+            project.updated_at = now
+            provisioned.append(project)
+            results[index] = {
+                "index": index,
+                "status": 201,
+                "project": ProjectSerializer(project).data,
+                "github_repo": outcome,
+            }
+
+        with transaction.atomic():
+            Project.objects.bulk_update(
+                provisioned, ["repository_url", "provisioning_status", "updated_at"]
+            )
+            Project.objects.filter(pk__in=failed_ids).delete()
+
+    def _bulk_update(self, request, items):
+        ids = [_item_id(item) for item in items]
+        projects = Project.objects.in_bulk([pk for pk in ids if pk is not None])
+        organization_ids = {project.organization_id for project in projects.values()}
+        context = self._bulk_context(items)
+
+        results = []
+        changed, fields = [], set()
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            project = projects.get(pk)
+            if pk is None:
+                results.append(_failed(index, 400, INVALID_ID))
+                continue
+            if project is None:
+                results.append(_failed(index, 404, NOT_FOUND))
+                continue
+
+            serializer = self.get_serializer(
+                project, data=item, partial=True, context=context
+            )
+            if not serializer.is_valid():
+                results.append(_failed(index, 400, serializer.errors))
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(project, attr, value)
+                fields.add(attr)
+            changed.append(project)
+            results.append({"index": index, "status": 200, "project": None})
+
+        if changed:
+            # bulk_update skips auto_now, so stamp updated_at for the conditional GETs
+            now = timezone.now()
+            for project in changed:
+                project.updated_at = now
+            try:
+                with transaction.atomic():
+                    Project.objects.bulk_update(changed, [*fields, "updated_at"])
+                    if "organization" in fields:
+                        # Moved projects take their claims along; bulk_update
+                        # skips the signal that would refresh the stats
+                        OrganizationStatsService().refresh(
+                            organization_ids
+                            | {project.organization_id for project in changed}
+                        )
+            except IntegrityError:
+                # Another request took one of the names after validation
+                return [
+                    _failed(result["index"], 409, NAME_TAKEN)
+                    if result["status"] == 200
+                    else result
+                    for result in results
+                ]
+            organization_ids |= {project.organization_id for project in changed}
+            invalidate_projects([project.pk for project in changed], organization_ids)
+
+        for result in results:
+            if result["status"] == 200:
+                project = projects[ids[result["index"]]]
+                result["project"] = ProjectSerializer(project).data
+        return results
+
+    def _bulk_delete(self, items):
+        ids = [
+            _item_id(item if isinstance(item, dict) else {"id": item}) for item in items
+        ]
+        existing = set(
+            Project.objects.filter(pk__in=[pk for pk in ids if pk is not None])
+            .values_list("id", flat=True)
+        )
+        # QuerySet.delete() still sends post_delete, which invalidates the cache
+        Project.objects.filter(pk__in=existing).delete()
+
+        results = []
+        for index, pk in enumerate(ids):
+            if pk is None:
+                results.append(_failed(index, 400, INVALID_ID))
+            elif pk in existing:
+                results.append({"index": index, "status": 204, "id": pk})
+            else:
+                results.append(_failed(index, 404, NOT_FOUND))
+        return results
+
+    # --------------------------------
+    # RETRIEVE: /projects/<id>/
+    # --------------------------------
+    @cached_response(lambda view, request, pk: [f"project:{pk}"])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     # --------------------------------
     # CREATE: /projects/
     # --------------------------------
     def create(self, request, *args, **kwargs):
-        print("Received request to create project")
-
         # Step 1: Validate and serialize the incoming data
         serializer = self.get_serializer(
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
-        print("Data is valid")
 
         # Extract project data
         project_data = serializer.validated_data
         repo_name = project_data["name"]
         description = project_data["description"]
 
-        # Step 2: Initialize GitHubTokenService
-        github_token_service = GitHubTokenService()
-
-        # Step 3: Generate the JWT to check GitHub App permissions
-        print("Generating JWT for permission check...")
-        jwt_token = github_token_service.generate_jwt()
-
-        # Step 4: Use the JWT to check GitHub App permissions
-        github_service_jwt = GitHubService(token=jwt_token, is_jwt=True)
-        permissions = github_service_jwt.check_github_app_permissions()
+        # Step 2: In async mode, save the project now and let the provisioner
+        # create the repository in the background
+        if settings.ASYNC_PROJECT_PROVISIONING:
+            with transaction.atomic():
+                project = Project.objects.create(
+                    **project_data, provisioning_status=Project.PROVISIONING_PENDING
+                )
+                ProvisioningService().enqueue(project)
 
-        if not permissions:
-            print("GitHub App does not have the required permissions.")
+            response_serializer = ProjectSerializer(project)
             return Response(
                 {
-                    "error": "GitHub App does not have the required permissions to create repositories."
+                    "message": "Project created. GitHub repository is being provisioned.",
+                    "project": response_serializer.data,
+                    "provisioning_url": reverse(
+                        "project-provisioning", args=[project.pk], request=request
+                    ),
                 },
-                status=status.HTTP_403_FORBIDDEN,
+                status=status.HTTP_202_ACCEPTED,
             )
 
-        # Step 5: Get the installation token to create the repository
-        print("Getting installation token for repo creation...")
-        installation_token = github_token_service.get_installation_token()
-
-        if not installation_token:
-            return Response(
-                {"error": "Unable to retrieve installation token."},
-                status=status.HTTP_401_UNAUTHORIZED,
+        # Step 3: Check the GitHub App permissions, get the (cached) installation
+        # token and use it to create the GitHub repository
+        try:
+            repo_url = ProvisioningService().create_repository(
+                name=repo_name, description=description
             )
-
-        # Step 6: Use the installation token to create a GitHub repository
-        github_service_installation = GitHubService(token=installation_token)
-        repo_url = github_service_installation.create_github_repo(
-            name=repo_name, description=description
-        )
-
-        if not repo_url:
-            print("Failed to create GitHub repository.")
-            return Response(
-                {"error": "Failed to create the GitHub repository."},
-                status=status.HTTP_400_BAD_REQUEST,
+        except ProvisioningError as e:
+            logger.warning(
+                "Failed to create GitHub repository",
+                extra={"project": repo_name, "error": e.message},
             )
-
-        # Step 7: Save the project to the database, including the repo URL
-        project = Project.objects.create(
-            organization=project_data["organization"],
-            name=repo_name,
-            description=description,
-            repository_url=repo_url,
+            return Response({"error": e.message}, status=e.status_code)
+
+        # Step 4: Save the project to the database, including the repo URL, in
+        # one transaction with its organization's stats
+        with transaction.atomic():
+            project = Project.objects.create(**project_data, repository_url=repo_url)
+        logger.info(
+            "Project created", extra={"project": project.pk, "repository": repo_url}
         )
 
-        # Step 8: Return the created project in the response
+        # Step 5: Return the created project in the response
         response_serializer = ProjectSerializer(project)
         return Response(
             {
@@ -126,24 +556,43 @@ class ProjectViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
+    def perform_update(self, serializer):
+        # Moving a project refreshes both organizations' stats from the save
+        # signal; keep that in the update's transaction
+        with transaction.atomic():
+            serializer.save()
+
+
+# Per-item errors for /projects/bulk/
+NAME_TAKEN = {"name": ["A project with this name already exists."]}
+INVALID_ID = {"id": ["A valid id is required."]}
+NOT_FOUND = {"detail": "Project not found."}
+
+
+def _failed(index, status_code, errors):
+    return {"index": index, "status": status_code, "errors": errors}
+
+
+def _item_id(item):
+    try:
+        return int(item["id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
 
 def retrieve(self, request, *args, **kwargs):
     """
     Retrieve a specific project by its ID, ensuring the user has permission to view it.
     """
-    print("Received request to retrieve project")
-
     # Step 1: Get the project object by ID
     project = (
         self.get_object()
     )  # This fetches the project by its ID using the DRF's default behavior.
-    print(f"Found project with ID {project.id}")
 
     # Step 2: Check if the user has permission to view the project
     if (
         project.organization.owner != request.user
     ):  # Assuming `organization.owner` defines ownership
-        print(f"User {request.user} does not have permission to view this project.")
         raise PermissionDenied("You do not have permission to view this project.")
 
     # Step 3: Serialize the project data
@@ -165,20 +614,16 @@ def retrieve(self, request, *args, **kwargs):
         """
         Update an existing project by its ID.
         """
-        print("Received request to update project")
-
         # Step 1: Get the project object
         project = self.get_object()  # This method fetches the project by ID
-        print(f"Found project with ID {project.id}")
 
         # Step 2: Validate and serialize the incoming data
         serializer = self.get_serializer(project, data=request.data, partial=False)
         serializer.is_valid(raise_exception=True)
-        print("Data is valid")
 
         # Step 3: Save the updated project data
         self.perform_update(serializer)
-        print(f"Project with ID {project.id} updated successfully")
+        logger.info("Project updated", extra={"project": project.pk})
 
         # Step 4: Return the updated project data in the response
         return Response(
@@ -196,20 +641,16 @@ def retrieve(self, request, *args, **kwargs):
         """
         Partially update an existing project by its ID.
         """
-        print("Received request to partially update project")
-
         # Step 1: Get the project object
         project = self.get_object()  # This method fetches the project by ID
-        print(f"Found project with ID {project.id}")
 
         # Step 2: Validate and serialize the incoming data (partial=True allows partial updates)
         serializer = self.get_serializer(project, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        print("Partial data is valid")
 
         # Step 3: Save the partially updated project data
         self.perform_update(serializer)
-        print(f"Project with ID {project.id} partially updated successfully")
+        logger.info("Project updated", extra={"project": project.pk})
 
         # Step 4: Return the partially updated project data in the response
         return Response(
@@ -227,15 +668,13 @@ def retrieve(self, request, *args, **kwargs):
         """
         Delete an existing project by its ID.
         """
-        print("Received request to delete project")
-
         # Step 1: Get the project object
         project = self.get_object()  # This method fetches the project by ID
-        print(f"Found project with ID {project.id}")
 
         # Step 2: Delete the project from the database
+        project_id = project.pk
         project.delete()
-        print(f"Project with ID {project.id} deleted successfully")
+        logger.info("Project deleted", extra={"project": project_id})
 
         # Step 3: Return a success response
         return Response(
@@ -244,28 +683,3 @@ def retrieve(self, request, *args, **kwargs):
             },
             status=status.HTTP_204_NO_CONTENT,
         )
-
-    # --------------------------------
-    # LIST: /projects/ (Global list for developers)
-    # --------------------------------
-    def list(self, request, *args, **kwargs):
-        """
-        List all projects (global view, e.g., for developers).
-        """
-        print("Received request to list all projects")
-
-        # Step 1: Get all projects
-        projects = self.get_queryset()
-        print(f"Found {projects.count()} projects")
-
-        # Step 2: Serialize the projects
-        serializer = self.get_serializer(projects, many=True)
-
-        # Step 3: Return the serialized projects in the response
-        return Response(
-            {
-                "message": "Projects retrieved successfully.",
-                "projects": serializer.data,
-            },
-            status=status.HTTP_200_OK,
-        )
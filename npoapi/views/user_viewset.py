@@ -1,10 +1,14 @@
-from datetime import timedelta
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.contrib.auth import authenticate, login, get_user_model
-from rest_framework.authtoken.models import Token
+from django.conf import settings
+from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.models import Group
+from npoapi.caching import cached_response
+from npoapi.db_router import ReplicaReadMixin
+from npoapi.exports import ExportMixin
+from npoapi.fastpath import ValuesListMixin
+from npoapi.models import Token
 from npoapi.serializers import (
     UserSerializer,
 )  # Ensure this serializer includes the organization field
@@ -12,24 +16,39 @@ from npoapi.serializers import (
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(
+    ReplicaReadMixin, ExportMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     """
     A viewset that provides the standard actions for the User model,
     including CRUD functionality and custom login.
     """
 
-    queryset = User.objects.all()
+    # UserSerializer lists group ids; one query per page instead of per user
+    queryset = User.objects.prefetch_related("groups")
     serializer_class = (
         UserSerializer  # Ensure your UserSerializer includes 'organization'
     )
+    keyset_ordering_fields = ["id", "username", "date_joined"]
+    keyset_default_ordering = "id"
+    replica_read_actions = ["list", "retrieve", "export"]
+    export_name = "users"
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve", "update", "partial_update", "destroy"]:
+        if self.action in [
+            "list",
+            "retrieve",
+            "export",
+            "update",
+            "partial_update",
+            "destroy",
+        ]:
             permission_classes = [permissions.IsAuthenticated]
         elif self.action == "create":
             permission_classes = [permissions.AllowAny]
         else:
-            permission_classes = [permissions.AllowAny]
+            # Custom actions (login, logout) declare their own permission_classes
+            return super().get_permissions()
         return [permission() for permission in permission_classes]
 
     def create(self, request, *args, **kwargs):
@@ -112,7 +131,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
         if user is not None:
             login(request, user)
-            token, created = Token.objects.get_or_create(user=user)
+            token = Token.issue(user)
 
             # Serialize the user data
             user_data = UserSerializer(user).data
@@ -129,7 +148,7 @@ class UserViewSet(viewsets.ModelViewSet):
             response.set_cookie(
                 "auth_token",
                 token.key,
-                max_age=timedelta(days=30),  # Cookie expiration time
+                max_age=settings.TOKEN_TTL,  # Cookie expires with the token
                 httponly=True,  # Prevent JavaScript access
                 secure=False,  # Set to True for production with HTTPS
             )
@@ -148,15 +167,29 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def user_logout(self, request):
         """
-        Log out the user and remove the auth token cookie.
+        Log out the user: revoke their token everywhere (the cached validations
+        go with it) and remove the auth token cookie.
         """
+        Token.revoke(request.user)
+        logout(request)
         response = Response(
             {"message": "Logged out successfully."}, status=status.HTTP_200_OK
         )
         response.delete_cookie("auth_token")
         return response
 
+    @cached_response(lambda view, request: ["users"])
+    def list(self, request, *args, **kwargs):
+        """
+        Endpoint to list users one keyset page at a time.
+        URL: /users/
+        Method: GET
+        """
+        users = self.list_data(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(users)
+
     # Fix indentation here for retrieve method
+    @cached_response(lambda view, request, pk=None: [f"user:{pk}"])
     def retrieve(self, request, pk=None):
         """
         Endpoint to retrieve a specific user.
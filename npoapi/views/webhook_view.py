@@ -0,0 +1,46 @@
+import json
+import logging
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from npoapi import metrics
+from npoapi.services.webhook_service import WebhookEventService
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@require_POST
+def github_webhook(request):
+    """
+    GitHub App webhook receiver. Checks the X-Hub-Signature-256 HMAC against
+    GITHUB_WEBHOOK_SECRET, queues the delivery and answers 202 right away;
+    `manage.py process_webhook_events` applies it. GitHub gives up on a
+    delivery after 10 seconds, so nothing slower happens here.
+    """
+    service = WebhookEventService()
+    if not service.verify(request.body, request.headers.get("X-Hub-Signature-256")):
+        metrics.GITHUB_WEBHOOKS.inc(event="unknown", outcome="rejected")
+        logger.warning(
+            "Webhook signature mismatch",
+            extra={"ip": request.META.get("REMOTE_ADDR")},
+        )
+        return HttpResponse(status=401)
+
+    event = request.headers.get("X-GitHub-Event", "")
+    delivery_id = request.headers.get("X-GitHub-Delivery", "")
+    body = request.body
+    if request.content_type == "application/x-www-form-urlencoded":
+        # The hook's other content type: the JSON in a "payload" form field
+        body = request.POST.get("payload", "")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or not delivery_id:
+        metrics.GITHUB_WEBHOOKS.inc(event=event or "unknown", outcome="invalid")
+        return HttpResponse(status=400)
+
+    queued = service.record(delivery_id, event, payload)
+    metrics.GITHUB_WEBHOOKS.inc(event=event, outcome="queued" if queued else "ignored")
+    return HttpResponse(status=202 if queued else 204)
@@ -1,3 +1,4 @@
+import sys
 from pathlib import Path
 import environ
 
@@ -18,6 +19,11 @@ SECRET_KEY = env(
 
 DEBUG = env.bool("DEBUG", default=True)
 
+# `manage.py test` turns DEBUG off but runs in one process, where a per-process
+# cache is shared by everything (npoapi.E001)
+if sys.argv[1:2] == ["test"]:
+    SILENCED_SYSTEM_CHECKS = ["npoapi.E001"]
+
 APPEND_SLASH = False
 
 ALLOWED_HOSTS = []
@@ -41,24 +47,74 @@ INSTALLED_APPS = [
 GITHUB_APP_ID = env.int("GITHUB_APP_ID", default=1005976)  # Converts to int
 GITHUB_INSTALLATION_ID = env.int("GITHUB_INSTALLATION_ID", default=55276178)
 GITHUB_PRIVATE_KEY = env("GITHUB_PRIVATE_KEY", default="NOT_SET").replace("\\n", "\n")
-# print(f"GITHUB_PRIVATE_KEY: {GITHUB_PRIVATE_KEY}")
+GITHUB_API_URL = env("GITHUB_API_URL", default="https://api.github.com")
+GITHUB_OAUTH_URL = env("GITHUB_OAUTH_URL", default="https://github.com")
+
+# Outbound GitHub HTTP transport (npoapi/services/github_transport.py)
+GITHUB_CONNECT_TIMEOUT = env.float("GITHUB_CONNECT_TIMEOUT", default=3.05)  # seconds
+GITHUB_READ_TIMEOUT = env.float("GITHUB_READ_TIMEOUT", default=10.0)  # seconds
+GITHUB_MAX_RETRIES = env.int("GITHUB_MAX_RETRIES", default=3)
+GITHUB_RETRY_BACKOFF = env.float("GITHUB_RETRY_BACKOFF", default=0.5)  # seconds
+GITHUB_MAX_RETRY_WAIT = env.float("GITHUB_MAX_RETRY_WAIT", default=30.0)  # seconds
+GITHUB_POOL_MAXSIZE = env.int("GITHUB_POOL_MAXSIZE", default=10)  # connections per host
+
+GITHUB_JWT_TTL = env.int("GITHUB_JWT_TTL", default=5 * 60)  # App JWT lifetime in seconds
+# Refresh installation tokens this many seconds before GitHub expires them
+GITHUB_TOKEN_REFRESH_MARGIN = env.int("GITHUB_TOKEN_REFRESH_MARGIN", default=5 * 60)
+
+# Rate-limit scheduler for installation-token API calls
+# (npoapi/services/github_rate_limiter.py). Workers share the budget GitHub
+# reports in X-RateLimit-* headers through the cache, spread it until the reset
+# with this much burst, and stop together on Retry-After / secondary limits.
+GITHUB_RATE_LIMIT_ENABLED = env.bool("GITHUB_RATE_LIMIT_ENABLED", default=True)
+GITHUB_RATE_LIMIT_BURST = env.int("GITHUB_RATE_LIMIT_BURST", default=50)  # calls
+# Share of the budget background calls (provisioner, repository sync) leave for
+# interactive ones
+GITHUB_RATE_LIMIT_BACKGROUND_RESERVE = env.float(
+    "GITHUB_RATE_LIMIT_BACKGROUND_RESERVE", default=0.2
+)
+# Longest a call queues for budget before failing, by priority (seconds)
+GITHUB_RATE_LIMIT_MAX_WAIT = env.float("GITHUB_RATE_LIMIT_MAX_WAIT", default=10.0)
+GITHUB_RATE_LIMIT_BACKGROUND_MAX_WAIT = env.float(
+    "GITHUB_RATE_LIMIT_BACKGROUND_MAX_WAIT", default=300.0
+)
+# Pause after a secondary rate limit without Retry-After (GitHub asks for a minute)
+GITHUB_SECONDARY_RATE_LIMIT_PAUSE = env.int(
+    "GITHUB_SECONDARY_RATE_LIMIT_PAUSE", default=60
+)
+
+# The GitHub App's webhook secret; deliveries to /github/webhook/ must be signed
+# with it (empty: every delivery is rejected)
+GITHUB_WEBHOOK_SECRET = env("GITHUB_WEBHOOK_SECRET", default="")
+# Processed webhook events are kept this long, so redeliveries are recognised
+WEBHOOK_EVENT_RETENTION = env.int("WEBHOOK_EVENT_RETENTION", default=7 * 24 * 3600)
 
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",  # Default authentication backend
+    # ModelBackend with permissions cached per user and group version
+    "npoapi.auth_backends.CachedModelBackend",
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        # Expiring, rotating tokens with cached lookups (npoapi/authentication.py)
+        "npoapi.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # Keyset pagination for list endpoints (npoapi/pagination.py)
+    "DEFAULT_PAGINATION_CLASS": "npoapi.pagination.KeysetPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=100),
 }
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=1000)
+# Rows fetched and serialized at a time by the streaming /export/ endpoints
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
 
 MIDDLEWARE = [
+    # First, so its timings and query counts cover the whole request
+    "npoapi.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -67,6 +123,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "npoapi.db_router.PrimaryStickinessMiddleware",
+    "npoapi.authentication.TokenRotationMiddleware",
 ]
 
 # CORS configuration
@@ -80,6 +138,17 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",  # If you're using this for testing with Postman
 ]
 
+# Let browser clients read the pagination, cache validator, download and rotated
+# token headers
+CORS_EXPOSE_HEADERS = [
+    "Link",
+    "X-Total-Count",
+    "ETag",
+    "Last-Modified",
+    "Content-Disposition",
+    "X-Auth-Token",
+]
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000",  # Your Next.js frontend URL
     "http://127.0.0.1:3000",
@@ -112,9 +181,65 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # On disk rather than in memory, so concurrent writers in the claim race
+        # tests wait on SQLite's lock as they do against db.sqlite3
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# Read replicas, e.g. DATABASE_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 or a
+# comma-separated list of postgres:// URLs. Viewset list/retrieve reads go to a
+# random replica (npoapi/db_router.py); writes always go to "default".
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    DATABASES[f"replica_{index}"] = env.db_url_config(url)
+    DATABASES[f"replica_{index}"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["npoapi.db_router.ReplicaRouter"]
+# After a write, the client reads from the primary for this long (replication lag)
+READ_YOUR_WRITES_SECONDS = env.int("READ_YOUR_WRITES_SECONDS", default=5)
+
+# Serve the GitHub OAuth login/callback with native async views (run under ASGI)
+ASYNC_GITHUB_VIEWS = env.bool("ASYNC_GITHUB_VIEWS", default=False)
+
+# Project repository provisioning. When async, POST /projects/ answers 202 and
+# `manage.py run_provisioner` creates the GitHub repositories in the background.
+ASYNC_PROJECT_PROVISIONING = env.bool("ASYNC_PROJECT_PROVISIONING", default=False)
+PROVISIONING_MAX_ATTEMPTS = env.int("PROVISIONING_MAX_ATTEMPTS", default=5)
+PROVISIONING_RETRY_BACKOFF = env.int("PROVISIONING_RETRY_BACKOFF", default=30)  # seconds, doubles per attempt
+PROVISIONING_LOCK_TIMEOUT = env.int("PROVISIONING_LOCK_TIMEOUT", default=300)  # seconds before a stuck job is retaken
+
+# POST/PATCH/DELETE /projects/bulk/
+PROJECT_BULK_MAX_ITEMS = env.int("PROJECT_BULK_MAX_ITEMS", default=500)
+BULK_PROVISIONING_CONCURRENCY = env.int("BULK_PROVISIONING_CONCURRENCY", default=8)  # repos created at once
+
+# POST /projects/<id>/claim/: retries when SQLite reports "database is locked"
+CLAIM_MAX_RETRIES = env.int("CLAIM_MAX_RETRIES", default=8)
+CLAIM_RETRY_BACKOFF = env.float("CLAIM_RETRY_BACKOFF", default=0.01)  # seconds, doubles per retry
+
+# Cache shared by all workers (e.g. CACHE_URL=redis://localhost:6379/1); falls back
+# to a per-process cache for local development. Invalidations made by one process
+# (a worker, run_provisioner) only reach the others through a shared cache, so
+# the npoapi.E001 system check requires one when DEBUG is off.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# Per-user read-through cache for hot read endpoints (npoapi/caching.py)
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=300)  # seconds
+RESPONSE_CACHE_LOCK_TIMEOUT = env.int("RESPONSE_CACHE_LOCK_TIMEOUT", default=10)  # seconds
+
+# Resolved user/group permission sets (npoapi/auth_backends.py); entries are
+# versioned, so the timeout only evicts stale ones
+PERMISSION_CACHE_TIMEOUT = env.int("PERMISSION_CACHE_TIMEOUT", default=3600)  # seconds
+
+# API tokens (npoapi/models/token.py): a token expires TOKEN_TTL after it was
+# issued and is swapped for a new one on the first request after
+# TOKEN_ROTATE_AFTER; the old key stays valid for TOKEN_ROTATION_GRACE
+TOKEN_TTL = env.int("TOKEN_TTL", default=30 * 24 * 3600)  # seconds
+TOKEN_ROTATE_AFTER = env.int("TOKEN_ROTATE_AFTER", default=24 * 3600)  # seconds
+TOKEN_ROTATION_GRACE = env.int("TOKEN_ROTATION_GRACE", default=60)  # seconds
+# Validated tokens cached in the shared cache and in each worker's memory; with
+# the per-process cache fallback, TOKEN_LOCAL_CACHE_SECONDS bounds both layers
+TOKEN_CACHE_SECONDS = env.int("TOKEN_CACHE_SECONDS", default=300)
+TOKEN_LOCAL_CACHE_SECONDS = env.int("TOKEN_LOCAL_CACHE_SECONDS", default=2)
+
 AUTH_USER_MODEL = "auth.user"  # Use the custom user model
 
 # Password validation
@@ -151,3 +276,33 @@ GITHUB_REDIRECT_URI = "http://localhost:8000/github/callback/"  # Must match the
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Leveled, structured logs on stderr (npoapi/log_format.py): LOG_FORMAT=json
+# for log shippers, text (key=value) otherwise
+LOG_LEVEL = env("LOG_LEVEL", default="INFO")
+LOG_FORMAT = env("LOG_FORMAT", default="text")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "structured": {
+            "()": "npoapi.log_format.StructuredFormatter",
+            "as_json": LOG_FORMAT == "json",
+        },
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "structured"},
+    },
+    "root": {"handlers": ["console"], "level": "WARNING"},
+    "loggers": {
+        "npoapi": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
+    },
+}
+
+# Prometheus metrics at /metrics (npoapi/metrics.py). Under gunicorn, point
+# METRICS_MULTIPROC_DIR at a directory shared by the workers (emptied on
+# restart) so every scrape covers all of them.
+METRICS_MULTIPROC_DIR = env("METRICS_MULTIPROC_DIR", default="")
+METRICS_FLUSH_INTERVAL = env.float("METRICS_FLUSH_INTERVAL", default=1.0)  # seconds
+# Bearer token for scrapers; without one /metrics is only served with DEBUG on
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
@@ -1,19 +1,36 @@
 from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
 from npoapi.views import UserViewSet, OrganizationViewSet, ProjectViewSet
-from npoapi.views.github_viewset import github_login, github_callback
+from npoapi.views.github_viewset import (
+    github_login,
+    github_callback,
+    async_github_login,
+    async_github_callback,
+)
+from npoapi.views.async_project_view import async_create_project
 from npoapi.views.home_view import home  # Import the home view
+from npoapi.views.metrics_view import metrics
+from npoapi.views.webhook_view import github_webhook
 
 router = routers.DefaultRouter()
 router.register(r"users", UserViewSet, basename="user")
 router.register(r"organizations", OrganizationViewSet, basename="organization")
 router.register(r"projects", ProjectViewSet, basename="project")
 
+# Under ASGI the async OAuth views keep GitHub round trips off worker threads
+if settings.ASYNC_GITHUB_VIEWS:
+    github_login, github_callback = async_github_login, async_github_callback
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # Must come before the router, which would read "async" as a project id
+    path("projects/async/", async_create_project, name="project-create-async"),
     path("", include(router.urls)),
     path("github/login/", github_login, name="github_login"),
     path("github/callback/", github_callback, name="github_callback"),
+    path("github/webhook/", github_webhook, name="github_webhook"),
     path("home/", home, name="home"),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -1,11 +1,10 @@
 #!/bin/bash
 
 rm db.sqlite3
-rm -rf ./npoapi/migrations
 python3 manage.py migrate
-python3 manage.py makemigrations npoapi
-python3 manage.py migrate npoapi
 python3 manage.py loaddata users
 python3 manage.py loaddata tokens
+# loaddata skips the signals that keep organization stats
+python3 manage.py rebuild_org_stats
 
 